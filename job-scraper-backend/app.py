@@ -1,72 +1,832 @@
 # app.py
 
-from flask import Flask, jsonify, request
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
-# Import our scrapers
-from scrapers.jobinrwanda_scraper import JobInRwandaScraper
-from scrapers.greatrwandajobs_scraper import GreatRwandaJobsScraper
-from scrapers.unjobs_scraper import UNJobsScraper
-from scrapers.opportunity_scraper import OpportunityScraper
-from scrapers.opphubafrica_scraper import OppHubAfricaScraper
-# To add a new site, you would import its scraper class here
-# from scrapers.newsite_scraper import NewSiteScraper
+from enrichment import DetailCache, Enricher
+from job_store import InvalidCursorError, JobStore
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ScrapeMetrics
+from response_cache import ResponseCache, normalize_keyword
+from scheduler import PrescrapeScheduler
+from scrape_tasks import QueueFullError, ScrapeTaskRunner
+from single_flight import DEFAULT_LOCK_DIR, SingleFlight
+from scrapers.async_http_client import async_http_client
+from scrapers.circuit_breaker import CircuitOpenError
+from scrapers.http_client import http_client
+from scrapers.page_cache import parsed_pages
+from scrapers.parser_pool import parser_pool
+from streaming import NDJSON_MIMETYPE, SSE_MIMETYPE, merge_streams, to_ndjson, to_sse
+from scrapers.keywords import get_matcher
+from scrapers.registry import ScraperRegistry
 
 app = Flask(__name__)
 # Enable CORS to allow your React app to make requests to this backend
 CORS(app) 
 
 # --- Scraper Registration ---
-# This dictionary acts as a manager for all available scrapers.
-# To add a new website, you just need to add its scraper here.
-SCRAPERS = {
-    "jobinrwanda": JobInRwandaScraper(),
-    "greatrwandajobs": GreatRwandaJobsScraper(),
-    "unjobs": UNJobsScraper(),
-    "opportunity": OpportunityScraper(),
-    "opphubafrica": OppHubAfricaScraper(),
-    # "newsite": NewSiteScraper(), # Example of how you'd add another
+# Maps site name -> scraper, like a dict. Every `scrapers/<site>_scraper.py`
+# module (and every `job_scraper.scrapers` entry point) is a site, so adding
+# a website only takes adding its module. A scraper is imported and built
+# the first time its site is used, which keeps worker startup fast.
+# /api/sites lists the built-in sites in this order (the frontend selects the
+# first one by default), then any other discovered site by name.
+SITE_ORDER = ("jobinrwanda", "greatrwandajobs", "unjobs", "opportunity", "opphubafrica")
+SCRAPERS = ScraperRegistry(order=SITE_ORDER)
+
+# Upper bound on how many sites /api/scrape-all scrapes at the same time.
+SCRAPE_ALL_MAX_WORKERS = int(os.environ.get("SCRAPE_ALL_MAX_WORKERS", len(SCRAPERS)))
+
+# --- Listing and Response Caches ---
+# The unfiltered listing of every site is cached, and each keyword is then
+# answered by filtering it in memory: any number of keyword searches against
+# a warm site cost no upstream request. Only keywords a site's listing can't
+# answer (see `BaseScraper.listing_covers`) go to the site's own search, and
+# those results are cached per (site, keyword) in the response cache.
+# Job boards only change a few times a day, so a stale entry is served while
+# it is refreshed in the background.
+SITE_CACHE_TTLS = {
+    "jobinrwanda": 900,
+    "greatrwandajobs": 900,
+    "unjobs": 3600,  # Slow and rate-limited, refresh it less often
+    "opportunity": 900,
+    "opphubafrica": 900,
 }
 
+listing_cache = ResponseCache(
+    default_ttl=int(os.environ.get("CACHE_DEFAULT_TTL", 900)),
+    site_ttls=SITE_CACHE_TTLS,
+    max_entries=len(SCRAPERS),
+)
+
+response_cache = ResponseCache(
+    default_ttl=int(os.environ.get("CACHE_DEFAULT_TTL", 900)),
+    site_ttls=SITE_CACHE_TTLS,
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", 256)),
+)
+
+
+# --- Request Coalescing ---
+# Identical scrapes that run at the same time (a shared link, many users at
+# once) are coalesced: one request scrapes, the others wait for its result.
+# Listings are also coalesced across gunicorn workers, through lock files in
+# this directory (one per site). Keyword scrapes are only coalesced within a
+# process: their keys are as many as the keywords users send.
+scrape_flight = SingleFlight(
+    lock_dir=os.environ.get("SINGLE_FLIGHT_DIR", DEFAULT_LOCK_DIR),
+    cross_process=os.environ.get("SINGLE_FLIGHT_CROSS_PROCESS", "1") == "1",
+)
+
+
+def _flight_key(site_name, keyword):
+    return ("scrape", site_name, normalize_keyword(keyword))
+
+
+def _listing_flight_key(site_name):
+    return ("listing", site_name)
+
+# --- Metrics ---
+# Every registered scraper is wrapped with timing hooks; /metrics exposes the
+# results (and the cache and API counters) in the Prometheus text format.
+scrape_metrics = ScrapeMetrics()
+SCRAPERS.on_load(scrape_metrics.instrument)
+scrape_metrics.track_cache("listing", listing_cache)
+scrape_metrics.track_cache("response", response_cache)
+scrape_metrics.track_single_flight(scrape_flight)
+scrape_metrics.track_circuit_breakers(http_client)
+scrape_metrics.track_politeness(http_client)
+scrape_metrics.track_http_cache(http_client)
+scrape_metrics.track_page_cache(parsed_pages)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    # For streams, this is the time until the response starts.
+    started = g.pop("request_started", None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else None
+        scrape_metrics.observe_request(endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+
+def _has_jobs(result):
+    # Scrapers report upstream failures as an empty result; don't keep those around.
+    return result.get("total_jobs", 0) > 0
+
+
+def ensure_reachable(site_name):
+    """
+    Raises CircuitOpenError while the circuit breaker of the site is open, so
+    that a scrape with nothing cached to fall back on fails at once.
+    """
+    retry_after = SCRAPERS[site_name].retry_after()
+    if retry_after:
+        raise CircuitOpenError(site_name, retry_after)
+
+
+def scrape_error(site_name, e):
+    """The error fields reported for a failed scrape of a site."""
+    if isinstance(e, CircuitOpenError):
+        return {
+            "error": f"Site '{site_name}' is temporarily unavailable.",
+            "retry_after": math.ceil(e.retry_after),
+        }
+    print(f"An error occurred while scraping {site_name}: {e}")
+    return {"error": "An internal error occurred during scraping."}
+
+
+def scrape_error_status(site_name, e):
+    """
+    Returns (body, status, headers) of a failed scrape's response: 503 and
+    Retry-After while the site is unavailable, 500 otherwise. Shared by the
+    Flask and ASGI endpoints, so they answer alike.
+    """
+    error = scrape_error(site_name, e)
+    if "retry_after" in error:
+        return error, 503, {"Retry-After": str(error["retry_after"])}
+    return error, 500, {}
+
+
+def error_response(site_name, e):
+    """The JSON error response of a failed scrape (see `scrape_error_status`)."""
+    error, status, headers = scrape_error_status(site_name, e)
+    response = jsonify(error)
+    response.headers.update(headers)
+    return response, status
+
+
+def site_param_error(site_name):
+    """Returns (body, status) when the 'site' parameter is missing or unknown, else None."""
+    if not site_name:
+        return {"error": "A 'site' query parameter is required."}, 400
+    if site_name not in SCRAPERS:
+        return {"error": f"Site '{site_name}' is not supported."}, 404
+    return None
+
+
+def failed_section(site_name, e):
+    """The section of a site that could not be scraped, in a multi-site response."""
+    return {
+        "total_jobs": 0,
+        "unique_companies": 0,
+        "jobs": [],
+        **scrape_error(site_name, e),
+        "cache": None,
+    }
+
+
+def merge_sections(sites, started):
+    """The response of a multi-site scrape, from the section of every site."""
+    return {
+        "total_jobs": sum(section["total_jobs"] for section in sites.values()),
+        "matching_jobs": sum(len(section["jobs"]) for section in sites.values()),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "sites": sites,
+    }
+
+
+def listing_result(scraper, listing, keyword=None):
+    """The result of a scrape for `keyword`, answered by filtering the site's whole listing."""
+    return scraper.build_result(listing, scraper.filter_jobs(listing, keyword))
+
+
+def cached_listing(site_name):
+    """Returns (jobs, cache_status): the site's unfiltered listing, through the listing cache."""
+    scraper = SCRAPERS[site_name]
+
+    def compute():
+        ensure_reachable(site_name)
+        return scrape_flight.do(_listing_flight_key(site_name), scraper.fetch_jobs)
+
+    return listing_cache.get_or_compute(
+        site_name,
+        None,
+        compute,
+        cacheable=bool,  # An empty listing means the site could not be scraped
+    )
+
+
+def cached_scrape(site_name, keyword=None):
+    """
+    Returns (result, cache_status) for a site: the cached listing filtered
+    in memory, or for keywords the listing can't answer, a cached upstream
+    search. The returned dict is a copy, so callers may add fields to it.
+    """
+    scraper = SCRAPERS[site_name]
+    if scraper.listing_covers(keyword):
+        listing, status = cached_listing(site_name)
+        return listing_result(scraper, listing, keyword), status
+
+    def compute():
+        ensure_reachable(site_name)
+        return scrape_flight.do(
+            _flight_key(site_name, keyword), lambda: scraper.scrape(keyword=keyword), shared=False)
+
+    result, status = response_cache.get_or_compute(site_name, keyword, compute, cacheable=_has_jobs)
+    return dict(result), status
+
+# --- Pre-scraped Job Store ---
+# A background scheduler periodically scrapes every site into a local SQLite
+# store, so most requests are answered from the store without going upstream.
+# PRESCRAPE_INTERVAL=0 disables it; PRESCRAPE_IN_APP=0 is for deployments that
+# run `python scheduler.py` as a separate process instead.
+PRESCRAPE_INTERVAL = int(os.environ.get("PRESCRAPE_INTERVAL", 1800))
+SITE_PRESCRAPE_INTERVALS = {
+    "unjobs": 3 * 3600,  # Slow and rate-limited, crawl it less often
+}
+
+job_store = JobStore()
+prescrape_scheduler = PrescrapeScheduler(
+    SCRAPERS,
+    job_store,
+    interval=PRESCRAPE_INTERVAL or 1800,
+    site_intervals=SITE_PRESCRAPE_INTERVALS,
+)
+scrape_metrics.track_prescrape(prescrape_scheduler)
+
+
+def stored_scrape(site_name, keyword=None):
+    """
+    Answers a scrape from the job store.
+    Returns None when the site has not been synced recently enough, in which
+    case the caller should scrape live. While the site's circuit breaker is
+    open, the last stored listing is returned however old it is.
+    """
+    scraper = SCRAPERS[site_name]
+    if not PRESCRAPE_INTERVAL or not scraper.listing_covers(keyword):
+        return None
+    last_sync = job_store.last_sync(site_name)
+    if last_sync is None:
+        return None
+    max_age = 2 * prescrape_scheduler.interval_for(site_name)
+    if time.time() - last_sync["synced_at"] > max_age and not scraper.retry_after():
+        return None
+
+    candidates = job_store.find_jobs(site_name, get_matcher(keyword).term_groups())
+    jobs = scraper.filter_jobs(candidates, keyword)
+    return {
+        "total_jobs": last_sync["total_jobs"],
+        "filtered_jobs": len(jobs),
+        "unique_companies": last_sync["unique_companies"],
+        "jobs": jobs,
+    }
+
+
+def get_results(site_name, keyword=None):
+    """
+    Returns (result, source) for a site: from the job store when it is fresh,
+    otherwise from the response cache or a live scrape.
+    """
+    result = stored_scrape(site_name, keyword)
+    if result is not None:
+        return result, "STORE"
+    return cached_scrape(site_name, keyword)
+
+# --- Background Scrape Tasks ---
+# Used by the submit/poll endpoints (/api/scrape-jobs), so that a slow scrape
+# never holds an HTTP worker.
+scrape_tasks = ScrapeTaskRunner(
+    max_workers=int(os.environ.get("SCRAPE_TASK_WORKERS", 4)),
+    max_pending=int(os.environ.get("SCRAPE_TASK_MAX_PENDING", 100)),
+    retention=int(os.environ.get("SCRAPE_TASK_RETENTION", 600)),
+)
+
+# --- Detail-Page Enrichment ---
+# With enrich=1, the jobs of sites whose pages hold more than their listing
+# get a "details" field (description, requirements, salary). Job pages are
+# fetched concurrently, a few at a time per site, and each one only once:
+# the details are kept in data/details.db (or DETAIL_CACHE_PATH). A request
+# waits at most ENRICH_MAX_WAIT seconds for them; the rest are pending.
+detail_enricher = Enricher(
+    DetailCache(),
+    max_workers=int(os.environ.get("ENRICH_WORKERS", 8)),
+    max_per_host=int(os.environ.get("ENRICH_MAX_PER_HOST", 2)),
+    max_fetches=int(os.environ.get("ENRICH_MAX_FETCHES", 50)),
+    max_wait=float(os.environ.get("ENRICH_MAX_WAIT", 2)),
+)
+scrape_metrics.track_enrichment(detail_enricher)
+
+
+def wants_details(args):
+    """Whether the request asks for enrichment, e.g. `?enrich=1` or `?enrich=true`."""
+    return (args.get("enrich") or "").lower() in ("1", "true", "yes")
+
+
+def enrich_result(site_name, result):
+    """Returns `result` with the details of its jobs, when the site has any to add."""
+    scraper = SCRAPERS[site_name]
+    if not scraper.supports_details:
+        return result
+    return dict(result, jobs=detail_enricher.enrich(scraper, result["jobs"]))
+
+# --- Helpers ---
+
+def run_scraper(site_name, keyword=None, enrich=False):
+    """
+    Runs a single registered scraper and times it.
+    Errors are caught and reported in the section so that one broken site
+    does not take down a multi-site response.
+    """
+    started = time.perf_counter()
+    try:
+        section, cache_status = get_results(site_name, keyword)
+        if enrich:
+            section = enrich_result(site_name, section)
+        section["cache"] = cache_status
+    except Exception as e:
+        section = failed_section(site_name, e)
+    section["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return section
+
+
+def scrape_all(keyword=None, enrich=False):
+    """
+    Scrapes every registered site concurrently and merges the results.
+    The wall-clock time is that of the slowest site rather than the sum of
+    all of them.
+    """
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, SCRAPE_ALL_MAX_WORKERS)) as executor:
+        futures = {
+            site_name: executor.submit(run_scraper, site_name, keyword, enrich)
+            for site_name in SCRAPERS
+        }
+        sites = {site_name: future.result() for site_name, future in futures.items()}
+
+    return merge_sections(sites, started)
+
+
+def scrape_task(site_name, keyword=None):
+    """What a background task runs: one site, or every site for 'all'."""
+    if site_name == "all":
+        return scrape_all(keyword)
+    result, cache_status = get_results(site_name, keyword)
+    result["cache"] = cache_status
+    return result
+
+
+def site_events(site_name, keyword=None):
+    """
+    Streams the scrape of one site as events: "site_start", a "job" event per
+    matching job, "page" progress events, and a closing "site_end" event with
+    the counters of a regular scrape.
+    Like `run_scraper`, errors end up in the "site_end" event.
+    """
+    started = time.perf_counter()
+    yield {"type": "site_start", "site": site_name}
+    scraper = SCRAPERS[site_name]
+    try:
+        stored = stored_scrape(site_name, keyword)
+        listing = listing_cache.peek(site_name) if scraper.listing_covers(keyword) else None
+        if stored is not None or listing is not None:
+            if stored is not None:
+                source, result = "STORE", stored
+            else:
+                source, result = "CACHE", listing_result(scraper, listing, keyword)
+            for job in result["jobs"]:
+                yield {"type": "job", "site": site_name, "job": job}
+            summary = {key: result[key] for key in ("total_jobs", "filtered_jobs", "unique_companies")}
+        else:
+            # Streamed live scrapes don't fill the caches: that would mean
+            # holding the whole result in memory.
+            ensure_reachable(site_name)
+            source = "LIVE"
+            summary = {}
+            for event in scraper.stream(keyword):
+                if event["type"] == "summary":
+                    summary = {key: value for key, value in event.items() if key != "type"}
+                else:
+                    yield dict(event, site=site_name)
+    except Exception as e:
+        summary = scrape_error(site_name, e)
+        source = None
+    yield {
+        "type": "site_end",
+        "site": site_name,
+        **summary,
+        "source": source,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def all_sites_events(keyword=None):
+    """Merges the event streams of every site, scraped concurrently, and ends with a "done" event."""
+    started = time.perf_counter()
+    total_jobs = matching_jobs = 0
+    producers = [
+        (lambda site_name=site_name: site_events(site_name, keyword))
+        for site_name in SCRAPERS
+    ]
+    for event in merge_streams(producers, SCRAPE_ALL_MAX_WORKERS):
+        if event["type"] == "job":
+            matching_jobs += 1
+        elif event["type"] == "site_end":
+            total_jobs += event.get("total_jobs", 0)
+        yield event
+    yield {
+        "type": "done",
+        "total_jobs": total_jobs,
+        "matching_jobs": matching_jobs,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def event_stream_response(events):
+    """
+    Sends events as they are produced: Server-Sent Events when the client asks
+    for them (?format=sse or an 'Accept: text/event-stream' header), NDJSON
+    otherwise.
+    """
+    stream_format = request.args.get('format')
+    if stream_format is None and SSE_MIMETYPE in request.headers.get('Accept', ''):
+        stream_format = "sse"
+    if stream_format == "sse":
+        response = Response(to_sse(events), mimetype=SSE_MIMETYPE)
+    else:
+        response = Response(to_ndjson(events), mimetype=NDJSON_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # Don't let a proxy buffer the stream
+    return response
+
 # --- API Endpoints ---
 
 @app.route('/api/sites', methods=['GET'])
 def get_supported_sites():
     """
     An endpoint to tell the frontend which sites are available to scrape.
+    Only the discovered names are listed: no scraper is loaded for it.
     """
     return jsonify(list(SCRAPERS.keys()))
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Scraper, upstream, cache and API metrics, in the Prometheus text format."""
+    return Response(scrape_metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+
 @app.route('/api/scrape', methods=['GET'])
 def scrape_jobs():
     """
     The main scraping endpoint.
     It requires a 'site' query parameter.
-    It optionally accepts a 'keyword' query parameter.
+    It optionally accepts a 'keyword' query parameter, and 'enrich=1' to
+    add the details of every job, read from its own page.
     
     Example usage:
     - /api/scrape?site=jobinrwanda
     - /api/scrape?site=jobinrwanda&keyword=accountant
+    - /api/scrape?site=jobinrwanda&enrich=1
     """
     site_name = request.args.get('site')
     keyword = request.args.get('keyword')
 
+    invalid = site_param_error(site_name)
+    if invalid:
+        body, status = invalid
+        return jsonify(body), status
+
+    try:
+        data, cache_status = get_results(site_name, keyword)
+        if wants_details(request.args):
+            data = enrich_result(site_name, data)
+        response = jsonify(data)
+        response.headers["X-Cache"] = cache_status
+        return response
+    except Exception as e:
+        # Generic error handler for any unexpected issues during scraping
+        return error_response(site_name, e)
+
+
+@app.route('/api/scrape/stream', methods=['GET'])
+def stream_jobs():
+    """
+    The streaming variant of /api/scrape: each matching job is sent as soon as
+    it is extracted, with progress events in between.
+    Same query parameters as /api/scrape, plus an optional 'format'
+    ('ndjson' or 'sse').
+
+    Example usage:
+    - /api/scrape/stream?site=greatrwandajobs
+    - /api/scrape/stream?site=jobinrwanda&keyword=accountant&format=sse
+    """
+    site_name = request.args.get('site')
+    keyword = request.args.get('keyword')
+
+    invalid = site_param_error(site_name)
+    if invalid:
+        body, status = invalid
+        return jsonify(body), status
+
+    return event_stream_response(site_events(site_name, keyword))
+
+
+@app.route('/api/scrape-all/stream', methods=['GET'])
+def stream_all_jobs():
+    """
+    The streaming variant of /api/scrape-all. Events of all sites are
+    interleaved as they arrive, each one tagged with its "site".
+
+    Example usage:
+    - /api/scrape-all/stream?keyword=accountant
+    """
+    return event_stream_response(all_sites_events(request.args.get('keyword')))
+
+
+@app.route('/api/scrape-all', methods=['GET'])
+def scrape_all_jobs():
+    """
+    Scrapes every registered site concurrently and merges the results.
+    It optionally accepts a 'keyword' query parameter, applied to every site,
+    and 'enrich' (see /api/scrape).
+
+    The wall-clock time of this endpoint is that of the slowest site rather
+    than the sum of all of them.
+
+    Example usage:
+    - /api/scrape-all
+    - /api/scrape-all?keyword=accountant
+    """
+    return jsonify(scrape_all(request.args.get('keyword'), wants_details(request.args)))
+
+
+SEARCH_MAX_LIMIT = 100
+
+
+@app.route('/api/search', methods=['GET'])
+def search_jobs():
+    """
+    Full-text search over the pre-scraped jobs of every site, without going
+    upstream. Results are ranked (BM25) and paginated with a cursor.
+    It requires a 'q' query parameter.
+    It optionally accepts 'site' (comma-separated), 'limit' and 'cursor'.
+
+    Example usage:
+    - /api/search?q=software dev
+    - /api/search?q=accountant&site=jobinrwanda,unjobs&limit=10
+    - /api/search?q=accountant&cursor=<next_cursor of the previous page>
+    """
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({"error": "A 'q' query parameter is required."}), 400
+
+    sites = [site.strip() for site in request.args.get('site', '').split(',') if site.strip()]
+    unknown = [site for site in sites if site not in SCRAPERS]
+    if unknown:
+        return jsonify({"error": f"Site '{unknown[0]}' is not supported."}), 404
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "'limit' must be a number."}), 400
+
+    started = time.perf_counter()
+    try:
+        result = job_store.search(text, sites=sites or None, limit=limit, cursor=request.args.get('cursor'))
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    result["query"] = text
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return jsonify(result)
+
+
+CHANGES_MAX_LIMIT = 5000
+
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    A delta feed of the pre-scraped jobs of every site, for polling clients.
+    It optionally accepts 'since' (the 'cursor' of the previous response)
+    and 'limit' (how many changes to read at most).
+
+    Example usage:
+    - /api/changes                 (a full snapshot, and a cursor)
+    - /api/changes?since=1234      (only what changed since)
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', 1000)), 1), CHANGES_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "'since' and 'limit' must be numbers."}), 400
+    return jsonify(job_store.changes(since=since, limit=limit))
+
+
+@app.route('/api/scrape-jobs', methods=['POST'])
+def submit_scrape_job():
+    """
+    Starts a scrape in the background and returns at once with its id.
+    It requires a 'site' parameter (a site name, or 'all') and optionally
+    accepts a 'keyword', as a JSON body, form fields or query parameters.
+    Poll GET /api/scrape-jobs/<id> for the result.
+
+    Example usage:
+    - POST /api/scrape-jobs  {"site": "unjobs", "keyword": "accountant"}
+    """
+    params = dict(request.args.items())
+    params.update(request.form.items())
+    params.update(request.get_json(silent=True) or {})
+    site_name = params.get('site')
+    keyword = params.get('keyword')
+
     if not site_name:
-        return jsonify({"error": "A 'site' query parameter is required."}), 400
+        return jsonify({"error": "A 'site' parameter is required."}), 400
 
-    if site_name not in SCRAPERS:
+    if site_name != "all" and site_name not in SCRAPERS:
         return jsonify({"error": f"Site '{site_name}' is not supported."}), 404
 
+    try:
+        task, created = scrape_tasks.submit(site_name, keyword, lambda: scrape_task(site_name, keyword))
+    except QueueFullError:
+        response = jsonify({"error": "Too many scrapes are pending, try again later."})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    status_url = f"/api/scrape-jobs/{task['id']}"
+    response = jsonify(dict(task, status_url=status_url))
+    response.headers["Location"] = status_url
+    return response, 202 if created else 200
+
+
+@app.route('/api/scrape-jobs/<task_id>', methods=['GET'])
+def get_scrape_job(task_id):
+    """
+    Returns the state of a background scrape: 'queued', 'running', 'done'
+    (with its 'result') or 'failed' (with an 'error').
+    """
+    task = scrape_tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": f"Scrape job '{task_id}' does not exist or has expired."}), 404
+    return jsonify(task)
+
+
+# --- ASGI Entry Point ---
+# `asgi_app` answers /api/scrape and /api/scrape-all on an asyncio event loop
+# with `ascrape()`, so one process keeps many upstream fetches and politeness
+# delays in flight without a thread each. Every other endpoint is handed to
+# the Flask app above (that part needs `asgiref`). Run it with e.g.:
+#     uvicorn app:asgi_app --port 5000
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    wsgi_fallback = WsgiToAsgi(app)
+except ImportError:
+    wsgi_fallback = None
+
+
+async def acached_listing(site_name):
+    """The async counterpart of `cached_listing`."""
     scraper = SCRAPERS[site_name]
-    
+
+    async def acompute():
+        ensure_reachable(site_name)
+        return await scrape_flight.ado(_listing_flight_key(site_name), scraper.afetch_jobs)
+
+    return await listing_cache.aget_or_compute(site_name, None, acompute, cacheable=bool)
+
+
+async def acached_scrape(site_name, keyword=None):
+    """The async counterpart of `cached_scrape`."""
+    scraper = SCRAPERS[site_name]
+    if scraper.listing_covers(keyword):
+        listing, status = await acached_listing(site_name)
+        return listing_result(scraper, listing, keyword), status
+
+    async def acompute():
+        ensure_reachable(site_name)
+        return await scrape_flight.ado(
+            _flight_key(site_name, keyword), lambda: scraper.ascrape(keyword=keyword), shared=False)
+
+    result, status = await response_cache.aget_or_compute(site_name, keyword, acompute, cacheable=_has_jobs)
+    return dict(result), status
+
+
+async def aget_results(site_name, keyword=None):
+    """The async counterpart of `get_results`."""
+    result = await asyncio.to_thread(stored_scrape, site_name, keyword)
+    if result is not None:
+        return result, "STORE"
+    return await acached_scrape(site_name, keyword)
+
+
+async def arun_scraper(site_name, keyword=None, enrich=False):
+    """The async counterpart of `run_scraper`."""
+    started = time.perf_counter()
     try:
-        data = scraper.scrape(keyword=keyword)
-        return jsonify(data)
+        section, cache_status = await aget_results(site_name, keyword)
+        if enrich:
+            section = await asyncio.to_thread(enrich_result, site_name, section)
+        section["cache"] = cache_status
     except Exception as e:
-        # Generic error handler for any unexpected issues during scraping
-        print(f"An error occurred while scraping {site_name}: {e}")
-        return jsonify({"error": "An internal error occurred during scraping."}), 500
+        section = failed_section(site_name, e)
+    section["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return section
+
+
+async def ascrape_all(keyword=None, enrich=False):
+    """The async counterpart of `scrape_all`: one task per site instead of one thread."""
+    started = time.perf_counter()
+    limit = asyncio.Semaphore(max(1, SCRAPE_ALL_MAX_WORKERS))
+
+    async def run_limited(site_name):
+        async with limit:
+            return await arun_scraper(site_name, keyword, enrich)
+
+    sections = await asyncio.gather(*(run_limited(site_name) for site_name in SCRAPERS))
+    return merge_sections(dict(zip(SCRAPERS, sections)), started)
+
+
+async def send_json(send, payload, status=200, headers=None):
+    body = json.dumps(payload).encode("utf-8")
+    response_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"access-control-allow-origin", b"*"),  # What CORS(app) adds on the Flask side
+    ]
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode(), value.encode()))
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def async_scrape_jobs(args, send):
+    """`/api/scrape` on the event loop; same parameters and responses as `scrape_jobs`."""
+    site_name = args.get('site')
+    keyword = args.get('keyword')
+
+    invalid = site_param_error(site_name)
+    if invalid:
+        body, status = invalid
+        return await send_json(send, body, status)
+
+    try:
+        data, cache_status = await aget_results(site_name, keyword)
+        if wants_details(args):
+            data = await asyncio.to_thread(enrich_result, site_name, data)
+    except Exception as e:
+        error, status, headers = scrape_error_status(site_name, e)
+        return await send_json(send, error, status, headers=headers)
+    await send_json(send, data, headers={"X-Cache": cache_status})
+
+
+async def async_scrape_all_jobs(args, send):
+    """`/api/scrape-all` on the event loop; same parameters and response as `scrape_all_jobs`."""
+    await send_json(send, await ascrape_all(args.get('keyword'), wants_details(args)))
+
+
+ASYNC_ROUTES = {
+    "/api/scrape": async_scrape_jobs,
+    "/api/scrape-all": async_scrape_all_jobs,
+}
+
+
+async def asgi_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_http_client.aclose()
+                parser_pool.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    handler = ASYNC_ROUTES.get(scope.get("path"))
+    if scope["type"] == "http" and scope["method"] == "GET" and handler is not None:
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        started = time.perf_counter()
+        statuses = []
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            await send(message)
+
+        try:
+            await handler({name: values[0] for name, values in query.items()}, send_and_record)
+        finally:
+            scrape_metrics.observe_request(scope["path"], statuses[0] if statuses else 500, time.perf_counter() - started)
+    elif wsgi_fallback is not None:
+        await wsgi_fallback(scope, receive, send)
+    else:
+        await send_json(send, {"error": "This endpoint needs asgiref installed to be served over ASGI."}, 404)
+
+
+if PRESCRAPE_INTERVAL and os.environ.get("PRESCRAPE_IN_APP", "1") == "1":
+    prescrape_scheduler.start()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,96 @@
+# benchmarks/bench_keywords.py
+
+"""
+Micro-benchmark of keyword filtering over a large batch of job titles.
+
+Compares the way scrapers used to filter (building the keyword regex for
+every job and calling re.search with the uncompiled pattern) with a regex
+compiled once and with the shared KeywordMatcher.
+
+Usage (from job-scraper-backend/):
+    python -m benchmarks.bench_keywords [number_of_titles]
+"""
+
+import random
+import re
+import sys
+import time
+
+from scrapers.keywords import DEFAULT_KEYWORDS, DEFAULT_MATCHER, get_matcher
+
+LEVELS = ["Senior", "Junior", "Chief", "Assistant", "Lead", "Principal", ""]
+ROLES = [
+    "Accountant", "Nurse", "Driver", "Teacher", "Sales Representative",
+    "Marketing Officer", "Finance Manager", "Logistics Coordinator",
+    "Procurement Specialist", "Health Advisor", "M&E Officer", "Consultant",
+    "Project Manager", "HR Business Partner", "Legal Counsel", "Agronomist",
+]
+IT_ROLES = [
+    "Software Developer", "Data Analyst", "Network Engineer", "IT Support Officer",
+    "Cloud Architect", "Web Developer (React)", "Database Administrator",
+    "ICT Specialist", "C++ Programmer",
+]
+SUFFIXES = ["", " - Kigali", " (Re-advertised)", ", Rwanda", " / Nyarugenge", " - 2 positions"]
+
+
+def make_titles(count, it_share=0.2, seed=42):
+    """Job-board-like titles, about `it_share` of them IT jobs."""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        role = rng.choice(IT_ROLES if rng.random() < it_share else ROLES)
+        titles.append(f"{rng.choice(LEVELS)} {role}{rng.choice(SUFFIXES)}".strip())
+    return titles
+
+
+def legacy_filter(titles, keyword=None):
+    results = []
+    for title in titles:
+        # This is what each scraper did for every job.
+        if keyword:
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+        else:
+            pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
+        if re.search(pattern, title, re.IGNORECASE):
+            results.append(title)
+    return results
+
+
+def compiled_regex_filter(titles):
+    pattern = re.compile(r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b', re.IGNORECASE)
+    return [title for title in titles if pattern.search(title)]
+
+
+def matcher_filter(titles, matcher=DEFAULT_MATCHER):
+    return [titles[index] for index, _ in matcher.filter(titles)]
+
+
+def timed(label, func, *args, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<40} {best * 1000:9.1f} ms  ({len(result)} matches)")
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    titles = make_titles(count)
+    print(f"Filtering {count} titles with the default IT keywords\n")
+
+    legacy, legacy_result = timed("legacy (pattern rebuilt per job)", legacy_filter, titles)
+    _, compiled_result = timed("regex compiled once", compiled_regex_filter, titles)
+    matcher, matcher_result = timed("KeywordMatcher", matcher_filter, titles)
+
+    assert legacy_result == compiled_result == matcher_result, "filters disagree"
+    print(f"\nKeywordMatcher speed-up over legacy: {legacy / matcher:.1f}x")
+
+    query_matcher = get_matcher("data analyst, network")
+    timed("KeywordMatcher, 2-term query w/ phrase", matcher_filter, titles, query_matcher)
+
+
+if __name__ == '__main__':
+    main()
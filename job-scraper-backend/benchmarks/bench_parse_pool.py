@@ -0,0 +1,133 @@
+# benchmarks/bench_parse_pool.py
+
+"""
+Parsing throughput benchmark: how many listing pages per second are parsed
+on a large synthetic crawl, with the parsing done in threads (the default)
+and in a pool of 1, 2, 4... parser processes (PARSER_PROCESSES, see
+scrapers/parser_pool.py).
+
+The pages are built in memory from the stub server's fixtures, one distinct
+page per URL, so only parsing is measured: no network, no fetch time. Every
+mode parses the same pages with the same extractors (`extract_page` of the
+greatrwandajobs and unjobs scrapers), and the benchmark checks that they all
+extract the same jobs.
+
+Threads can't parse in parallel because of the GIL, so their throughput stays
+flat whatever their number; with processes it should grow with the number of
+cores, up to `os.cpu_count()`.
+
+Usage (from job-scraper-backend/):
+    python -m benchmarks.bench_parse_pool [--pages 200] [--scale 10] [--repeat 3]
+                                          [--processes 1 2 4] [--json results.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+
+from benchmarks.stub_server import expand, load_fixture
+from scrapers import greatrwandajobs_scraper, unjobs_scraper
+from scrapers.parser_pool import ParserPool
+
+# (extractor, fixture, URL of a page). Half of the crawl comes from each site.
+SITES = [
+    (greatrwandajobs_scraper.extract_page, "greatrwandajobs_category.html",
+     "https://www.greatrwandajobs.com/job-categories/page-{n}/"),
+    (unjobs_scraper.extract_page, "unjobs_rwanda.html",
+     "https://unjobs.org/duty_stations/rwanda/{n}"),
+]
+
+
+def quiet(extractor, content, url):
+    """Runs an extractor without its progress prints (also in the parser processes)."""
+    with redirect_stdout(io.StringIO()):
+        return extractor(content, url)
+
+
+def build_crawl(pages, scale):
+    """Returns [(extractor, content, url)], `pages` distinct pages of `scale` times the fixture's jobs."""
+    crawl = []
+    for n in range(pages):
+        extractor, fixture, url = SITES[n % len(SITES)]
+        content = expand(load_fixture(fixture), scale, f"page-{n}").encode("utf-8")
+        crawl.append((partial(quiet, extractor), content, url.format(n=n)))
+    return crawl
+
+
+def run_crawl(crawl, pool, threads):
+    """Parses every page from `threads` threads, through `pool`. Returns (seconds, rows per page)."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        rows = list(executor.map(lambda page: pool.run(*page), crawl))
+    return time.perf_counter() - started, rows
+
+
+def benchmark(crawl, processes, threads, repeat):
+    pool = ParserPool(processes=processes)
+    try:
+        if pool.enabled:
+            pool._pool()  # Workers start and warm up before the clock starts
+        timings = []
+        for _ in range(repeat):
+            seconds, rows = run_crawl(crawl, pool, threads)
+            timings.append(seconds)
+    finally:
+        pool.shutdown()
+    return statistics.median(timings), rows
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_processes = sorted({1, cores} | {2 ** k for k in range(1, 8) if 2 ** k < cores})
+
+    parser = argparse.ArgumentParser(description="Measures parsing throughput with threads and parser processes.")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic crawl")
+    parser.add_argument("--scale", type=int, default=10, help="how many times the fixture's jobs each page holds")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=8, help="threads handing pages to the parser")
+    parser.add_argument("--processes", type=int, nargs="+", default=default_processes)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    crawl = build_crawl(args.pages, args.scale)
+    megabytes = sum(len(content) for _, content, _ in crawl) / 1e6
+    print(f"Synthetic crawl: {len(crawl)} pages, {megabytes:.1f} MB, {cores} CPU(s)\n")
+
+    modes = [("threads", 0)] + [(f"{processes} process{'es' if processes > 1 else ''}", processes)
+                                for processes in args.processes]
+    results = {}
+    reference = None
+    header = f"{'mode':<16}{'seconds':>10}{'pages/s':>10}{'jobs/s':>10}{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+    for mode, processes in modes:
+        seconds, rows = benchmark(crawl, processes, args.threads, args.repeat)
+        if reference is None:
+            reference = rows
+        elif rows != reference:
+            raise SystemExit(f"{mode} did not extract the same jobs as the threads")
+        jobs = sum(len(page_rows or ()) for page_rows in rows)
+        results[mode] = {
+            "processes": processes,
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(len(crawl) / seconds, 1),
+            "jobs_per_second": round(jobs / seconds, 1),
+            "speedup": round(results["threads"]["seconds"] / seconds, 2) if results else 1.0,
+        }
+        result = results[mode]
+        print(f"{mode:<16}{seconds:>10.2f}{result['pages_per_second']:>10.1f}"
+              f"{result['jobs_per_second']:>10.0f}{result['speedup']:>9.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"pages": len(crawl), "cpus": cores, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
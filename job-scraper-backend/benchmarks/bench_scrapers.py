@@ -0,0 +1,233 @@
+# benchmarks/bench_scrapers.py
+
+"""
+Offline benchmark of every scraper class, against the local stub server.
+
+The stub (benchmarks/stub_server.py) serves the fixtures in
+benchmarks/fixtures/ in place of the real sites, which rate-limit or block
+automated requests. For each scraper, one run is split into:
+
+- fetch:   time spent in `http_client.get` or `async_http_client.get`
+           (network + decompression),
+- parse:   time spent in `parse_html` and JSON decoding,
+- extract: the rest of `fetch_jobs`, i.e. walking the parsed pages,
+- filter:  `filter_jobs` with the default keywords (or --keyword),
+
+plus the peak memory of a fetch + filter, measured with tracemalloc in a
+separate run so that tracing does not skew the timings. The numbers are
+medians over --repeat runs.
+
+Requests run one at a time (per-host concurrency 1) so the phases add up to
+the wall time, and the per-host politeness schedule (seconds between UNJobs
+pages), the HTTP cache and the parsed page cache are turned off.
+
+Usage (from job-scraper-backend/):
+    python -m benchmarks.bench_scrapers [--latency 20] [--scale 10] [--repeat 5]
+                                        [--keyword python] [--json results.json]
+"""
+
+import argparse
+import io
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+import requests
+
+from scrapers import (
+    greatrwandajobs_scraper,
+    jobinrwanda_scraper,
+    opphubafrica_scraper,
+    opportunity_scraper,
+    unjobs_scraper,
+)
+from scrapers.async_http_client import async_http_client
+from scrapers.http_client import http_client
+from scrapers.page_cache import parsed_pages
+
+SCRAPER_CLASSES = {
+    "jobinrwanda": jobinrwanda_scraper.JobInRwandaScraper,
+    "greatrwandajobs": greatrwandajobs_scraper.GreatRwandaJobsScraper,
+    "unjobs": unjobs_scraper.UNJobsScraper,
+    "opportunity": opportunity_scraper.OpportunityScraper,
+    "opphubafrica": opphubafrica_scraper.OppHubAfricaScraper,
+}
+
+# Scraper modules that call parse_html; it is timed where they look it up.
+HTML_MODULES = [jobinrwanda_scraper, greatrwandajobs_scraper, unjobs_scraper]
+
+PHASES = ("wall", "fetch", "parse", "extract", "filter")
+
+
+@contextmanager
+def stub_server(latency_ms, scale):
+    """Starts the stub server in its own process, so it doesn't skew the measurements."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_server", "--port", "0",
+         "--latency", str(latency_ms), "--scale", str(scale)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = process.stdout.readline().strip()
+        if not line.startswith("Listening on "):
+            raise RuntimeError(f"Stub server did not start: {line!r}")
+        yield line[len("Listening on "):]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class PhaseTimer:
+    """Wraps the fetch and parse entry points to add up the time spent in them."""
+
+    def __init__(self):
+        self.totals = {"fetch": 0.0, "parse": 0.0}
+        self._patches = []
+
+    def _wrap(self, owner, name, phase):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - started
+
+        setattr(owner, name, timed)
+        self._patches.append((owner, name, original))
+
+    def _wrap_async(self, owner, name, phase):
+        original = getattr(owner, name)
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - started
+
+        setattr(owner, name, timed)
+        self._patches.append((owner, name, original))
+
+    def install(self):
+        self._wrap(http_client, "get", "fetch")
+        self._wrap_async(async_http_client, "get", "fetch")  # Scrapers with a native `aiter_events`
+        for module in HTML_MODULES:
+            self._wrap(module, "parse_html", "parse")
+        # opphubafrica decodes with json.loads, Response.json() ends up there too.
+        self._wrap(json, "loads", "parse")
+        if requests.models.complexjson is not json:
+            self._wrap(requests.models.complexjson, "loads", "parse")
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+
+    def reset(self):
+        self.totals = {"fetch": 0.0, "parse": 0.0}
+
+
+def make_scraper(site_name):
+    return SCRAPER_CLASSES[site_name]()
+
+
+def run_once(site_name, keyword, timer):
+    scraper = make_scraper(site_name)  # Fresh instance: no warm per-scraper caches
+    timer.reset()
+    started = time.perf_counter()
+    jobs = scraper.fetch_jobs()
+    fetched = time.perf_counter()
+    filtered = scraper.filter_jobs(jobs, keyword)
+    done = time.perf_counter()
+
+    fetch, parse = timer.totals["fetch"], timer.totals["parse"]
+    return {
+        "jobs": len(jobs),
+        "matches": len(filtered),
+        "wall": done - started,
+        "fetch": fetch,
+        "parse": parse,
+        "extract": max(0.0, (fetched - started) - fetch - parse),
+        "filter": done - fetched,
+    }
+
+
+def peak_memory(site_name, keyword):
+    scraper = make_scraper(site_name)
+    tracemalloc.start()
+    try:
+        scraper.filter_jobs(scraper.fetch_jobs(), keyword)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(site_name, keyword, repeat, timer):
+    with redirect_stdout(io.StringIO()):  # The scrapers' progress prints
+        runs = [run_once(site_name, keyword, timer) for _ in range(repeat)]
+        peak = peak_memory(site_name, keyword)
+    result = {"jobs": runs[-1]["jobs"], "matches": runs[-1]["matches"]}
+    for phase in PHASES:
+        result[f"{phase}_ms"] = round(statistics.median(run[phase] for run in runs) * 1000, 2)
+    result["peak_kib"] = round(peak / 1024, 1)
+    return result
+
+
+def print_report(results):
+    header = f"{'scraper':<16}{'jobs':>7}{'match':>7}" + "".join(f"{phase + ' ms':>12}" for phase in PHASES) + f"{'peak KiB':>11}"
+    print(header)
+    print("-" * len(header))
+    for site_name, result in results.items():
+        print(
+            f"{site_name:<16}{result['jobs']:>7}{result['matches']:>7}"
+            + "".join(f"{result[phase + '_ms']:>12.1f}" for phase in PHASES)
+            + f"{result['peak_kib']:>11.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark against the stub server.")
+    parser.add_argument("--latency", type=float, default=0, help="stub delay per response, in ms")
+    parser.add_argument("--scale", type=int, default=1, help="copies of every job card in the fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keyword", default=None, help="filter keyword (default: the IT keywords)")
+    parser.add_argument("--sites", default=",".join(SCRAPER_CLASSES), help="comma-separated scrapers")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sites = [site.strip() for site in args.sites.split(",") if site.strip()]
+    # One request at a time, no retries: the phases then add up to the wall time.
+    http_client.default_policy.update(max_concurrency=1, retries=0)
+    # Politeness delays are seconds long and say nothing about the scraper.
+    http_client.politeness.enabled = False
+    # Every run fetches the pages in full, like a first scrape.
+    http_client.cache.enabled = False
+    parsed_pages.enabled = False
+    http_client.host_policies.clear()
+
+    timer = PhaseTimer()
+    with stub_server(args.latency, args.scale) as base_url:
+        http_client.upstream_override = base_url
+        timer.install()
+        try:
+            results = {site_name: benchmark(site_name, args.keyword, args.repeat, timer) for site_name in sites}
+        finally:
+            timer.uninstall()
+
+    print(f"\nScale {args.scale}x, latency {args.latency:g} ms, median of {args.repeat} runs\n")
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"scale": args.scale, "latency_ms": args.latency, "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_startup.py
+
+"""
+Worker startup benchmark: how long `import app` takes in a fresh interpreter,
+which is what every gunicorn worker pays before it can answer a request.
+
+Each run imports the app in a new process with `-X importtime` (and without
+the pre-scrape scheduler, which would load the scrapers in the background),
+then reports the median import time, the slowest top-level imports, and any
+scraper module that was imported although no site was used. The exit status
+is 1 when the median exceeds the budget or a scraper was loaded, so the check
+can run in CI.
+
+Usage (from job-scraper-backend/):
+    python -m benchmarks.bench_startup [--repeat 5] [--budget-ms 600]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Imported at startup, these mean a scraper was built eagerly.
+SCRAPER_MODULES_PREFIX = "scrapers."
+SCRAPER_MODULES_SUFFIX = "_scraper"
+HEAVY_MODULES = ("fake_useragent", "bs4", "lxml", "selectolax")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_once():
+    """Imports the app in a new interpreter. Returns (seconds, modules, importtime lines)."""
+    env = dict(os.environ, PRESCRAPE_IN_APP="0", PYTHONDONTWRITEBYTECODE="1")
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    return result["seconds"], result["modules"], process.stderr.splitlines()
+
+
+def top_level_imports(importtime_lines, count):
+    """The `count` slowest imports made directly by the app module, as (cumulative ms, name)."""
+    imports = []
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Direct imports of app are indented by exactly three spaces.
+        if name.startswith("   ") and not name.startswith("    ") and cumulative.strip().isdigit():
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def eager_modules(modules):
+    return [
+        name for name in modules
+        if (name.startswith(SCRAPER_MODULES_PREFIX) and name.endswith(SCRAPER_MODULES_SUFFIX)
+            and name != "scrapers.base_scraper")
+        or name.split(".")[0] in HEAVY_MODULES
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the import time of the app in a fresh interpreter.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=600, help="fail when the median import is slower")
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest imports to list")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        seconds, modules, importtime_lines = run_once()
+        timings.append(seconds * 1000)
+
+    median = statistics.median(timings)
+    print(f"import app: median {median:.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms "
+          f"({args.repeat} runs, budget {args.budget_ms:.0f} ms)")
+    print("\nSlowest imports of the last run:")
+    for milliseconds, name in top_level_imports(importtime_lines, args.top):
+        print(f"  {milliseconds:8.1f} ms  {name}")
+
+    failed = False
+    loaded = eager_modules(modules)
+    if loaded:
+        print(f"\nLoaded at startup although no site was used: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nOver budget by {median - args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
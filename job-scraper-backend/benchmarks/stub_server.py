@@ -0,0 +1,204 @@
+# benchmarks/stub_server.py
+
+"""
+A local stand-in for the job sites, serving the fixtures in benchmarks/fixtures/.
+
+Scrapers are pointed at it with the HTTP_UPSTREAM_OVERRIDE setting of the
+shared HTTP client, which turns https://www.jobinrwanda.com/jobs/all into
+http://127.0.0.1:<port>/www.jobinrwanda.com/jobs/all. The first path
+segment tells the server which site is asked for.
+
+- `--latency` adds a delay (in milliseconds) before every response.
+- `--scale` repeats the job cards of every fixture (the `<!--repeat-->`
+  blocks, and the items of the Opportunity API) that many times, with unique
+  links, to see how the scrapers behave on much larger listings.
+
+Responses are gzip-compressed when the client accepts it, like the real sites.
+They carry an ETag and a Last-Modified date, and a request with a matching
+If-None-Match gets a `304 Not Modified`.
+
+Usage (from job-scraper-backend/):
+    python -m benchmarks.stub_server [--port 8765] [--latency 50] [--scale 10]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LAST_MODIFIED = "Mon, 01 Jul 2030 08:00:00 GMT"
+
+# (host, path prefix, fixture). The longest matching prefix wins; a prefix
+# ending with "$" only matches that exact path.
+ROUTES = [
+    ("www.jobinrwanda.com", "/jobs/all", "jobinrwanda.html"),
+    ("www.jobinrwanda.com", "/job/", "job_detail.html"),
+    ("www.greatrwandajobs.com", "/jobs/$", "greatrwandajobs_jobs.html"),
+    ("www.greatrwandajobs.com", "/jobs/", "job_detail.html"),
+    ("www.greatrwandajobs.com", "/job-categories/", "greatrwandajobs_category.html"),
+    ("unjobs.org", "/duty_stations/rwanda/", "unjobs_rwanda.html"),
+    ("unjobs.org", "/vacancies/", "job_detail.html"),
+    ("unjobs.org", "/", "unjobs_home.html"),
+    ("opportunityapi.ini.rw", "/api/opportunities", "opportunity.json"),
+    ("opphubafrica.com", "/", "opphubafrica.html"),
+]
+
+REPEAT_RE = re.compile(r'<!--repeat(?: sep="(?P<sep>[^"]*)")?-->(?P<block>.*?)<!--/repeat-->', re.DOTALL)
+
+
+def find_fixture(host, path):
+    candidates = [
+        (prefix, fixture) for route_host, prefix, fixture in ROUTES
+        if route_host == host and (path == prefix[:-1] if prefix.endswith("$") else path.startswith(prefix))
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: len(candidate[0]))[1]
+
+
+def page_token(path):
+    """Part of the path, used to keep links unique across pages of a site."""
+    return re.sub(r"[^a-z0-9]+", "-", path.strip("/").split("/")[-1].lower()) or "root"
+
+
+def expand(text, scale, page):
+    """Repeats every `<!--repeat-->` block `scale` times and fills in the tokens."""
+    def repeat(match):
+        copies = [match.group("block").replace("__N__", str(n)) for n in range(scale)]
+        return (match.group("sep") or "").join(copies)
+
+    return REPEAT_RE.sub(repeat, text).replace("__PAGE__", page)
+
+
+@lru_cache(maxsize=None)
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def opportunity_items(scale):
+    template = json.loads(load_fixture("opportunity.json"))
+    items = []
+    for n in range(scale):
+        for item in template:
+            item = dict(item, slug=item["slug"].replace("__N__", str(n)), id=item["id"] + n * len(template))
+            items.append(item)
+    return items
+
+
+def opportunity_page(query, scale):
+    """A page of the Opportunity API, honouring limit, offset and sort."""
+    params = parse_qs(query)
+    limit = int(params.get("limit", ["200"])[0])
+    offset = int(params.get("offset", ["0"])[0])
+    items = opportunity_items(scale)
+    if params.get("sort", [""])[0] == "-created_at":
+        items = sorted(items, key=lambda item: item["created_at"], reverse=True)
+    return json.dumps({"results": items[offset:offset + limit], "count": len(items)})
+
+
+@lru_cache(maxsize=1024)
+def render(host, path, query, scale):
+    """Returns (content type, body bytes), or None for an unknown page."""
+    fixture = find_fixture(host, path)
+    if fixture is None:
+        return None
+    if fixture == "opportunity.json":
+        return "application/json", opportunity_page(query, scale).encode("utf-8")
+    body = expand(load_fixture(fixture), scale, page_token(path))
+    return "text/html; charset=utf-8", body.encode("utf-8")
+
+
+@lru_cache(maxsize=1024)
+def etag_for(host, path, query, scale):
+    return hashlib.sha256(render(host, path, query, scale)[1]).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1024)
+def render_gzip(host, path, query, scale):
+    # Compressed once, so the stub's own work doesn't count as fetch time.
+    content_type, body = render(host, path, query, scale)
+    return content_type, gzip.compress(body, compresslevel=6)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real sites
+    # Headers and body are written separately; without this, Nagle's
+    # algorithm adds ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    latency = 0.0
+    scale = 1
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        if self.latency:
+            time.sleep(self.latency)
+
+        if render(host, "/" + path, parts.query, self.scale) is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # Validators, like the sites that send them: pages never change here.
+        etag = '"%s"' % etag_for(host, "/" + path, parts.query, self.scale)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        content_type, body = (render_gzip if use_gzip else render)(host, "/" + path, parts.query, self.scale)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def make_server(port=0, latency_ms=0, scale=1):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": latency_ms / 1000.0,
+        "scale": max(1, scale),
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0, help="delay per response, in ms")
+    parser.add_argument("--scale", type=int, default=1, help="copies of every job card")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency, args.scale)
+    # The benchmark reads this line to find the port.
+    print(f"Listening on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
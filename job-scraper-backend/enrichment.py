@@ -0,0 +1,257 @@
+# enrichment.py
+
+"""
+Optional enrichment of scrape results with the details of every job
+(description, requirements, salary), read from the job's own page.
+
+Listings only give a title, a company and dates. The details are on one page
+per job, so fetching them one after the other would take minutes. The
+`Enricher` instead fetches the pages concurrently on a thread pool, at most
+`max_per_host` at a time per site (on top of the HTTP client's own per-host
+cap), and at most `max_fetches` per call, so one request can't crawl a
+whole site.
+
+Enrichment runs inside the request, and detail pages go through the per-host
+politeness schedule (one request every 3 to 7 seconds on UNJobs), so a call
+never waits for them for long. Each call starts only as many fetches per
+host as the host's politeness allows within `max_wait` seconds, and waits at
+most that long for them. Jobs whose details are not in the cache by then
+get `"details": None` and `"details_pending": True`; the fetches already
+started finish in the background, and later calls find them in the cache.
+
+A job page hardly ever changes once published, so every page is fetched once
+in its lifetime: the extracted details are kept in a SQLite `DetailCache`,
+keyed by link, together with a hash of the page. A page whose content was
+already seen under another link is not parsed again. Pages that are gone
+(404, 410) are remembered too; other failures are retried on a later call.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from scrapers.http_client import http_client
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "details.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_details (
+    link TEXT PRIMARY KEY,
+    content_hash TEXT,
+    status INTEGER NOT NULL,
+    details TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_details_hash ON job_details (content_hash);
+"""
+
+# Job pages that no longer exist; they are not fetched again.
+GONE_STATUSES = (404, 410)
+
+# SQLite caps the number of parameters of a statement.
+MAX_QUERY_PARAMS = 500
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class DetailCache:
+    """
+    The details of every job page fetched so far, in a SQLite file.
+    Like the job store, it opens a connection per operation, so it can be
+    shared between threads and processes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("DETAIL_CACHE_PATH", DEFAULT_DB_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, links):
+        """Returns {link: details} for the links already fetched. Details are None for pages that are gone."""
+        links = list(dict.fromkeys(links))
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(links), MAX_QUERY_PARAMS):
+                chunk = links[start:start + MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(
+                        f"SELECT link, details FROM job_details WHERE link IN ({placeholders})", chunk):
+                    found[row["link"]] = json.loads(row["details"]) if row["details"] else None
+        return found
+
+    def for_content(self, digest):
+        """The details extracted from a page with this content hash, under any link, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT details FROM job_details WHERE content_hash = ? AND details IS NOT NULL LIMIT 1", (digest,)
+            ).fetchone()
+        return json.loads(row["details"]) if row else None
+
+    def put(self, link, status, digest=None, details=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_details (link, content_hash, status, details, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (link, digest, status, json.dumps(details) if details is not None else None, time.time()),
+            )
+
+    def stats(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS pages, COUNT(details) AS with_details FROM job_details").fetchone()
+        return {"pages": row["pages"], "with_details": row["with_details"]}
+
+
+class Enricher:
+    """Adds a "details" field to jobs, fetching the pages not in the cache concurrently."""
+
+    def __init__(self, cache, max_workers=8, max_per_host=2, max_fetches=50, max_wait=2.0, timeout=20):
+        self.cache = cache
+        self.max_per_host = max_per_host
+        self.max_fetches = max_fetches
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="enrich")
+        self._semaphores = {}  # host -> BoundedSemaphore(max_per_host)
+        self._in_flight = {}  # link -> Future, so concurrent calls fetch a page once
+        self._lock = threading.Lock()
+        self.counts = {"cached": 0, "fetched": 0, "reused": 0, "gone": 0, "failed": 0, "skipped": 0, "pending": 0}
+
+    def _count(self, outcome, amount=1):
+        with self._lock:
+            self.counts[outcome] += amount
+
+    def _semaphore_for(self, link):
+        host = urlsplit(link).hostname or ""
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return semaphore
+
+    def fetch_budget(self, host):
+        """
+        How many detail pages of `host` one call may start: the requests the
+        host's politeness lets through within `max_wait` seconds (its burst,
+        then one per slot), and at least one so every call makes progress.
+        """
+        if not http_client.politeness.enabled:
+            return self.max_fetches
+        policy = http_client.policy_for(host)
+        spacing = max(1.0 / policy["rate"] if policy["rate"] else 0.0,
+                      policy["min_interval"] + policy["jitter"] / 2)
+        if not spacing:
+            return self.max_fetches
+        immediate = max(1, policy["burst"]) if not policy["min_interval"] else 1
+        return max(1, immediate + int(self.max_wait / spacing))
+
+    def _fetch(self, scraper, link):
+        with self._semaphore_for(link):
+            response = http_client.get(link, timeout=self.timeout)
+        if response.status_code in GONE_STATUSES:
+            self.cache.put(link, response.status_code)
+            self._count("gone")
+            return None
+        response.raise_for_status()
+
+        digest = content_hash(response.content)
+        details = self.cache.for_content(digest)
+        if details is not None:
+            self._count("reused")  # Same page under another link: no need to parse it
+        else:
+            details = scraper.parse_details(response.content)
+            self._count("fetched")
+        self.cache.put(link, response.status_code, digest, details)
+        return details
+
+    def _submit(self, scraper, link):
+        with self._lock:
+            future = self._in_flight.get(link)
+            created = future is None
+            if created:
+                future = self._in_flight[link] = self._executor.submit(self._fetch, scraper, link)
+        if created:
+            # Outside the lock: the callback runs at once if the fetch is already done.
+            future.add_done_callback(lambda _: self._forget(link))
+        return future
+
+    def _forget(self, link):
+        with self._lock:
+            self._in_flight.pop(link, None)
+
+    def enrich(self, scraper, jobs):
+        """
+        Returns copies of `jobs`, each with a "details" field: the dict of
+        `scraper.parse_details`, or None when the page is gone or its details
+        are not known yet. The jobs whose details are still to come (over
+        this call's budget, still being fetched, or failed and to be retried)
+        also get "details_pending": True.
+        The jobs passed in (often shared with a cache) are not modified.
+        """
+        links = [job["link"] for job in jobs if job.get("link")]
+        known = self.cache.get_many(links)
+        self._count("cached", len(known))
+
+        missing = [link for link in dict.fromkeys(links) if link not in known]
+        budgets = {}
+        to_fetch = []
+        for link in missing:
+            host = urlsplit(link).hostname or ""
+            if host not in budgets:
+                budgets[host] = self.fetch_budget(host)
+            if budgets[host] > 0 and len(to_fetch) < self.max_fetches:
+                budgets[host] -= 1
+                to_fetch.append(link)
+        if len(missing) > len(to_fetch):
+            self._count("skipped", len(missing) - len(to_fetch))
+
+        futures = {link: self._submit(scraper, link) for link in to_fetch}
+        if futures:
+            wait(futures.values(), timeout=self.max_wait)
+        for link, future in futures.items():
+            if not future.done():
+                self._count("pending")  # Finishes in the background, for a later call
+                continue
+            try:
+                known[link] = future.result()
+            except Exception as e:
+                print(f"Could not fetch the details of {link}: {e}")
+                self._count("failed")
+
+        enriched = []
+        for job in jobs:
+            link = job.get("link")
+            if link in known:
+                enriched.append(dict(job, details=known[link]))
+            else:
+                enriched.append(dict(job, details=None, details_pending=bool(link)))
+        return enriched
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,564 @@
+# job_store.py
+
+"""
+Local SQLite store for pre-scraped jobs.
+
+The background scheduler (see scheduler.py) writes the full, unfiltered
+listing of every site here, keyed by job link. The API then answers from the
+store instead of scraping live.
+
+Keyword filtering uses an index: every word of a job's title and category is
+stored in the `job_terms` table. A query only loads the jobs that contain all
+the words of one of the keyword terms, and the scraper's own `filter_jobs` then
+applies the exact matching rules (phrases, deadlines) to that small set.
+
+Free-text search across all sites (`search`, behind /api/search) uses an FTS5
+index over the title, company, category and location of every job, ranked
+with BM25.
+
+Every job added, updated or expired by a sync is also appended to the
+`job_changes` log, which `changes` reads from a cursor (behind /api/changes),
+so polling clients only download what changed. Jobs whose scraped data did
+not change are not rewritten, only marked as seen.
+"""
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs.db")
+
+WORD_RE = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    link TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    fingerprint TEXT,
+    first_seen REAL,
+    last_seen REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_site ON jobs (site);
+
+-- What every sync added, updated or expired, read by JobStore.changes.
+CREATE TABLE IF NOT EXISTS job_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    link TEXT NOT NULL,
+    site TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fingerprint TEXT,
+    changed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_changes_changed_at ON job_changes (changed_at);
+
+CREATE TABLE IF NOT EXISTS job_terms (
+    term TEXT NOT NULL,
+    link TEXT NOT NULL,
+    PRIMARY KEY (term, link)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_job_terms_link ON job_terms (link);
+
+CREATE TABLE IF NOT EXISTS site_syncs (
+    site TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    total_jobs INTEGER NOT NULL,
+    unique_companies INTEGER NOT NULL
+);
+
+-- When a scheduler last started syncing each site (see JobStore.claim_sync).
+CREATE TABLE IF NOT EXISTS site_sync_claims (
+    site TEXT PRIMARY KEY,
+    claimed_at REAL NOT NULL
+);
+
+-- Incremental syncs: the newest job seen, and when the last full sync ran.
+CREATE TABLE IF NOT EXISTS site_watermarks (
+    site TEXT PRIMARY KEY,
+    watermark TEXT,
+    full_synced_at REAL
+);
+
+-- Full-text search over every stored job (see JobStore.search).
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    link UNINDEXED,
+    site UNINDEXED,
+    title,
+    company,
+    category,
+    location,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# The columns of jobs_fts, in order, with their BM25 weight: a word in the
+# title says more about a job than the same word in its location.
+SEARCH_COLUMNS = (("link", 0.0), ("site", 0.0), ("title", 10.0), ("company", 2.0), ("category", 4.0), ("location", 1.0))
+SEARCH_FIELDS = ("title", "company", "category", "location")
+MISSING_VALUES = ("N/A", "Unknown")
+SEARCH_INDEX_VERSION = 1  # Stored in PRAGMA user_version
+
+# Columns added to `jobs` after its first release, created on older stores.
+JOB_COLUMNS_ADDED = {"fingerprint": "TEXT", "first_seen": "REAL", "last_seen": "REAL"}
+
+ADDED = "added"
+UPDATED = "updated"
+EXPIRED = "expired"
+
+# How long changes stay in the log. A client whose cursor is older gets a
+# full snapshot instead.
+CHANGE_RETENTION = 7 * 24 * 3600
+
+# SQLite caps the number of parameters of a statement.
+MAX_QUERY_PARAMS = 500
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a search cursor was not returned by `search`."""
+
+
+def extract_terms(text):
+    """Returns the set of lowercase words in a piece of text."""
+    return set(WORD_RE.findall((text or "").lower()))
+
+
+def fts_query(text):
+    """
+    Turns free text into an FTS5 query: every word must appear, as a word or
+    the start of one ('dev' finds 'developer'). Words are quoted, so FTS5
+    operators and punctuation in the text have no effect.
+    Returns None when the text holds no words.
+    """
+    words = WORD_RE.findall((text or "").lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def encode_cursor(score, rowid):
+    return base64.urlsafe_b64encode(json.dumps([score, rowid]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, rowid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), int(rowid)
+    except (ValueError, TypeError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+
+
+def _search_text(job, field):
+    value = job.get(field)
+    if not isinstance(value, str) or value in MISSING_VALUES:
+        return ""
+    return value
+
+
+class JobStore:
+    """
+    A small wrapper around a SQLite database file.
+    A new connection is opened per operation so that the store can be shared
+    between threads, and between processes (gunicorn workers, the scheduler).
+    """
+
+    def __init__(self, path=None, change_retention=CHANGE_RETENTION):
+        self.path = path or os.environ.get("JOB_STORE_PATH", DEFAULT_DB_PATH)
+        self.change_retention = change_retention
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._add_missing_columns(conn)
+            self._backfill_search_index(conn)
+
+    def _add_missing_columns(self, conn):
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in JOB_COLUMNS_ADDED.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        conn.execute(
+            "UPDATE jobs SET first_seen = COALESCE(first_seen, scraped_at), "
+            "last_seen = COALESCE(last_seen, scraped_at) WHERE first_seen IS NULL OR last_seen IS NULL"
+        )
+
+    def _backfill_search_index(self, conn):
+        # Stores created before the current search index get it rebuilt once.
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SEARCH_INDEX_VERSION:
+            return
+        conn.execute("DELETE FROM jobs_fts")
+        for row in conn.execute("SELECT rowid, link, site, data FROM jobs").fetchall():
+            self._index_job(conn, row["rowid"], row["link"], row["site"], json.loads(row["data"]))
+        conn.execute(f"PRAGMA user_version = {SEARCH_INDEX_VERSION}")
+
+    def _index_job(self, conn, rowid, link, site_name, job):
+        # The index row shares the job's rowid, so it is replaced or deleted
+        # by rowid: `link` is not indexed in jobs_fts, a lookup on it is a scan.
+        conn.execute("DELETE FROM jobs_fts WHERE rowid = ?", (rowid,))
+        conn.execute(
+            "INSERT INTO jobs_fts (rowid, link, site, title, company, category, location) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (rowid, link, site_name, *(_search_text(job, field) for field in SEARCH_FIELDS)),
+        )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _upsert_jobs(self, conn, site_name, jobs, scraped_at, first_position=0):
+        stored = {
+            row["link"]: row["data"]
+            for row in conn.execute("SELECT link, data FROM jobs WHERE site = ?", (site_name,))
+        }
+        changes = []
+        for position, job in enumerate(jobs, start=first_position):
+            link = job.get("link")
+            if not link:
+                continue
+            data = json.dumps(job)
+            if stored.get(link) == data:
+                # Unchanged: no need to rewrite the job or its indexes.
+                conn.execute(
+                    "UPDATE jobs SET position = ?, scraped_at = ?, last_seen = ? WHERE link = ?",
+                    (position, scraped_at, scraped_at, link),
+                )
+                continue
+
+            changes.append((link, site_name, ADDED if link not in stored else UPDATED, job.get("fingerprint"), scraped_at))
+            stored[link] = data
+            conn.execute(
+                "INSERT INTO jobs (link, site, position, data, scraped_at, fingerprint, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(link) DO UPDATE SET site = excluded.site, position = excluded.position, "
+                "data = excluded.data, scraped_at = excluded.scraped_at, "
+                "fingerprint = excluded.fingerprint, last_seen = excluded.last_seen",
+                (link, site_name, position, data, scraped_at, job.get("fingerprint"), scraped_at, scraped_at),
+            )
+            conn.execute("DELETE FROM job_terms WHERE link = ?", (link,))
+            terms = extract_terms(job.get("title")) | extract_terms(job.get("category"))
+            conn.executemany(
+                "INSERT INTO job_terms (term, link) VALUES (?, ?)",
+                [(term, link) for term in terms],
+            )
+            rowid = conn.execute("SELECT rowid FROM jobs WHERE link = ?", (link,)).fetchone()[0]
+            self._index_job(conn, rowid, link, site_name, job)
+        self._log_changes(conn, changes)
+
+    def _log_changes(self, conn, changes):
+        conn.executemany(
+            "INSERT INTO job_changes (link, site, kind, fingerprint, changed_at) VALUES (?, ?, ?, ?, ?)",
+            changes,
+        )
+
+    def _record_sync(self, conn, site_name, synced_at, total_jobs, unique_companies):
+        conn.execute(
+            "INSERT INTO site_syncs (site, synced_at, total_jobs, unique_companies) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(site) DO UPDATE SET synced_at = excluded.synced_at, "
+            "total_jobs = excluded.total_jobs, unique_companies = excluded.unique_companies",
+            (site_name, synced_at, total_jobs, unique_companies),
+        )
+
+    def replace_site_jobs(self, site_name, jobs, unique_companies=0):
+        """
+        Upserts the jobs of a full site scrape, keyed by link, and removes the
+        jobs of that site that are no longer listed. Only for a complete
+        listing: every stored job missing from `jobs` is logged as expired
+        (see `PrescrapeScheduler.sync_site` for partial ones).
+        """
+        synced_at = time.time()
+        with self._connect() as conn:
+            self._upsert_jobs(conn, site_name, jobs, synced_at)
+
+            stale = conn.execute(
+                "SELECT rowid, link, fingerprint FROM jobs WHERE site = ? AND scraped_at < ?",
+                (site_name, synced_at),
+            ).fetchall()
+            stale_links = [row["link"] for row in stale]
+            conn.executemany("DELETE FROM job_terms WHERE link = ?", [(link,) for link in stale_links])
+            conn.executemany("DELETE FROM jobs_fts WHERE rowid = ?", [(row["rowid"],) for row in stale])
+            conn.executemany("DELETE FROM jobs WHERE link = ?", [(link,) for link in stale_links])
+            self._log_changes(conn, [(row["link"], site_name, EXPIRED, row["fingerprint"], synced_at) for row in stale])
+            conn.execute("DELETE FROM job_changes WHERE changed_at < ?", (synced_at - self.change_retention,))
+
+            self._record_sync(conn, site_name, synced_at, len(jobs), unique_companies)
+        return len(jobs)
+
+    def add_site_jobs(self, site_name, jobs, count_companies):
+        """
+        Upserts the jobs of an incremental sync ahead of the stored listing,
+        without removing anything.
+
+        Args:
+            count_companies (callable): Given the site's whole listing,
+                                        returns its number of unique companies.
+
+        Returns:
+            int: The number of jobs the site now has in the store.
+        """
+        synced_at = time.time()
+        with self._connect() as conn:
+            first = conn.execute(
+                "SELECT MIN(position) FROM jobs WHERE site = ?", (site_name,)
+            ).fetchone()[0]
+            # New jobs are the newest ones, so they go before the stored ones.
+            self._upsert_jobs(conn, site_name, jobs, synced_at, (first or 0) - len(jobs))
+            listing = [
+                json.loads(row["data"])
+                for row in conn.execute("SELECT data FROM jobs WHERE site = ?", (site_name,))
+            ]
+            self._record_sync(conn, site_name, synced_at, len(listing), count_companies(listing))
+        return len(listing)
+
+    def watermark(self, site_name):
+        """
+        Returns {"watermark": str or None, "full_synced_at": float or None},
+        or None if the site never recorded one.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark, full_synced_at FROM site_watermarks WHERE site = ?",
+                (site_name,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def set_watermark(self, site_name, watermark, full_sync=False):
+        """Records the newest job seen, and with `full_sync` that a full sync just ran."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO site_watermarks (site, watermark, full_synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(site) DO UPDATE SET watermark = excluded.watermark, "
+                "full_synced_at = COALESCE(excluded.full_synced_at, site_watermarks.full_synced_at)",
+                (site_name, watermark, time.time() if full_sync else None),
+            )
+
+    def claim_sync(self, site_name, interval):
+        """
+        Claims the sync of a site for this process. Returns True if no
+        scheduler (in any process) claimed it in the last `interval` seconds:
+        the check and the claim are one UPDATE, so only one worker wins.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO site_sync_claims (site, claimed_at) VALUES (?, 0)", (site_name,))
+            claimed = conn.execute(
+                "UPDATE site_sync_claims SET claimed_at = ? WHERE site = ? AND claimed_at <= ?",
+                (now, site_name, now - interval),
+            ).rowcount
+        return claimed == 1
+
+    def last_sync(self, site_name):
+        """
+        Returns {"synced_at": float, "total_jobs": int, "unique_companies": int},
+        or None if the site was never synced.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT synced_at, total_jobs, unique_companies FROM site_syncs WHERE site = ?",
+                (site_name,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_jobs(self, site_name, term_groups=None):
+        """
+        Returns the jobs of a site whose title or category contains all the
+        words of at least one group in `term_groups` (a list of word lists).
+        Without groups, or if a group has no words to look up, every job of
+        the site is returned. This is a candidate set: callers still apply
+        the exact filter.
+        """
+        groups = [sorted(set(group)) for group in (term_groups or [])]
+        with self._connect() as conn:
+            if not groups or not all(groups):
+                rows = conn.execute(
+                    "SELECT data FROM jobs WHERE site = ? ORDER BY position", (site_name,)
+                ).fetchall()
+            else:
+                subqueries, params = [], [site_name]
+                for group in groups:
+                    placeholders = ",".join("?" * len(group))
+                    subqueries.append(
+                        f"SELECT link FROM job_terms WHERE term IN ({placeholders}) "
+                        f"GROUP BY link HAVING COUNT(*) = ?"
+                    )
+                    params.extend(group)
+                    params.append(len(group))
+                rows = conn.execute(
+                    f"SELECT data FROM jobs WHERE site = ? AND link IN "
+                    f"({' UNION '.join(subqueries)}) ORDER BY position",
+                    params,
+                ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def search(self, text, sites=None, limit=20, cursor=None):
+        """
+        Full-text search over the stored jobs of every site (or of `sites`),
+        best matches first (BM25, the title weighing most).
+
+        Args:
+            text (str): Free text; every word must match the start of a word
+                        of the job's title, company, category or location.
+            cursor (str, optional): The `next_cursor` of the previous page.
+
+        Returns:
+            dict: {"jobs": [job dicts with "site" and "score" added],
+                   "next_cursor": str, or None on the last page}.
+
+        Raises:
+            InvalidCursorError: If `cursor` is not one returned by `search`.
+        """
+        query = fts_query(text)
+        if query is None:
+            return {"jobs": [], "next_cursor": None}
+
+        weights = ", ".join(str(weight) for _, weight in SEARCH_COLUMNS)
+        conditions, params = ["jobs_fts MATCH ?"], [query]
+        if sites:
+            conditions.append(f"site IN ({','.join('?' * len(sites))})")
+            params.extend(sites)
+        # BM25 scores are negative: the lower, the better the match.
+        # Pages continue after the last (score, rowid) of the previous one.
+        after = ""
+        if cursor:
+            last_score, last_rowid = decode_cursor(cursor)
+            after = "WHERE matches.score > ? OR (matches.score = ? AND matches.rowid > ?)"
+            params.extend([last_score, last_score, last_rowid])
+        params.append(limit + 1)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT matches.rowid, matches.site, matches.score, jobs.data FROM ("
+                f"  SELECT rowid, link, site, bm25(jobs_fts, {weights}) AS score"
+                f"  FROM jobs_fts WHERE {' AND '.join(conditions)}"
+                f") AS matches JOIN jobs ON jobs.rowid = matches.rowid "
+                f"{after} "
+                f"ORDER BY matches.score, matches.rowid LIMIT ?",
+                params,
+            ).fetchall()
+
+        page = rows[:limit]
+        jobs = [dict(json.loads(row["data"]), site=row["site"], score=round(-row["score"], 4)) for row in page]
+        next_cursor = encode_cursor(page[-1]["score"], page[-1]["rowid"]) if len(rows) > limit else None
+        return {"jobs": jobs, "next_cursor": next_cursor}
+
+    def changes(self, since=0, limit=1000):
+        """
+        Returns what changed in the store after the `since` cursor, across
+        all sites, as
+        {"cursor": int, "reset": bool, "has_more": bool,
+         "added": [jobs], "updated": [jobs], "expired": [{"link", "site", "fingerprint"}]}.
+
+        Pass the returned `cursor` as `since` next time. Each job is listed
+        once, with its latest state, and a job added and expired in between
+        is left out, even across pages: a page that holds a job expired
+        later is extended up to its expiry, so it may hold more than `limit`
+        changes. Jobs carry "site", "first_seen" and "last_seen".
+
+        With `since=0`, or a cursor older than the retained log, every stored
+        job is returned as added, with `reset` set: the client should drop
+        what it has and start over from this snapshot.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'job_changes'").fetchone()
+            latest = row["seq"] if row else 0
+            oldest = conn.execute("SELECT MIN(seq) FROM job_changes").fetchone()[0]
+            # Sequence numbers have no gaps, so a gap after `since` means pruned changes.
+            pruned = since < latest and (oldest is None or since < oldest - 1)
+            if since <= 0 or since > latest or pruned:
+                jobs = [
+                    self._change_job(row)
+                    for row in conn.execute(
+                        "SELECT site, data, first_seen, last_seen FROM jobs ORDER BY site, position"
+                    )
+                ]
+                return {"cursor": latest, "reset": True, "has_more": False, "added": jobs, "updated": [], "expired": []}
+
+            rows = conn.execute(
+                "SELECT seq, link, site, kind, fingerprint FROM job_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit),
+            ).fetchall()
+
+            # A job of this page may have expired since, in a change past the
+            # page: it is gone from `jobs`, so it can't be sent now, and the
+            # expiry must not come alone on the next page. The page is
+            # extended up to those expiries, so they collapse with the rest.
+            net, current = {}, {}
+            while rows:
+                net, current = self._net_changes(conn, rows)
+                missing = [link for link, (_, last) in net.items() if last["kind"] != EXPIRED and link not in current]
+                until = self._last_expiry(conn, missing, rows[-1]["seq"])
+                if until is None:
+                    break
+                rows += conn.execute(
+                    "SELECT seq, link, site, kind, fingerprint FROM job_changes WHERE seq > ? AND seq <= ? ORDER BY seq",
+                    (rows[-1]["seq"], until),
+                ).fetchall()
+
+        added, updated, expired = [], [], []
+        for link, (first_kind, last) in net.items():
+            if last["kind"] == EXPIRED:
+                if first_kind != ADDED:  # Never seen by the client: nothing to expire
+                    expired.append({"link": link, "site": last["site"], "fingerprint": last["fingerprint"]})
+            elif link in current:
+                (added if first_kind == ADDED else updated).append(current[link])
+        cursor = rows[-1]["seq"] if rows else since
+        return {
+            "cursor": cursor,
+            "reset": False,
+            "has_more": cursor < latest,
+            "added": added,
+            "updated": updated,
+            "expired": expired,
+        }
+
+    def _net_changes(self, conn, rows):
+        """
+        The net change per job over `rows`: {link: (first kind, last row)},
+        and the stored state of the jobs whose last change is not an expiry.
+        """
+        net = {}
+        for row in rows:
+            first_kind = net[row["link"]][0] if row["link"] in net else row["kind"]
+            net[row["link"]] = (first_kind, row)
+        current_links = [link for link, (_, last) in net.items() if last["kind"] != EXPIRED]
+        current = {}
+        for start in range(0, len(current_links), MAX_QUERY_PARAMS):
+            chunk = current_links[start:start + MAX_QUERY_PARAMS]
+            for row in conn.execute(
+                f"SELECT link, site, data, first_seen, last_seen FROM jobs "
+                f"WHERE link IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ):
+                current[row["link"]] = self._change_job(row)
+        return net, current
+
+    @staticmethod
+    def _last_expiry(conn, links, after):
+        """The seq of the last expiry of any of `links` after `after`, or None."""
+        last = None
+        for start in range(0, len(links), MAX_QUERY_PARAMS):
+            chunk = links[start:start + MAX_QUERY_PARAMS]
+            seq = conn.execute(
+                f"SELECT MAX(seq) FROM job_changes WHERE seq > ? AND kind = ? "
+                f"AND link IN ({','.join('?' * len(chunk))})",
+                [after, EXPIRED] + chunk,
+            ).fetchone()[0]
+            if seq is not None and (last is None or seq > last):
+                last = seq
+        return last
+
+    @staticmethod
+    def _change_job(row):
+        return dict(json.loads(row["data"]), site=row["site"], first_seen=row["first_seen"], last_seen=row["last_seen"])
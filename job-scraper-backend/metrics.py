@@ -0,0 +1,400 @@
+# metrics.py
+
+"""
+Prometheus-style metrics for the scrapers and the API, served at /metrics.
+
+`ScrapeMetrics.instrument(site, scraper)` wraps the methods of a registered
+scraper instance with timing hooks, so every scrape of it, whether for
+/api/scrape, a stream, a background task or the pre-scrape scheduler, is
+measured the same way:
+
+- `events` / `aevents`: scrape duration, split into fetch, parse and extract
+  time (see scrapers/instrumentation.py), jobs found, in-flight scrapes and
+  failures,
+- `filter_jobs` and `stream`: filter time and jobs kept by the filter.
+
+Fetches are recorded per site with their latency, size and status code, and
+the circuit breaker of each upstream host with its state.
+Values computed elsewhere (like the response cache counters) are added at
+render time by collectors.
+
+The text format is written here directly, so no client library is needed.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from scrapers.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+from scrapers.instrumentation import ScrapeTimings, active_scrape, fetch_observers
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 0.5, OPEN: 1}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> value
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.extend(self._render_sample(label_values, value))
+        return lines
+
+    def _render_sample(self, label_values, value):
+        return [f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def set(self, *label_values, value):
+        """For collectors mirroring a counter that is kept elsewhere."""
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=SECONDS_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(label_values) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[label_values] = (counts, total + value)
+
+    def _render_sample(self, label_values, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labels, label_values, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labels, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and collectors, and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """`collect()` is called before every render, to update metrics computed elsewhere."""
+        self._collectors.append(collect)
+
+    def render(self):
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ScrapeMetrics:
+    """The scraper, upstream and API metrics of the app."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or Registry()
+        register = self.registry.register
+        self.scrape_seconds = register(Histogram(
+            "scraper_scrape_duration_seconds", "Time to download and extract a site's listing.", ["site"]))
+        self.phase_seconds = register(Histogram(
+            "scraper_phase_duration_seconds",
+            "Time per scrape spent fetching, parsing, extracting and filtering.", ["site", "phase"]))
+        self.fetch_seconds = register(Histogram(
+            "scraper_fetch_duration_seconds", "Latency of upstream requests.", ["site"]))
+        self.fetch_bytes = register(Histogram(
+            "scraper_fetch_bytes", "Bytes downloaded per upstream request.", ["site"], buckets=BYTES_BUCKETS))
+        self.upstream_responses = register(Counter(
+            "scraper_upstream_responses_total",
+            "Upstream responses by status code ('error' when the request failed).", ["site", "status"]))
+        self.scrapes = register(Counter(
+            "scraper_scrapes_total", "Scrapes run, by outcome.", ["site", "outcome"]))
+        self.jobs_found = register(Counter(
+            "scraper_jobs_found_total", "Jobs extracted from the sites' listings.", ["site"]))
+        self.jobs_filtered = register(Counter(
+            "scraper_jobs_matched_total", "Jobs kept by the keyword filter.", ["site"]))
+        self.in_flight = register(Gauge(
+            "scraper_scrapes_in_flight", "Scrapes currently running.", ["site"]))
+        self.api_seconds = register(Histogram(
+            "api_request_duration_seconds", "Time to answer API requests.", ["endpoint", "status"]))
+        self.cache_lookups = register(Counter(
+            "scraper_cache_lookups_total", "Cache lookups, by cache and result.", ["cache", "result"]))
+        self.cache_hit_ratio = register(Gauge(
+            "scraper_cache_hit_ratio", "Share of lookups served from the cache (fresh or stale).", ["cache"]))
+        self.coalesced = register(Counter(
+            "scraper_coalesced_requests_total", "Scrapes that waited for an identical one instead of running."))
+        self.circuit_state = register(Gauge(
+            "scraper_upstream_circuit_open",
+            "Whether the circuit breaker of an upstream host is open (1), half-open (0.5) or closed (0).", ["host"]))
+        self.detail_pages = register(Counter(
+            "scraper_detail_pages_total",
+            "Job pages looked up for enrichment, by result (cached, fetched, reused, gone, failed, skipped, pending).",
+            ["result"]))
+        self.short_circuited = register(Counter(
+            "scraper_upstream_short_circuited_total",
+            "Requests refused without being sent, because the host's circuit breaker was open.", ["host"]))
+        self.http_cache = register(Counter(
+            "scraper_http_cache_total",
+            "Upstream fetches by HTTP cache outcome (fresh, revalidated, changed, miss).", ["result"]))
+        self.parsed_pages = register(Counter(
+            "scraper_parsed_pages_total",
+            "Listing pages handed to the parser, by result: hit (unchanged, not parsed again) or miss.", ["result"]))
+        self.politeness_delayed = register(Counter(
+            "scraper_upstream_politeness_delayed_total",
+            "Requests that waited for a slot in their host's politeness schedule.", ["host"]))
+        self.politeness_wait = register(Counter(
+            "scraper_upstream_politeness_wait_seconds_total",
+            "Seconds requests waited for a slot in their host's politeness schedule.", ["host"]))
+        self.retry_after = register(Counter(
+            "scraper_upstream_retry_after_total",
+            "429 and 503 responses whose Retry-After held the host off.", ["host"]))
+        self.circuit_opened = register(Counter(
+            "scraper_upstream_circuit_opened_total", "Times the circuit breaker of an upstream host opened.", ["host"]))
+        self.prescrapes = register(Counter(
+            "scraper_prescrape_syncs_total",
+            "Pre-scrape syncs by result (full, incremental, incomplete, empty, skipped, failed).", ["site", "result"]))
+
+        fetch_observers.append(self.observe_fetch)
+
+    def observe_fetch(self, site, host, status, size, seconds):
+        site = site or host  # Requests made outside a scrape (e.g. incremental syncs)
+        self.fetch_seconds.observe(site, value=seconds)
+        self.fetch_bytes.observe(site, value=size)
+        self.upstream_responses.inc(site, str(status) if status is not None else "error")
+
+    def observe_request(self, endpoint, status, seconds):
+        self.api_seconds.observe(endpoint or "unknown", str(status), value=seconds)
+
+    def track_cache(self, name, cache):
+        """Exports the hit and miss counters of a ResponseCache."""
+        def collect():
+            hits, stale_hits, misses = cache.hits, cache.stale_hits, cache.misses
+            self.cache_lookups.set(name, "hit", value=hits)
+            self.cache_lookups.set(name, "stale", value=stale_hits)
+            self.cache_lookups.set(name, "miss", value=misses)
+            lookups = hits + stale_hits + misses
+            self.cache_hit_ratio.set(name, value=(hits + stale_hits) / lookups if lookups else 0.0)
+        self.registry.add_collector(collect)
+
+    def track_single_flight(self, flight):
+        """Exports how many scrapes a SingleFlight saved."""
+        self.registry.add_collector(lambda: self.coalesced.set(value=flight.stats()["followers"]))
+
+    def track_enrichment(self, enricher):
+        """Exports how the job pages of an Enricher were served."""
+        def collect():
+            for result, count in enricher.stats().items():
+                self.detail_pages.set(result, value=count)
+        self.registry.add_collector(collect)
+
+    def track_circuit_breakers(self, client):
+        """Exports the circuit breaker state of every host an HttpClient has sent requests to."""
+        def collect():
+            for host, breaker in client.breakers().items():
+                self.circuit_state.set(host, value=CIRCUIT_STATE_VALUES[breaker["state"]])
+                self.short_circuited.set(host, value=breaker["short_circuited"])
+                self.circuit_opened.set(host, value=breaker["opened"])
+        self.registry.add_collector(collect)
+
+    def track_http_cache(self, client):
+        """Exports how the fetches of an HttpClient were served by its HTTP cache."""
+        def collect():
+            counts = client.cache.counters()
+            for result in ("fresh", "revalidated", "changed", "miss"):
+                self.http_cache.set(result, value=counts[result])
+        self.registry.add_collector(collect)
+
+    def track_page_cache(self, page_cache):
+        """Exports how many listing pages a ParsedPageCache spared from parsing."""
+        def collect():
+            stats = page_cache.stats()
+            self.parsed_pages.set("hit", value=stats["hits"])
+            self.parsed_pages.set("miss", value=stats["misses"])
+        self.registry.add_collector(collect)
+
+    def track_politeness(self, client):
+        """Exports how long the requests of an HttpClient waited for their host's politeness slots."""
+        def collect():
+            for host, stats in client.politeness.stats().items():
+                self.politeness_delayed.set(host, value=stats["delayed"])
+                self.politeness_wait.set(host, value=stats["wait_seconds"])
+                self.retry_after.set(host, value=stats["retry_after"])
+        self.registry.add_collector(collect)
+
+    def track_prescrape(self, scheduler):
+        """Exports the outcome of every pre-scrape sync of a PrescrapeScheduler."""
+        def collect():
+            for (site, result), count in scheduler.stats().items():
+                self.prescrapes.set(site, result, value=count)
+        self.registry.add_collector(collect)
+
+    # --- Scraper hooks ---
+
+    def instrument(self, site_name, scraper):
+        """Wraps the scraper instance's methods with the timing hooks. Returns the scraper."""
+        events, aevents = scraper.events, scraper.aevents
+        filter_jobs, stream = scraper.filter_jobs, scraper.stream
+
+        def timed_events(keyword=None):
+            return self._measure_events(site_name, events(keyword))
+
+        def timed_aevents(keyword=None):
+            return self._ameasure_events(site_name, aevents(keyword))
+
+        def timed_filter_jobs(jobs, keyword=None):
+            started = time.perf_counter()
+            filtered = filter_jobs(jobs, keyword)
+            self.phase_seconds.observe(site_name, "filter", value=time.perf_counter() - started)
+            self.jobs_filtered.inc(site_name, amount=len(filtered))
+            return filtered
+
+        def counted_stream(keyword=None):
+            for event in stream(keyword):
+                if event["type"] == "summary":
+                    self.jobs_filtered.inc(site_name, amount=event["filtered_jobs"])
+                yield event
+
+        scraper.events = timed_events
+        scraper.aevents = timed_aevents
+        scraper.filter_jobs = timed_filter_jobs
+        scraper.stream = counted_stream
+        return scraper
+
+    def _start(self, site_name):
+        self.in_flight.inc(site_name)
+        return ScrapeTimings(site_name)
+
+    def _finish(self, timings, busy, jobs, outcome):
+        # `busy` is the time spent inside the scraper, not in whoever consumes
+        # its events; extract time is what fetching and parsing don't cover.
+        site_name = timings.site
+        self.in_flight.dec(site_name)
+        self.scrapes.inc(site_name, outcome)
+        self.jobs_found.inc(site_name, amount=jobs)
+        if outcome != "ok":
+            return
+        self.scrape_seconds.observe(site_name, value=busy)
+        self.phase_seconds.observe(site_name, "fetch", value=timings.fetch)
+        self.phase_seconds.observe(site_name, "parse", value=timings.parse)
+        self.phase_seconds.observe(site_name, "extract", value=max(0.0, busy - timings.fetch - timings.parse))
+
+    def _measure_events(self, site_name, events):
+        timings = self._start(site_name)
+        busy, jobs, outcome = 0.0, 0, "cancelled"
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    with active_scrape(timings):
+                        event = next(events)
+                except StopIteration:
+                    outcome = "ok"
+                    return
+                finally:
+                    busy += time.perf_counter() - started
+                if event["type"] == "job":
+                    jobs += 1
+                yield event
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            events.close()
+            self._finish(timings, busy, jobs, outcome)
+
+    async def _ameasure_events(self, site_name, events):
+        timings = self._start(site_name)
+        busy, jobs, outcome = 0.0, 0, "cancelled"
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    with active_scrape(timings):
+                        event = await events.__anext__()
+                except StopAsyncIteration:
+                    outcome = "ok"
+                    return
+                finally:
+                    busy += time.perf_counter() - started
+                if event["type"] == "job":
+                    jobs += 1
+                yield event
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            await events.aclose()
+            self._finish(timings, busy, jobs, outcome)
+
+    def render(self):
+        return self.registry.render()
@@ -0,0 +1,179 @@
+# response_cache.py
+
+"""
+In-process cache for scrape results and site listings.
+
+Entries are keyed on (site, normalized keyword) and expire after a per-site
+TTL. Once an entry is past its TTL it is still served ("stale") while a single
+background thread refreshes it, so only the very first request for a key ever
+waits on the upstream site. The cache is bounded: when it is full, the least
+recently used entry is evicted.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+
+def normalize_keyword(keyword):
+    """Lowercases and collapses whitespace so 'Data  Analyst' and 'data analyst' share an entry."""
+    if not keyword:
+        return ""
+    return " ".join(keyword.lower().split())
+
+
+class ResponseCache:
+    """A thread-safe LRU cache with per-site TTLs and stale-while-revalidate."""
+
+    def __init__(self, default_ttl=900, site_ttls=None, max_entries=256):
+        self.default_ttl = default_ttl
+        self.site_ttls = dict(site_ttls or {})
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def ttl_for(self, site_name):
+        return self.site_ttls.get(site_name, self.default_ttl)
+
+    def make_key(self, site_name, keyword=None):
+        return (site_name, normalize_keyword(keyword))
+
+    def peek(self, site_name, keyword=None):
+        """
+        Returns the cached value (fresh or stale) without computing or
+        refreshing anything, or None. Not counted as a hit or a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(self.make_key(site_name, keyword))
+        return entry[0] if entry else None
+
+    def _lookup(self, key, site_name):
+        """
+        Returns (value, status, start_refresh) for a cached key, or None on a
+        miss. `start_refresh` is True for the one caller that must start the
+        background refresh of a stale entry. Called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at = entry
+        self._entries.move_to_end(key)
+        if time.monotonic() - stored_at < self.ttl_for(site_name):
+            self.hits += 1
+            return value, HIT, False
+
+        self.stale_hits += 1
+        start_refresh = key not in self._refreshing
+        self._refreshing.add(key)
+        return value, STALE, start_refresh
+
+    def get_or_compute(self, site_name, keyword, compute, cacheable=None):
+        """
+        Returns (value, status) for the given site and keyword.
+
+        `compute` is called with no arguments to produce a fresh value on a
+        miss or during a background refresh. If `cacheable` is given, values
+        for which it returns False are returned but not stored.
+        """
+        key = self.make_key(site_name, keyword)
+
+        with self._lock:
+            found = self._lookup(key, site_name)
+        if found is not None:
+            value, status, start_refresh = found
+            if start_refresh:
+                threading.Thread(
+                    target=self._refresh,
+                    args=(key, compute, cacheable),
+                    daemon=True,
+                ).start()
+            return value, status
+
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self._store(key, value)
+        return value, MISS
+
+    async def aget_or_compute(self, site_name, keyword, acompute, cacheable=None):
+        """
+        The asyncio counterpart of `get_or_compute`, for the ASGI app.
+        `acompute` is a coroutine function, and a stale entry is refreshed in
+        a task on the running event loop instead of a thread.
+        """
+        key = self.make_key(site_name, keyword)
+
+        with self._lock:
+            found = self._lookup(key, site_name)
+        if found is not None:
+            value, status, start_refresh = found
+            if start_refresh:
+                task = asyncio.get_running_loop().create_task(self._arefresh(key, acompute, cacheable))
+                self._refresh_tasks.add(task)  # Keep a reference until it is done
+                task.add_done_callback(self._refresh_tasks.discard)
+            return value, status
+
+        value = await acompute()
+        if cacheable is None or cacheable(value):
+            self._store(key, value)
+        return value, MISS
+
+    async def _arefresh(self, key, acompute, cacheable):
+        try:
+            value = await acompute()
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key, compute, cacheable):
+        try:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+        except Exception as e:
+            # Keep serving the stale value; the next stale hit retries.
+            print(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, site_name=None):
+        """Drops every entry, or only the entries of one site."""
+        with self._lock:
+            if site_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == site_name]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
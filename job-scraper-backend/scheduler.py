@@ -0,0 +1,156 @@
+# scheduler.py
+
+"""
+Background pre-scrape scheduler.
+
+Every registered scraper is run periodically and its full, unfiltered listing
+is written to the job store. Each site gets its own thread, so a slow site
+(UNJobs and its politeness delays) never holds back the others.
+
+Scrapers that support it (`supports_incremental`) only download the jobs
+published since the newest one stored, and are fully re-synced once every
+`full_sync_interval` so that removed jobs eventually disappear.
+
+Only a complete listing removes jobs from the store. When a page failed or
+the listing was cut short, the jobs it has are added or updated, and the
+stored ones it lacks are kept until the next complete sync.
+
+The scheduler normally runs inside the web process (see app.py), so every
+gunicorn worker runs one. Before syncing a site, a scheduler claims it in
+the job store (`JobStore.claim_sync`), atomically: each site is scraped by
+one worker per interval, not by all of them. The scheduler can also run as a
+dedicated process, with PRESCRAPE_IN_APP=0 set for the web workers:
+
+    python scheduler.py
+"""
+
+import os
+import threading
+import time
+
+
+class PrescrapeScheduler:
+    """Runs `fetch_jobs()` for each site every `interval` seconds and stores the result."""
+
+    def __init__(self, scrapers, store, interval=1800, site_intervals=None, full_sync_interval=24 * 3600):
+        self.scrapers = scrapers
+        self.store = store
+        self.interval = interval
+        self.full_sync_interval = full_sync_interval
+        self.site_intervals = dict(site_intervals or {})
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.counts = {}  # (site, result) -> syncs, see `stats`
+
+    def interval_for(self, site_name):
+        return self.site_intervals.get(site_name, self.interval)
+
+    def _count(self, site_name, result):
+        with self._lock:
+            self.counts[site_name, result] = self.counts.get((site_name, result), 0) + 1
+
+    def stats(self):
+        """
+        Returns {(site, result): syncs}, the result being "full", "incremental",
+        "incomplete", "empty" (nothing scraped), "skipped" (circuit open) or "failed".
+        """
+        with self._lock:
+            return dict(self.counts)
+
+    def sync_site(self, site_name):
+        """Scrapes one site and stores its listing. Returns the number of jobs stored."""
+        scraper = self.scrapers[site_name]
+        if scraper.retry_after():
+            self._count(site_name, "skipped")
+            return 0
+        if scraper.supports_incremental:
+            state = self.store.watermark(site_name)
+            if (state and state["watermark"]
+                    and time.time() - (state["full_synced_at"] or 0) < self.full_sync_interval):
+                return self.sync_new_jobs(site_name, state["watermark"])
+
+        jobs, complete = scraper.fetch_listing()
+
+        if not jobs:
+            # Scrapers return an empty list when the upstream fails; keep the
+            # previous snapshot rather than wiping the site.
+            print(f"Pre-scrape of {site_name} returned no jobs, keeping the stored listing")
+            self._count(site_name, "empty")
+            return 0
+
+        if not complete:
+            # The jobs of the pages that failed are not gone upstream: don't
+            # expire them, and keep the watermark so the next sync is full.
+            total = self.store.add_site_jobs(
+                site_name,
+                jobs,
+                lambda listing: scraper.build_result(listing, [])["unique_companies"],
+            )
+            print(f"Pre-scrape of {site_name} was incomplete: stored {len(jobs)} jobs "
+                  f"without expiring any ({total} stored)")
+            self._count(site_name, "incomplete")
+            return len(jobs)
+
+        unique_companies = scraper.build_result(jobs, [])["unique_companies"]
+        count = self.store.replace_site_jobs(site_name, jobs, unique_companies)
+        if scraper.supports_incremental:
+            self.store.set_watermark(site_name, scraper.watermark_of(jobs), full_sync=True)
+        self._count(site_name, "full")
+        return count
+
+    def sync_new_jobs(self, site_name, since):
+        """Adds the jobs published after the `since` watermark to the store. Returns how many."""
+        scraper = self.scrapers[site_name]
+        jobs, watermark = scraper.fetch_new_jobs(since)
+        self.store.add_site_jobs(
+            site_name,
+            jobs,
+            lambda listing: scraper.build_result(listing, [])["unique_companies"],
+        )
+        self.store.set_watermark(site_name, watermark)
+        self._count(site_name, "incremental")
+        return len(jobs)
+
+    def is_due(self, site_name):
+        last_sync = self.store.last_sync(site_name)
+        return last_sync is None or time.time() - last_sync["synced_at"] >= self.interval_for(site_name)
+
+    def _run_site(self, site_name):
+        while not self._stop.is_set():
+            # The store is shared between processes: a site another worker has
+            # just synced, or is syncing right now, is skipped.
+            if self.is_due(site_name) and self.store.claim_sync(site_name, self.interval_for(site_name)):
+                try:
+                    self.sync_site(site_name)
+                except Exception as e:
+                    print(f"Pre-scrape of {site_name} failed: {e}")
+                    self._count(site_name, "failed")
+            self._stop.wait(self.interval_for(site_name))
+
+    def start(self):
+        for site_name in self.scrapers:
+            thread = threading.Thread(
+                target=self._run_site,
+                args=(site_name,),
+                name=f"prescrape-{site_name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    # Don't let the import of app start a second scheduler in this process.
+    os.environ["PRESCRAPE_IN_APP"] = "0"
+    from app import prescrape_scheduler
+
+    prescrape_scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        prescrape_scheduler.stop()
@@ -0,0 +1,127 @@
+# scrape_tasks.py
+
+"""
+Background scrape tasks for the submit/poll API.
+
+A slow site (UNJobs sleeps through its politeness delays for over a minute)
+would otherwise hold an HTTP worker for the whole scrape, or be killed by the
+gunicorn timeout. Instead, `POST /api/scrape-jobs` submits the scrape here and
+returns at once with a task id; the client then polls the task.
+
+Tasks run on a bounded thread pool, and at most `max_pending` of them may be
+waiting or running at a time. Finished tasks are kept for `retention` seconds,
+then forgotten. Submitting a site and keyword that is already queued or
+running returns the existing task instead of scraping twice.
+
+Tasks live in the memory of the process, so with several gunicorn workers a
+task is only visible to the worker that accepted it.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import normalize_keyword
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when too many tasks are already waiting or running."""
+
+
+class ScrapeTaskRunner:
+    """Runs scrape functions in the background and keeps their results for a while."""
+
+    def __init__(self, max_workers=4, max_pending=100, retention=600):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-task")
+        self._tasks = {}  # id -> task dict
+        self._active = {}  # (site, normalized keyword) -> id of a queued or running task
+        self._lock = threading.Lock()
+
+    def submit(self, site_name, keyword, func):
+        """
+        Schedules `func()` and returns (task, created). `created` is False when
+        an identical task was already queued or running.
+        Raises QueueFullError when `max_pending` tasks are not finished yet.
+        """
+        key = (site_name, normalize_keyword(keyword))
+        with self._lock:
+            self._prune()
+            task_id = self._active.get(key)
+            if task_id is not None:
+                return self._public(self._tasks[task_id]), False
+            if len(self._active) >= self.max_pending:
+                raise QueueFullError(f"{len(self._active)} scrape tasks are already pending")
+
+            task = {
+                "id": uuid.uuid4().hex,
+                "site": site_name,
+                "keyword": keyword,
+                "status": QUEUED,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._tasks[task["id"]] = task
+            self._active[key] = task["id"]
+            snapshot = self._public(task)
+
+        self._executor.submit(self._run, task, key, func)
+        return snapshot, True
+
+    def _run(self, task, key, func):
+        with self._lock:
+            task["status"] = RUNNING
+            task["started_at"] = time.time()
+        try:
+            result, error, status = func(), None, DONE
+        except Exception as e:
+            print(f"Scrape task {task['id']} ({task['site']}) failed: {e}")
+            result, error, status = None, "An internal error occurred during scraping.", FAILED
+        with self._lock:
+            task.update(status=status, result=result, error=error, finished_at=time.time())
+            self._active.pop(key, None)
+
+    def get(self, task_id):
+        """Returns a copy of the task, or None if it is unknown or expired."""
+        with self._lock:
+            self._prune()
+            task = self._tasks.get(task_id)
+            return self._public(task) if task else None
+
+    def stats(self):
+        with self._lock:
+            self._prune()
+            pending = len(self._active)
+            return {"pending": pending, "finished": len(self._tasks) - pending, "max_pending": self.max_pending}
+
+    def _prune(self):
+        # Called with the lock held.
+        expired_before = time.time() - self.retention
+        expired = [
+            task_id for task_id, task in self._tasks.items()
+            if task["finished_at"] is not None and task["finished_at"] < expired_before
+        ]
+        for task_id in expired:
+            del self._tasks[task_id]
+
+    @staticmethod
+    def _public(task):
+        snapshot = dict(task)
+        if snapshot["status"] != DONE:
+            del snapshot["result"]
+        if snapshot["status"] != FAILED:
+            del snapshot["error"]
+        return snapshot
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,163 @@
+# scrapers/async_http_client.py
+
+"""
+Async counterpart of the shared HTTP client, for the `ascrape()` path.
+
+When `httpx` is installed, requests go through one pooled `httpx.AsyncClient`
+per event loop, so a single loop keeps many fetches in flight without a
+thread each. Without it, every request runs the sync `http_client.get` in a
+worker thread, so async scrapers still work, just less efficiently.
+
+Either way the behaviour matches the sync client: the same default headers,
+per-host concurrency caps, politeness schedule, circuit breakers and
+upstream override, fetches recorded in `http_client.stats()`, and responses
+and exceptions are those of `requests`, so scraper code catches the same
+errors on both paths, and pages go through the same HTTP cache. Politeness
+waits are `asyncio.sleep`s, and cache reads and writes run in a worker thread.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .http_client import DEFAULT_HEADERS, http_client
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def _to_requests_response(response, url):
+    """Wraps an httpx response into a `requests.Response` (already fully read)."""
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted._content = response.content
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = url
+    converted.encoding = response.encoding
+    converted.reason = response.reason_phrase
+    converted.elapsed = response.elapsed
+    return converted
+
+
+class AsyncHttpClient:
+    """Hands out pooled async clients per event loop and mirrors `HttpClient.get`."""
+
+    def __init__(self, sync_client=http_client):
+        self.sync_client = sync_client
+        # Event loop -> {"client": httpx.AsyncClient, "semaphores": {host: Semaphore}}.
+        # httpx clients and asyncio semaphores belong to the loop they were made on.
+        self._loops = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._ssl_context = None  # Loading the CA bundle takes ~150 ms; do it once
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None:
+                policy = self.sync_client.default_policy
+                if httpx is not None and self._ssl_context is None:
+                    self._ssl_context = httpx.create_ssl_context()
+                client = httpx.AsyncClient(
+                    headers=DEFAULT_HEADERS,
+                    verify=self._ssl_context,
+                    limits=httpx.Limits(max_keepalive_connections=policy["pool_maxsize"]),
+                    transport=httpx.AsyncHTTPTransport(verify=self._ssl_context, retries=policy["retries"]),  # Connection errors only
+                ) if httpx is not None else None
+                state = self._loops[loop] = {"client": client, "semaphores": {}}
+            return state
+
+    def _semaphore_for(self, state, host):
+        semaphore = state["semaphores"].get(host)
+        if semaphore is None:
+            limit = self.sync_client.policy_for(host)["max_concurrency"]
+            semaphore = state["semaphores"][host] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def get(self, url, params=None, headers=None, timeout=None, allow_redirects=True):
+        """
+        Same arguments as `http_client.get`, awaited. Returns a
+        `requests.Response`; raises `requests` exceptions.
+        """
+        if httpx is None:
+            return await asyncio.to_thread(
+                self.sync_client.get, url,
+                params=params, headers=headers, timeout=timeout, allow_redirects=allow_redirects,
+            )
+
+        cache = self.sync_client.cache
+        if cache.enabled:
+            key, request_headers, entry = await asyncio.to_thread(self.sync_client.cache_lookup, url, params, headers)
+            if entry is not None:
+                if entry["fresh"]:
+                    return await asyncio.to_thread(cache.serve_fresh, entry, url)
+                headers = dict(headers or {}, **cache.conditional_headers(entry))
+
+        host = urlsplit(url).hostname or ""
+        state = self._state()
+        breaker = self.sync_client.breaker_for(host)
+        async with self._semaphore_for(state, host):
+            breaker.check()  # Fail fast, rather than after the politeness wait
+            delay = self.sync_client.politeness.reserve(host)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Only now, right before sending: a probe claimed here is always
+            # recorded or released below, even if the task is cancelled.
+            probe = breaker.before_request()
+            started = time.perf_counter()
+            response = None
+            cancelled = False
+            try:
+                raw = await state["client"].get(
+                    self.sync_client.resolve(url),
+                    params=params,
+                    headers=headers,
+                    timeout=timeout,
+                    follow_redirects=allow_redirects,
+                )
+                response = _to_requests_response(raw, str(raw.url))
+            except httpx.TimeoutException as e:
+                raise requests.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(str(e)) from e
+            except asyncio.CancelledError:
+                cancelled = True  # Says nothing about the host
+                raise
+            finally:
+                if cancelled:
+                    breaker.release(probe)
+                else:
+                    self.sync_client._record(host, url, response, time.perf_counter() - started)
+        if not cache.enabled:
+            return response
+        return await asyncio.to_thread(cache.update, key, request_headers, entry, response)
+
+    def clear_cookies(self, url):
+        """Forgets the cookies set by the host of `url` (on the current loop's client)."""
+        if httpx is None:
+            self.sync_client.session_for(url).cookies.clear()
+            return
+        host = urlsplit(self.sync_client.resolve(url)).hostname or ""
+        cookies = self._state()["client"].cookies
+        for cookie in list(cookies.jar):
+            if cookie.domain.lstrip(".") == host:
+                cookies.jar.clear(cookie.domain, cookie.path, cookie.name)
+
+    async def aclose(self):
+        """Closes the client of the current event loop. Call it before the loop ends."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.pop(loop, None)
+        if state and state["client"] is not None:
+            await state["client"].aclose()
+
+
+# The async client shared by every scraper in the process.
+async_http_client = AsyncHttpClient()
@@ -1,31 +1,388 @@
 # scrapers/base_scraper.py
 
-from abc import ABC, abstractmethod
+import asyncio
+import contextvars
+import hashlib
+import threading
+from abc import ABC
+from .http_client import http_client
+from .dates import is_deadline_open, to_iso_date
+from .details import extract_details
+from .keywords import get_matcher
+
+
+def job_event(job):
+    """An event carrying one job, yielded as soon as the job is extracted."""
+    return {"type": "job", "job": job}
+
+
+def page_event(url, jobs, ok=True):
+    """An event marking that a page was processed, with how many jobs it held."""
+    return {"type": "page", "url": url, "jobs": jobs, "ok": ok}
+
+
+def job_fingerprint(job):
+    """
+    A stable id for a job: its link, title and company, with case and
+    spacing normalized. It changes when the job is renamed or moves to
+    another company, so clients can tell a job apart from its earlier version.
+    """
+    parts = [job.get("link") or ""]
+    for field in ("title", "company"):
+        value = job.get(field)
+        parts.append(" ".join(value.lower().split()) if isinstance(value, str) else "")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class _BridgeLoop:
+    """
+    One event loop, run forever in a daemon thread, for the sync callers of
+    async scrapers. It lives as long as the process, so the pooled client
+    the async HTTP client keeps for it (connections, TLS sessions) is reused
+    from one sync scrape to the next, and concurrent sync scrapes share it.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="async-bridge", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coroutine):
+        """Runs `coroutine` on the bridge loop, in a copy of the caller's context, and returns its result."""
+        loop = self.loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("iterate_async can't be called from the bridge loop itself")
+        # The task copies the context current when it is scheduled, so the
+        # fetches count towards the caller's scrape (see instrumentation.py).
+        future = contextvars.copy_context().run(asyncio.run_coroutine_threadsafe, coroutine, loop)
+        return future.result()
+
+
+_bridge = _BridgeLoop()
+
+
+def iterate_async(async_events):
+    """
+    Runs an async generator to completion on the shared bridge loop, yielding
+    its items. Lets sync callers use a scraper written with `aiter_events`.
+    The calling thread blocks while it waits, so it must not be running an
+    event loop itself.
+    """
+    try:
+        while True:
+            try:
+                item = _bridge.run(async_events.__anext__())
+            except StopAsyncIteration:
+                break
+            yield item
+    finally:
+        _bridge.run(async_events.aclose())
+
 
 class BaseScraper(ABC):
     """
     Abstract base class for a web scraper.
     It defines the contract that all concrete scrapers must follow.
+
+    A scrape is split in two steps:
+    - `iter_events` downloads the site and yields every job it lists, one
+      at a time, along with a progress event per page. `fetch_jobs`
+      collects them into a list.
+    - `filter_jobs` keeps the jobs relevant to a keyword. It does no network
+      access, so it can also run on jobs that were stored earlier.
+
+    Every step has an asyncio counterpart (`aiter_events`, `afetch_jobs`,
+    `ascrape`). A scraper implements either `iter_events` or `aiter_events`,
+    and the base class bridges to the other one: a sync scraper runs in a
+    worker thread when used from async code, and an async scraper runs on a
+    shared event loop thread when used from sync code.
     """
 
-    @abstractmethod
+    # Values scrapers use for a missing company name.
+    MISSING_VALUES = ("N/A", "Unknown")
+
+    # The job fields holding the site's own publication and deadline dates.
+    # They are normalized into the "published" and "deadline" ISO fields of
+    # every job (None when the site gives no date).
+    PUBLISHED_FIELD = "published_date"
+    DEADLINE_FIELD = "deadline_date"
+
+    # True when the scraper implements `watermark_of` and `fetch_new_jobs`,
+    # so that a sync can download only what was published since the last one.
+    supports_incremental = False
+
+    # The site's listing URLs. If the circuit breaker of any of their hosts
+    # is open (see circuit_breaker.py), the site is treated as unreachable.
+    UPSTREAM_URLS = ()
+
+    # True when the site's job pages hold more than its listing (description,
+    # requirements, salary), so that results can be enriched with
+    # `parse_details` (see enrichment.py).
+    supports_details = False
+
+    # The container of a job on its own page, as a `parse_html` selector.
+    # None lets `extract_details` look for the page's <main> or <article>.
+    DETAIL_SELECTOR = None
+
+    # Set by scrapers that can tell their last unfiltered listing stopped
+    # before its end (a page cap), see `fetch_listing`.
+    listing_truncated = False
+
+    def iter_events(self, keyword=None):
+        """
+        Downloads and extracts the job listing, without keyword filtering.
+        This is a generator, so a caller gets each job as soon as it is
+        extracted instead of waiting for the last page.
+        Scrapers that implement `aiter_events` instead don't override it.
+
+        Args:
+            keyword (str, optional): Scrapers that can search upstream may use
+                                     it to narrow down what they download.
+                                     Others ignore it.
+
+        Yields:
+            dict: `job_event(job)` for every job, each job with at least
+                  {"title": str, "company": str, "link": str}, and
+                  `page_event(url, count)` once a page has been processed.
+        """
+        if type(self).aiter_events is BaseScraper.aiter_events:
+            raise NotImplementedError(f"{type(self).__name__} must implement iter_events or aiter_events")
+        yield from iterate_async(self.aiter_events(keyword))
+
+    async def aiter_events(self, keyword=None):
+        """
+        The async counterpart of `iter_events`, yielding the same events.
+        By default it runs the sync `iter_events` in a worker thread; scrapers
+        that spend their time waiting (many pages, politeness delays) override
+        it with a native implementation using `async_http_client`.
+        """
+        events = self.iter_events(keyword)
+        finished = object()
+        try:
+            while True:
+                event = await asyncio.to_thread(next, events, finished)
+                if event is finished:
+                    break
+                yield event
+        finally:
+            events.close()
+
+    def fetch_jobs(self, keyword=None):
+        """
+        Downloads and extracts the whole job listing.
+
+        Returns:
+            list: The job dictionaries yielded by `iter_events`.
+        """
+        return [event["job"] for event in self.events(keyword) if event["type"] == "job"]
+
+    def fetch_listing(self):
+        """
+        Downloads the whole unfiltered listing, and tells whether it is complete.
+
+        Returns:
+            tuple: (jobs, complete). `complete` is False when a page could not
+                   be fetched, or the scraper stopped before the end of the
+                   listing: jobs missing from it may still be listed upstream.
+        """
+        jobs, complete = [], True
+        for event in self.events():
+            if event["type"] == "job":
+                jobs.append(event["job"])
+            elif not event["ok"]:
+                complete = False
+        return jobs, complete and not self.listing_truncated
+
+    def events(self, keyword=None):
+        """`iter_events`, with every job completed by `prepare_job`."""
+        for event in self.iter_events(keyword):
+            if event["type"] == "job":
+                self.prepare_job(event["job"])
+            yield event
+
+    async def afetch_jobs(self, keyword=None):
+        """The async counterpart of `fetch_jobs`."""
+        return [event["job"] async for event in self.aevents(keyword) if event["type"] == "job"]
+
+    async def aevents(self, keyword=None):
+        """The async counterpart of `events`."""
+        async for event in self.aiter_events(keyword):
+            if event["type"] == "job":
+                self.prepare_job(event["job"])
+            yield event
+
+    def prepare_job(self, job):
+        """Adds the fields every job gets, whatever the site: dates and fingerprint."""
+        self.add_dates(job)
+        job["fingerprint"] = job_fingerprint(job)
+        return job
+
+    def add_dates(self, job):
+        """Sets the job's "published" and "deadline" fields from the site's own date fields."""
+        site = type(self).__name__
+        job["published"] = to_iso_date(job.get(self.PUBLISHED_FIELD), site)
+        job["deadline"] = to_iso_date(job.get(self.DEADLINE_FIELD), site)
+        return job
+
+    def has_open_deadline(self, job):
+        """True unless the job's deadline passed more than two weeks ago."""
+        if "deadline" in job:
+            return is_deadline_open(job["deadline"])
+        # Jobs stored before dates were normalized
+        return is_deadline_open(to_iso_date(job.get(self.DEADLINE_FIELD), type(self).__name__))
+
+    def watermark_of(self, jobs):
+        """
+        Returns a marker of the newest job among `jobs` (e.g. a creation
+        date), to pass to `fetch_new_jobs` next time, or None.
+        """
+        return None
+
+    def fetch_new_jobs(self, since):
+        """
+        Downloads only the jobs published after the `since` watermark.
+        Only called when `supports_incremental` is True.
+
+        Returns:
+            tuple: (list of new jobs, new watermark).
+        """
+        raise NotImplementedError
+
+    def retry_after(self):
+        """
+        Seconds until the site may be scraped again, while the circuit breaker
+        of one of its hosts is open; 0 when it can be scraped now.
+        """
+        return max((http_client.retry_after(url) for url in self.UPSTREAM_URLS), default=0.0)
+
+    def parse_details(self, content):
+        """
+        Extracts the details of a job from the HTML of its page.
+
+        Returns:
+            dict: {"description": str or None, "requirements": [str], "salary": str or None}
+        """
+        return extract_details(content, self.DETAIL_SELECTOR)
+
+    def listing_covers(self, keyword=None):
+        """
+        True when the unfiltered listing (`fetch_jobs()` without a keyword)
+        holds every job a search for `keyword` could return, so that the
+        search is answered by filtering the listing in memory. Scrapers whose
+        listing is only part of the site return False for the keywords it
+        can't answer, which then go to the site's own search.
+        """
+        return True
+
+    def match_job(self, job, matcher, keyword=None):
+        """
+        Decides whether a single job passes the filter, and why.
+        By default the job title must contain one of the matcher's terms.
+
+        Returns:
+            list: The matched terms; an empty list means the job is filtered out.
+        """
+        return matcher.matches(job.get('title'))
+
+    def filter_jobs(self, jobs, keyword=None):
+        """
+        Keeps the jobs relevant to the keyword, or to the default IT keywords.
+        Each returned job is a copy with a "matched_keywords" list added.
+        """
+        matcher = get_matcher(keyword)
+        filtered_jobs = []
+        for job in jobs:
+            matched = self.match_job(job, matcher, keyword)
+            if matched:
+                filtered_jobs.append(dict(job, matched_keywords=matched))
+        return filtered_jobs
+
+    def company_of(self, job):
+        """The job's company name, or None when the site did not give one."""
+        company = job.get('company')
+        if company and company not in self.MISSING_VALUES:
+            return company
+        return None
+
+    def build_result(self, all_jobs, filtered_jobs):
+        company_names = {self.company_of(job) for job in all_jobs} - {None}
+        return {
+            "total_jobs": len(all_jobs),
+            "filtered_jobs": len(filtered_jobs),
+            "unique_companies": len(company_names),
+            "jobs": filtered_jobs
+        }
+
     def scrape(self, keyword=None):
         """
         The main method to perform the scraping.
 
         Args:
-            keyword (str, optional): A specific keyword to filter jobs by. 
+            keyword (str, optional): A specific keyword to filter jobs by.
                                      If None, use default keywords.
 
         Returns:
             dict: A dictionary containing the scraped data, structured as:
                   {
                       "total_jobs": int,
+                      "filtered_jobs": int,
                       "unique_companies": int,
                       "jobs": [
-                          {"title": str, "company": str, "link": str},
+                          {"title": str, "company": str, "link": str,
+                           "matched_keywords": [str, ...]},
                           ...
                       ]
                   }
         """
-        pass
\ No newline at end of file
+        all_jobs = self.fetch_jobs(keyword=keyword)
+        filtered_jobs = self.filter_jobs(all_jobs, keyword)
+        return self.build_result(all_jobs, filtered_jobs)
+
+    def stream(self, keyword=None):
+        """
+        The streaming counterpart of `scrape`.
+
+        Yields the matching jobs one by one (as job events, with their
+        "matched_keywords"), the page events of the scraper, and finally a
+        summary event with the same counters as `scrape`. Only the counters
+        are kept, so memory does not grow with the size of the listing.
+        """
+        matcher = get_matcher(keyword)
+        total_jobs = filtered_jobs = 0
+        company_names = set()
+        for event in self.events(keyword):
+            if event["type"] != "job":
+                yield event
+                continue
+            job = event["job"]
+            total_jobs += 1
+            company_names.add(self.company_of(job))
+            matched = self.match_job(job, matcher, keyword)
+            if matched:
+                filtered_jobs += 1
+                yield job_event(dict(job, matched_keywords=matched))
+        company_names.discard(None)
+        yield {
+            "type": "summary",
+            "total_jobs": total_jobs,
+            "filtered_jobs": filtered_jobs,
+            "unique_companies": len(company_names),
+        }
+
+    async def ascrape(self, keyword=None):
+        """
+        The async counterpart of `scrape`, with the same result. Many scrapes
+        can run on one event loop, their fetches and delays interleaved.
+        """
+        all_jobs = await self.afetch_jobs(keyword=keyword)
+        filtered_jobs = self.filter_jobs(all_jobs, keyword)
+        return self.build_result(all_jobs, filtered_jobs)
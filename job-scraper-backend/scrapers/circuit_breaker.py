@@ -0,0 +1,163 @@
+# scrapers/circuit_breaker.py
+
+"""
+Circuit breakers for the upstream hosts.
+
+A site that blocks us (UNJobs answers 403 to automated requests) or is down
+would otherwise be hit by every scrape, each of them going through its
+retries and politeness delays before giving up. The shared HTTP clients keep
+one breaker per host instead:
+
+- CLOSED: requests go through. Each blocked or failed request (403, 429, 5xx,
+  or no response at all) counts as a failure, any other response resets the
+  count. After `failure_threshold` failures in a row the breaker opens.
+- OPEN: requests fail at once with `CircuitOpenError`, without touching the
+  network, until `cooldown` seconds have passed.
+- HALF_OPEN: a single probe request is let through; the others still fail
+  fast. If the probe succeeds the breaker closes, otherwise it opens again
+  with twice the cooldown (up to `max_cooldown`).
+"""
+
+import threading
+import time
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Statuses that mean the host is blocking us or failing, rather than that a
+# page is missing.
+FAILURE_STATUSES = frozenset([403, 429])
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose breaker is open."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit open for {host}, retrying in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def is_failure(status):
+    """Whether a response status (None when there was no response) counts against the host."""
+    return status is None or status in FAILURE_STATUSES or status >= 500
+
+
+class CircuitBreaker:
+    """The closed/open/half-open state of one upstream host."""
+
+    def __init__(self, host, failure_threshold=5, cooldown=60, max_cooldown=1800):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0  # Consecutive failures while closed
+        self.cooldown = cooldown  # Doubles with every failed probe
+        self.opened_at = None
+        self.probing = False
+        self.short_circuited = 0  # Requests refused while open
+        self.opened = 0  # Times the breaker opened
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        """Seconds until the breaker lets a probe through; 0 when requests may go now."""
+        with self._lock:
+            return self._retry_after(time.monotonic())
+
+    def _retry_after(self, now):
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            return max(0.0, self.opened_at + self.cooldown - now)
+        return 0.0 if not self.probing else float(self.base_cooldown)
+
+    def check(self):
+        """
+        Raises CircuitOpenError when a request would be refused now, without
+        claiming the probe: callers check before waiting for anything, and
+        call `before_request` right before sending.
+        """
+        with self._lock:
+            retry_after = self._retry_after(time.monotonic())
+            if retry_after <= 0:
+                return
+            self.short_circuited += 1
+        raise CircuitOpenError(self.host, retry_after)
+
+    def before_request(self):
+        """
+        Raises CircuitOpenError unless a request to the host may be sent now.
+        Returns True when the request is the half-open probe: its outcome must
+        then be passed to `record`, or the probe given back with `release`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True  # This request is the probe
+                return True
+            self.short_circuited += 1
+            retry_after = self._retry_after(now)
+        raise CircuitOpenError(self.host, retry_after)
+
+    def record(self, status):
+        """Counts the outcome of a request that `before_request` let through."""
+        failed = is_failure(status)
+        with self._lock:
+            if self.state == HALF_OPEN and self.probing:
+                self.probing = False
+                if failed:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self._open(status)
+                else:
+                    self._close()
+                return
+            if not failed:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open(status)
+
+    def release(self, probe):
+        """
+        Forgets a request that `before_request` let through but that never
+        completed (cancelled). If it was the probe, the next request probes.
+        """
+        if not probe:
+            return
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    def _open(self, status):
+        # Called with the lock held.
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.failures = 0
+        self.opened += 1
+
+    def _close(self):
+        # Called with the lock held.
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.opened_at = None
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "cooldown": self.cooldown,
+                "retry_after": round(self._retry_after(time.monotonic()), 1),
+                "short_circuited": self.short_circuited,
+                "opened": self.opened,
+            }
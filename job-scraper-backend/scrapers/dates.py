@@ -0,0 +1,152 @@
+# scrapers/dates.py
+
+"""
+Shared date normalization for all scrapers.
+
+Every site writes its dates differently ('Wednesday, May 28 2025',
+'15-07-2025', '3 days from now', ISO timestamps...). `to_iso_date` turns any of
+them into an ISO 'YYYY-MM-DD' string, which BaseScraper stores in the uniform
+"published" and "deadline" fields of every job. ISO strings sort like dates, so
+checking a deadline is then a plain string comparison (`is_deadline_open`).
+
+Parsing is cheap on repeated calls:
+- results are memoized per string (listings repeat the same few dates),
+- ISO dates and relative phrases are recognized by regex, without strptime,
+- for the other formats, the normalizer remembers which one each site uses
+  and tries it first, instead of walking the whole list every time.
+"""
+
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+# Formats tried in order, until a site's favourite is known.
+DATE_FORMATS = [
+    "%A, %B %d %Y",  # e.g., "Wednesday, May 28 2025"
+    "%A, %b %d %Y",  # e.g., "Wednesday, May 28 2025" (short month)
+    "%d %B %Y",      # e.g., "15 July 2025"
+    "%d %b %Y",      # e.g., "15 Jul 2025"
+    "%d-%m-%Y",      # e.g., "15-07-2025"
+    "%d/%m/%Y",      # e.g., "15/07/2025"
+    "%B %d, %Y",     # e.g., "July 15, 2025"
+    "%b %d, %Y",     # e.g., "Jul 15, 2025"
+    "%A, %d %B %Y",  # e.g., "Tuesday, 15 July 2025"
+]
+
+ISO_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:$|[T ])")
+
+RELATIVE_RE = re.compile(
+    r"^(?:in\s+)?(\d+|an?)\s+(minute|hour|day|week|month|year)s?(?:\s+(from now|ago))?$"
+)
+RELATIVE_WORDS = {"today": 0, "now": 0, "tomorrow": 1, "yesterday": -1}
+UNIT_DAYS = {"minute": 0, "hour": 0, "day": 1, "week": 7, "month": 30, "year": 365}  # Approximations
+
+# Jobs stay listed for two weeks past their deadline.
+DEADLINE_GRACE_DAYS = 14
+
+
+def _clean(text):
+    return " ".join(text.split())
+
+
+class DateNormalizer:
+    """Parses free-form dates into `date` objects, memoizing and learning formats per site."""
+
+    def __init__(self, formats=None, memo_size=4096):
+        self.formats = list(formats or DATE_FORMATS)
+        self.memo_size = memo_size
+        self._memo = {}  # Absolute date string -> date or None
+        self._site_formats = {}  # Site -> formats, the last one that worked first
+        self._lock = threading.Lock()
+
+    def _relative(self, lowered, today=None):
+        today = today or date.today()
+        if lowered in RELATIVE_WORDS:
+            return today + timedelta(days=RELATIVE_WORDS[lowered])
+        match = RELATIVE_RE.match(lowered)
+        if not match:
+            return None
+        number = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+        delta = timedelta(days=number * UNIT_DAYS[match.group(2)])
+        return today - delta if match.group(3) == "ago" else today + delta
+
+    def _strptime(self, text, site):
+        formats = self._site_formats.get(site, self.formats)
+        for date_format in formats:
+            try:
+                parsed = datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+            if date_format != formats[0]:
+                # Remember it: this site's next dates are tried against it first.
+                with self._lock:
+                    self._site_formats[site] = [date_format] + [f for f in self.formats if f != date_format]
+            return parsed
+        return None
+
+    def parse(self, text, site=None):
+        """
+        Returns the `date` written in `text`, or None when there is none or it
+        can't be parsed.
+
+        Args:
+            text (str): e.g. '2025-07-15', '2025-07-15T08:00:00Z', '15 Jul 2025',
+                        '3 days from now', '1 week ago', 'tomorrow'.
+            site (str, optional): Which site the text comes from, so the
+                                  format it uses is learned and tried first.
+        """
+        if not text or not isinstance(text, str):
+            return None
+        text = _clean(text)
+        if not text or text in ("N/A", "Unknown"):
+            return None
+
+        if text in self._memo:
+            return self._memo[text]
+
+        match = ISO_DATE_RE.match(text)
+        if match:
+            try:
+                return self._remember(text, date.fromisoformat(match.group(1)))
+            except ValueError:
+                return self._remember(text, None)
+
+        # Relative phrases depend on the current day, so they aren't memoized.
+        relative = self._relative(text.lower())
+        if relative is not None:
+            return relative
+
+        parsed = self._strptime(text, site)
+        if parsed is None:
+            print(f"Warning: Could not parse date format: {text}")
+        return self._remember(text, parsed)
+
+    def _remember(self, text, parsed):
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[text] = parsed
+        return parsed
+
+
+normalizer = DateNormalizer()
+
+
+def to_iso_date(text, site=None):
+    """Returns `text` as an ISO 'YYYY-MM-DD' string, or None if it holds no date."""
+    parsed = normalizer.parse(text, site)
+    return parsed.isoformat() if parsed else None
+
+
+def deadline_cutoff(grace_days=DEADLINE_GRACE_DAYS):
+    """The oldest ISO deadline still considered open."""
+    return (date.today() - timedelta(days=grace_days)).isoformat()
+
+
+def is_deadline_open(deadline, cutoff=None):
+    """
+    True if an ISO deadline (see `to_iso_date`) is in the future or within
+    the grace period. Jobs without a known deadline are kept.
+    """
+    if not deadline:
+        return True
+    return deadline >= (cutoff or deadline_cutoff())
@@ -0,0 +1,91 @@
+# scrapers/details.py
+
+"""
+Extraction of the details of a job (description, requirements and salary)
+from its own page, for the enrichment stage (see enrichment.py).
+
+Job pages differ from site to site much more than listings do, so the
+extraction is heuristic and works on any page:
+
+- the description is the text of the job's container (a scraper's
+  `DETAIL_SELECTOR`, otherwise the page's <main> or <article>), without
+  navigation, scripts and forms,
+- the requirements are the items (or paragraphs) under the first heading
+  that reads like "Requirements", "Qualifications", "Profile"...,
+- the salary is the first "Salary: ..." (or "Remuneration", "Pay") line.
+"""
+
+import re
+
+from .html_parser import parse_html
+
+MAX_DESCRIPTION_CHARS = 5000
+MAX_REQUIREMENTS = 30
+
+REQUIREMENTS_HEADING_RE = re.compile(
+    r"\b(requirements?|qualifications?|required (skills|profile)|profile|competenc(y|ies)|experience)\b", re.I)
+SALARY_RE = re.compile(r"\b(?:salary|remuneration|pay(?: scale)?|compensation)\b\s*[:\-–]\s*(?P<salary>[^\n]{1,100})", re.I)
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6", "strong", "b", "dt")
+NOISE_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "form", "aside", "iframe")
+
+
+def _collapse(text):
+    return " ".join(text.split())
+
+
+def _is_heading(element):
+    """An <h1>-<h6>, or a bold line standing on its own (`<p><strong>Profile</strong></p>`)."""
+    if element.name == "p":
+        bold = element.find(("strong", "b"))
+        return bold is not None and _same_text(bold, element)
+    if element.name not in HEADING_TAGS:
+        return False
+    if element.name.startswith("h"):
+        return True
+    return element.parent is not None and _same_text(element, element.parent)
+
+
+def _same_text(element, other):
+    return _collapse(element.get_text(" ", strip=True)) == _collapse(other.get_text(" ", strip=True))
+
+
+def _requirements(container):
+    for heading in container.find_all(HEADING_TAGS):
+        title = heading.get_text(" ", strip=True)
+        if len(title) > 60 or not _is_heading(heading) or not REQUIREMENTS_HEADING_RE.search(title):
+            continue
+        items = []
+        inside_heading = {id(element) for element in heading.descendants}
+        # The section runs until the next heading of the page.
+        for element in heading.find_all_next():
+            if id(element) in inside_heading:
+                continue
+            if _is_heading(element) or len(items) >= MAX_REQUIREMENTS:
+                break
+            if element.name in ("li", "p") and element.find_parent("li") is None:
+                text = _collapse(element.get_text(" ", strip=True))
+                if text:
+                    items.append(text)
+        if items:
+            return items
+    return []
+
+
+def extract_details(content, selector=None):
+    """
+    Returns {"description": str or None, "requirements": [str], "salary": str or None}
+    for the HTML of a job page (bytes or str).
+    """
+    soup = parse_html(content, only=selector)
+    container = soup if selector else (soup.find("main") or soup.find("article") or soup.body or soup)
+    for element in container.find_all(NOISE_TAGS):
+        element.decompose()
+
+    text = container.get_text("\n", strip=True)
+    salary = SALARY_RE.search(text)
+    description = _collapse(text)[:MAX_DESCRIPTION_CHARS]
+    return {
+        "description": description or None,
+        "requirements": _requirements(container),
+        "salary": salary.group("salary").strip() if salary else None,
+    }
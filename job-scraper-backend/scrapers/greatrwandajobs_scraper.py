@@ -1,75 +1,54 @@
 # scrapers/greatrwandajobs_scraper.py
 
+import asyncio
+import contextvars
 import requests
 import re
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from .base_scraper import BaseScraper
-from .keywords import DEFAULT_KEYWORDS
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .async_http_client import async_http_client
+from .base_scraper import BaseScraper, job_event, page_event
+from .html_parser import parse_html
+from .http_client import http_client
+from .keywords import DEFAULT_MATCHER
+from .parser_pool import parser_pool
+
+BASE_URL = "https://www.greatrwandajobs.com"
+
+# The fields of the job tuples returned by `extract_page`, in order.
+JOB_FIELDS = ("title", "company", "link", "category", "posted_date", "deadline_date", "duty_station")
 
 class GreatRwandaJobsScraper(BaseScraper):
     """A scraper for 'greatrwandajobs.com' job listings."""
 
-    def _is_deadline_valid(self, deadline_date_str):
-        """
-        Check if the job deadline is either future or within 2 weeks from today.
-        Returns True if the deadline is valid, False otherwise.
-        """
-        if deadline_date_str == "N/A" or not deadline_date_str.strip():
-            return True  # Include jobs without deadline information
-        
-        try:
-            # Try to parse different date formats commonly used
-            date_formats = [
-                "%A, %B %d %Y",  # e.g., "Wednesday, May 28 2025"
-                "%A, %b %d %Y",  # e.g., "Wednesday, May 28 2025" (short month)
-                "%d %B %Y",      # e.g., "15 July 2025"
-                "%d %b %Y",      # e.g., "15 Jul 2025"
-                "%d-%m-%Y",      # e.g., "15-07-2025"
-                "%d/%m/%Y",      # e.g., "15/07/2025"
-                "%Y-%m-%d",      # e.g., "2025-07-15"
-                "%B %d, %Y",     # e.g., "July 15, 2025"
-                "%b %d, %Y",     # e.g., "Jul 15, 2025"
-            ]
-            
-            deadline_date = None
-            for date_format in date_formats:
-                try:
-                    deadline_date = datetime.strptime(deadline_date_str.strip(), date_format)
-                    break
-                except ValueError:
-                    continue
-            
-            if deadline_date is None:
-                print(f"Warning: Could not parse date format: {deadline_date_str}")
-                return True  # Include jobs with unparseable dates
-            
-            # Calculate the threshold date (2 weeks ago from today)
-            today = datetime.now()
-            two_weeks_ago = today - timedelta(days=14)
-            
-            # Include jobs whose deadline is either in the future or within the last 2 weeks
-            return deadline_date >= two_weeks_ago
-            
-        except Exception as e:
-            print(f"Error parsing deadline date '{deadline_date_str}': {e}")
-            return True  # Include jobs with date parsing errors
+    PUBLISHED_FIELD = "posted_date"
+
+    BASE_URL = BASE_URL
+    UPSTREAM_URLS = (BASE_URL,)
+    supports_details = True
+
+    # The category dropdown hardly ever changes, so the list read from the
+    # website is kept for a day instead of being re-fetched on every scrape.
+    CATEGORY_CACHE_TTL = 24 * 3600
+
+    def __init__(self):
+        self._categories = None
+        self._categories_fetched_at = 0.0
+        self._categories_lock = threading.Lock()
 
     def _fetch_categories_from_website(self):
         """
         Dynamically fetches all job categories from the website's category dropdown.
         Returns a list of dictionaries with 'value' and 'name' keys.
         """
-        HEADERS = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
         
         try:
             # Fetch the main page to get the category dropdown
-            response = requests.get("https://www.greatrwandajobs.com/jobs/", headers=HEADERS, timeout=20)
+            response = http_client.get("https://www.greatrwandajobs.com/jobs/", timeout=20)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = parse_html(response.content, only="select#category")
             
             # Find the category select element
             category_select = soup.find("select", {"id": "category", "name": "category[]"})
@@ -102,13 +81,29 @@ class GreatRwandaJobsScraper(BaseScraper):
             print(f"Error parsing categories from website: {e}")
             return []
 
+    def _get_categories(self):
+        """
+        Returns the website's categories, from the cache while it is fresh.
+        Only a successful fetch is cached, so a failure is retried next time.
+        """
+        with self._categories_lock:
+            age = time.monotonic() - self._categories_fetched_at
+            if self._categories and age < self.CATEGORY_CACHE_TTL:
+                return self._categories
+
+            categories = self._fetch_categories_from_website()
+            if categories:
+                self._categories = categories
+                self._categories_fetched_at = time.monotonic()
+            return categories
+
     def _get_category_urls(self):
         """
         Constructs URLs for job categories that match the default IT-related keywords
         by dynamically fetching categories from the website.
         """
-        # Fetch categories dynamically from the website
-        all_categories = self._fetch_categories_from_website()
+        # Fetch categories dynamically from the website (cached)
+        all_categories = self._get_categories()
         
         # Fallback to static categories if website fetch fails
         if not all_categories:
@@ -120,7 +115,6 @@ class GreatRwandaJobsScraper(BaseScraper):
                 {"value": "52", "name": "Technician jobs in Rwanda"}
             ]
         
-        keyword_pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
         urls = []
 
         for category in all_categories:
@@ -128,7 +122,7 @@ class GreatRwandaJobsScraper(BaseScraper):
             category_id = category["value"]
 
             # Check if any default keyword is in the category name
-            if re.search(keyword_pattern, category_name, re.IGNORECASE):
+            if DEFAULT_MATCHER.search(category_name):
                 # Format category name for URL:
                 # 1. Make it lowercase
                 # 2. Remove special characters except spaces, hyphens, and slashes
@@ -151,16 +145,23 @@ class GreatRwandaJobsScraper(BaseScraper):
         
         return urls
 
-    def scrape(self, keyword=None):
-        BASE_URL = "https://www.greatrwandajobs.com"
-        HEADERS = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+    def listing_covers(self, keyword=None):
+        # The listing is the IT categories only: any other keyword needs the site's search.
+        return not keyword
 
-        # Define keywords for filtering relevant jobs
-        all_jobs = []
-        company_names = set()
-        
+    def match_job(self, job, matcher, keyword=None):
+        """
+        A custom keyword may match the title or the category, the default IT
+        keywords only the title. In both cases the deadline must still be valid.
+        """
+        matched = matcher.matches(job['title'])
+        if keyword and not matched:
+            matched = matcher.matches(job['category'])
+        if matched and not self.has_open_deadline(job):
+            return []
+        return matched
+
+    def _urls_to_scrape(self, keyword=None):
         if keyword:
             # If a specific keyword is provided, search the main jobs page.
             search_url = f"https://www.greatrwandajobs.com/jobs/?search_keywords={keyword}"
@@ -171,114 +172,155 @@ class GreatRwandaJobsScraper(BaseScraper):
             if not urls_to_scrape:
                 # Fallback to a default URL if no categories are found
                 urls_to_scrape = ["https://www.greatrwandajobs.com/job-categories/newest-jobs/category-computer-it-jobs-in-rwanda-13"]
+        return urls_to_scrape
 
-        for URL in urls_to_scrape:
-            print(f"Scraping URL: {URL}")
-            try:
-                page = requests.get(URL, headers=HEADERS, timeout=20)
-                page.raise_for_status()
-            except requests.RequestException as e:
-                print(f"Error fetching the URL {URL}: {e}")
-                continue # Move to the next URL
-
-            soup = BeautifulSoup(page.content, "html.parser")
-            # Find all job containers - each job is wrapped in its own js-jobs-wrapper div
-            job_containers = soup.find_all("div", id="js-jobs-wrapper")
-            print(f"Found {len(job_containers)} job containers on {URL}")
-            
-            job_elements = []
-            for job_container in job_containers:
-                # Find the job posting within each container
-                toprow = job_container.find("div", class_="js-toprow")
-                if toprow:
-                    job_elements.append(toprow)
-            
-            print(f"Found {len(job_elements)} job elements on {URL}")
-
-            for job_element in job_elements:
-                title_element = job_element.find("a", class_="jobtitle")
-                if not title_element:
-                    print("Skipping job element: no title found")
-                    continue
-                    
-                title = title_element.get_text(strip=True)
-                link = BASE_URL + title_element["href"]
-                
-                # Fix company extraction to handle missing elements
-                company = "N/A"
-                company_div = job_element.find("div", class_="js-image")
-                if company_div:
-                    company_img = company_div.find("img")
-                    if company_img:
-                        company = company_img.get("title", "N/A")
-                
-                details_container = job_element.find("div", class_="js-second-row")
-                category, posted_date, deadline_date, duty_station = "N/A", "N/A", "N/A", "N/A"
-
-                if details_container:
-                    category_element = details_container.find("span", string="Job Category: ")
-                    if category_element and category_element.parent:
-                        category = category_element.find_next_sibling(string=True).strip()
-
-                    posted_element = details_container.find("span", string="Posted: ")
-                    if posted_element and posted_element.parent:
-                        posted_date = posted_element.find_next_sibling(string=True).strip()
-
-                    deadline_element = details_container.find("span", string=re.compile(r"Deadline of this Job"))
-                    if deadline_element and deadline_element.parent:
-                        deadline_text = deadline_element.parent.get_text(strip=True)
-                        if ":" in deadline_text:
-                            deadline_date = deadline_text.split(":", 1)[1].strip()
-                    
-                    duty_station_element = details_container.find("span", string="Duty Station: ")
-                    if duty_station_element and duty_station_element.parent:
-                        duty_station = duty_station_element.find_next_sibling(string=True).strip()
-
-                job_data = {
-                    "title": title,
-                    "company": company,
-                    "link": link,
-                    "category": category,
-                    "posted_date": posted_date,
-                    "deadline_date": deadline_date,
-                    "duty_station": duty_station
-                }
-                
-                # Avoid adding duplicate jobs by checking the link
-                if not any(existing_job['link'] == link for existing_job in all_jobs):
-                    all_jobs.append(job_data)
-                else:
-                    print(f"Skipped duplicate job: {title}")
-                
-                if company != "N/A":
-                    company_names.add(company)
+    def _page_events(self, URL, page_jobs, seen_links):
+        """Yields the events of one scraped page, skipping jobs already seen on another page."""
+        if page_jobs is None:
+            yield page_event(URL, 0, ok=False)
+            return
+        new_jobs = 0
+        for job_data in page_jobs:
+            # Avoid adding duplicate jobs by checking the link
+            if job_data['link'] in seen_links:
+                print(f"Skipped duplicate job: {job_data['title']}")
+                continue
+            seen_links.add(job_data['link'])
+            new_jobs += 1
+            yield job_event(job_data)
+        yield page_event(URL, new_jobs)
 
-        print(f"Total jobs collected: {len(all_jobs)}")
-        # Filter jobs based on relevance to software development and deadline validity
-        if keyword:
-            # If a specific keyword is provided, filter by that keyword and deadline
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            filtered_jobs = [
-                job for job in all_jobs 
-                if (re.search(pattern, job['title'], re.IGNORECASE) or 
-                    re.search(pattern, job['category'], re.IGNORECASE)) and
-                   self._is_deadline_valid(job['deadline_date'])
-            ]
-        else:
-            # When no specific keyword is given, filter using DEFAULT_KEYWORDS and deadline
-            keyword_pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
-            filtered_jobs = []
-            
-            for job in all_jobs:
-                # Check if the job title or category contains relevant keywords and deadline is valid
-                if (re.search(keyword_pattern, job['title'], re.IGNORECASE) and
-                    self._is_deadline_valid(job['deadline_date'])):
-                    filtered_jobs.append(job)
-
-        print(f"Jobs after keyword filtering: {len(filtered_jobs)}")
-        return {
-            "total_jobs": len(all_jobs),
-            "filtered_jobs": len(filtered_jobs),
-            "unique_companies": len(company_names),
-            "jobs": filtered_jobs
-        }
\ No newline at end of file
+    def iter_events(self, keyword=None):
+        urls_to_scrape = self._urls_to_scrape(keyword)
+
+        # Fetch the category pages concurrently, and hand out the jobs of
+        # each page as soon as it is done. The shared HTTP client caps how
+        # many requests run against the host at once.
+        max_workers = min(len(urls_to_scrape), http_client.max_concurrency(self.BASE_URL))
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            # Each page runs in a copy of our context, so its fetch counts towards the current scrape.
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._scrape_page, url): url
+                for url in urls_to_scrape
+            }
+            seen_links = set()
+            for future in as_completed(futures):
+                yield from self._page_events(futures[future], future.result(), seen_links)
+            print(f"Total jobs collected: {len(seen_links)}")
+        finally:
+            # When the consumer stops early, don't fetch the pages still queued.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aiter_events(self, keyword=None):
+        # The category list is cached and rarely fetched, keep it sync.
+        urls_to_scrape = await asyncio.to_thread(self._urls_to_scrape, keyword)
+
+        # All pages are requested at once on the event loop; the async HTTP
+        # client caps how many actually run against the host.
+        tasks = [asyncio.ensure_future(self._ascrape_page(url)) for url in urls_to_scrape]
+        try:
+            seen_links = set()
+            for next_page in asyncio.as_completed(tasks):
+                URL, page_jobs = await next_page
+                for event in self._page_events(URL, page_jobs, seen_links):
+                    yield event
+            print(f"Total jobs collected: {len(seen_links)}")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _scrape_page(self, URL):
+        """
+        Fetches one listing page and extracts its jobs.
+        Returns None when the page could not be fetched.
+        """
+        print(f"Scraping URL: {URL}")
+        try:
+            page = http_client.get(URL, timeout=20)
+            page.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching the URL {URL}: {e}")
+            return None
+        return self._parse_page(page.content, URL)
+
+    async def _ascrape_page(self, URL):
+        """The async counterpart of `_scrape_page`. Returns (URL, jobs or None)."""
+        print(f"Scraping URL: {URL}")
+        try:
+            page = await async_http_client.get(URL, timeout=20)
+            page.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching the URL {URL}: {e}")
+            return URL, None
+        # Parsing is CPU-bound: keep it off the event loop.
+        return URL, await asyncio.to_thread(self._parse_page, page.content, URL)
+
+    def _parse_page(self, content, URL):
+        """Extracts the jobs of one listing page (in a parser process when the pool is enabled)."""
+        return [dict(zip(JOB_FIELDS, row)) for row in parser_pool.run(extract_page, content, URL)]
+
+
+def extract_page(content, URL):
+    """
+    Extracts the jobs of one listing page, as tuples of JOB_FIELDS.
+    A module-level function, so it can run in a parser process (see parser_pool.py).
+    """
+    page_jobs = []
+
+    soup = parse_html(content, only="div#js-jobs-wrapper")
+    # Find all job containers - each job is wrapped in its own js-jobs-wrapper div
+    job_containers = soup.find_all("div", id="js-jobs-wrapper")
+    print(f"Found {len(job_containers)} job containers on {URL}")
+
+    job_elements = []
+    for job_container in job_containers:
+        # Find the job posting within each container
+        toprow = job_container.find("div", class_="js-toprow")
+        if toprow:
+            job_elements.append(toprow)
+
+    print(f"Found {len(job_elements)} job elements on {URL}")
+
+    for job_element in job_elements:
+        title_element = job_element.find("a", class_="jobtitle")
+        if not title_element:
+            print("Skipping job element: no title found")
+            continue
+
+        title = title_element.get_text(strip=True)
+        link = BASE_URL + title_element["href"]
+
+        # Fix company extraction to handle missing elements
+        company = "N/A"
+        company_div = job_element.find("div", class_="js-image")
+        if company_div:
+            company_img = company_div.find("img")
+            if company_img:
+                company = company_img.get("title", "N/A")
+
+        details_container = job_element.find("div", class_="js-second-row")
+        category, posted_date, deadline_date, duty_station = "N/A", "N/A", "N/A", "N/A"
+
+        if details_container:
+            category_element = details_container.find("span", string="Job Category: ")
+            if category_element and category_element.parent:
+                category = category_element.find_next_sibling(string=True).strip()
+
+            posted_element = details_container.find("span", string="Posted: ")
+            if posted_element and posted_element.parent:
+                posted_date = posted_element.find_next_sibling(string=True).strip()
+
+            deadline_element = details_container.find("span", string=re.compile(r"Deadline of this Job"))
+            if deadline_element and deadline_element.parent:
+                deadline_text = deadline_element.parent.get_text(strip=True)
+                if ":" in deadline_text:
+                    deadline_date = deadline_text.split(":", 1)[1].strip()
+
+            duty_station_element = details_container.find("span", string="Duty Station: ")
+            if duty_station_element and duty_station_element.parent:
+                duty_station = duty_station_element.find_next_sibling(string=True).strip()
+
+        page_jobs.append((title, company, link, category, posted_date, deadline_date, duty_station))
+
+    return page_jobs
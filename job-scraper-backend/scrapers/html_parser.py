@@ -0,0 +1,130 @@
+# scrapers/html_parser.py
+
+"""
+HTML parsing backends for the scrapers.
+
+Scrapers call `parse_html(content, only="article.node--type-job")` instead of
+`BeautifulSoup(content, "html.parser")`. The `only` selector restricts parsing
+to the job containers, so the rest of the page (navigation, scripts, footers)
+is never turned into Python objects. The result is always a BeautifulSoup
+object, so the extraction code (`find`, `find_all`, `get_text`...) does not
+change with the backend.
+
+Backends, in order of preference:
+- "lxml": BeautifulSoup with the lxml tree builder and a SoupStrainer.
+- "html.parser": BeautifulSoup with the pure-Python parser and a SoupStrainer.
+  Always available, and the fallback when lxml is not installed.
+- "selectolax": the Lexbor C parser of selectolax finds the containers, and
+  only their HTML is handed to BeautifulSoup (with lxml when installed).
+  Only used when asked for: the page is parsed twice, and on the benchmark
+  fixtures it is no faster than lxml (see the README).
+
+The default is lxml when installed, html.parser otherwise; the
+HTML_PARSER_BACKEND environment variable forces a backend.
+"""
+
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+
+from .instrumentation import timed
+
+try:
+    # selectolax >= 0.3.13 ships the Lexbor engine; 1.0 removed the old one.
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+BACKENDS = ("lxml", "html.parser", "selectolax")
+
+# Supports the simple selectors the scrapers need: 'tag', 'tag.class', 'tag#id'.
+SELECTOR_RE = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)(?:\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+))?$")
+
+
+def available_backends():
+    backends = []
+    if HAS_LXML:
+        backends.append("lxml")
+    backends.append("html.parser")
+    if SelectolaxParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+def default_backend():
+    requested = os.environ.get("HTML_PARSER_BACKEND")
+    if requested:
+        if requested not in available_backends():
+            raise ValueError(f"HTML parser backend '{requested}' is not available")
+        return requested
+    return available_backends()[0]
+
+
+def _strainer_for(selector):
+    match = SELECTOR_RE.match(selector)
+    if not match:
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    attrs = {}
+    if match.group("cls"):
+        # Match one class among several. While parsing, some versions of
+        # BeautifulSoup compare against the raw 'a b c' attribute string.
+        attrs["class"] = re.compile(r"(?:^|\s)" + re.escape(match.group("cls")) + r"(?:\s|$)")
+    if match.group("id"):
+        attrs["id"] = match.group("id")
+    return SoupStrainer(match.group("tag"), attrs)
+
+
+def _to_text(markup):
+    if isinstance(markup, bytes):
+        # Same encoding detection BeautifulSoup does (meta charset, BOM...).
+        return UnicodeDammit(markup, is_html=True).unicode_markup
+    return markup
+
+
+def _parse_with_selectolax(markup, only):
+    tree = SelectolaxParser(_to_text(markup))
+    fragments = []
+    taken = set()
+    for node in tree.css(only):
+        # Skip containers nested in one already taken; their HTML is included.
+        parent, nested = node.parent, False
+        while parent is not None:
+            if parent.mem_id in taken:
+                nested = True
+                break
+            parent = parent.parent
+        if not nested:
+            taken.add(node.mem_id)
+            fragments.append(node.html)
+    return BeautifulSoup("".join(fragments), "lxml" if HAS_LXML else "html.parser")
+
+
+def parse_html(markup, only=None, backend=None):
+    """
+    Parses an HTML document and returns a BeautifulSoup object.
+
+    Args:
+        markup (bytes or str): The document, typically `response.content`.
+        only (str, optional): A selector ('tag', 'tag.class' or 'tag#id').
+                              When given, only the matching elements and
+                              their descendants are parsed.
+        backend (str, optional): Forces a backend, see BACKENDS.
+    """
+    backend = backend or default_backend()
+    with timed("parse"):
+        if only is None:
+            # Nothing to restrict, so selectolax has no advantage.
+            builder = "lxml" if backend != "html.parser" and HAS_LXML else "html.parser"
+            return BeautifulSoup(markup, builder)
+
+        strainer = _strainer_for(only)  # Also validates the selector for every backend
+        if backend == "selectolax":
+            return _parse_with_selectolax(markup, only)
+        return BeautifulSoup(markup, backend, parse_only=strainer)
@@ -0,0 +1,293 @@
+# scrapers/http_cache.py
+
+"""
+On-disk HTTP cache for the shared HTTP clients, with conditional requests.
+
+Most listing pages change a few times a day, but every scrape downloads them
+whole. The `HttpCache` keeps the last response of each URL in a SQLite file
+and, following RFC 9111:
+
+- a response still fresh (`Cache-Control: max-age`, or `Expires`) is served
+  from the cache without any request,
+- a stale one is revalidated: the request carries `If-None-Match` (ETag) and
+  `If-Modified-Since` (Last-Modified), and a `304 Not Modified` answer is
+  turned back into the stored response, with its headers updated,
+- responses marked `no-store` are never stored, and `no-cache` ones (or
+  requests sent with `no-cache` / `max-age=0`) are always revalidated,
+- a response that varies on request headers (`Vary`) is only reused for a
+  request with the same values for them; `Vary: *` is never reused.
+
+Responses without validators nor an explicit lifetime could not be reused,
+so they are not stored. No heuristic freshness is applied: without a
+lifetime from the site, a page is revalidated on every fetch, so new jobs
+show up as soon as the site has them.
+
+The cache is capped at `max_bytes`: the least recently used responses are
+evicted first.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import mktime_tz, parsedate_tz
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "http_cache.db")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    vary TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_used_at ON responses (used_at);
+"""
+
+# Statuses worth storing; others (redirects, errors) are fetched every time.
+CACHEABLE_STATUSES = (200, 203)
+
+# Headers of a 304 that must not replace the stored ones.
+NOT_UPDATED_HEADERS = ("content-length", "content-encoding", "transfer-encoding", "content-type")
+
+
+def parse_cache_control(value):
+    """Returns {directive: value or True} for a Cache-Control header."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or True
+    return directives
+
+
+def _http_date(value):
+    parsed = parsedate_tz(value) if value else None
+    return mktime_tz(parsed) if parsed else None
+
+
+def freshness_lifetime(headers, now):
+    """
+    Seconds the response may still be used without revalidation: its max-age
+    (or Expires), minus the time it already spent in caches on the way (Age).
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return 0
+    max_age = directives.get("max-age")
+    if isinstance(max_age, str) and max_age.isdigit():
+        lifetime = int(max_age)
+    else:
+        expires = _http_date(headers.get("Expires"))
+        if expires is None:
+            return 0
+        lifetime = expires - (_http_date(headers.get("Date")) or now)
+    age = headers.get("Age", "")
+    return max(0, lifetime - (int(age) if age.isdigit() else 0))
+
+
+def _vary_key(vary, request_headers):
+    """The values of the request headers a response varies on, as JSON, or None when it doesn't."""
+    names = sorted({name.strip().lower() for name in (vary or "").split(",") if name.strip()})
+    # Every request asks for the same encodings, and bodies are stored decoded.
+    names = [name for name in names if name != "accept-encoding"]
+    if not names:
+        return None
+    request_headers = CaseInsensitiveDict(request_headers or {})
+    return json.dumps({name: request_headers.get(name) for name in names})
+
+
+def build_response(entry, url):
+    """A `requests.Response` (already read) for a stored entry."""
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"]
+    response.url = url
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.reason = "OK"
+    return response
+
+
+class HttpCache:
+    """The last response of every URL fetched with validators, in a SQLite file."""
+
+    def __init__(self, path=None, max_bytes=None, enabled=True):
+        self.path = path or os.environ.get("HTTP_CACHE_PATH", DEFAULT_DB_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("HTTP_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.enabled = enabled
+        self._initialized = False
+        self._lock = threading.Lock()
+        self.counts = {"fresh": 0, "revalidated": 0, "changed": 0, "miss": 0, "stored": 0, "evicted": 0}
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=30)
+                    try:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    finally:
+                        conn.close()
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def lookup(self, url, request_headers):
+        """
+        The stored entry usable for a request of `url` with `request_headers`,
+        or None. `entry["fresh"]` tells whether it can be used without
+        revalidation.
+        """
+        if not self.enabled:
+            return None
+        request_headers = CaseInsensitiveDict(request_headers or {})
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            self._count("miss")
+            return None
+        headers = json.loads(row["headers"])
+        if _vary_key(CaseInsensitiveDict(headers).get("Vary"), request_headers) != row["vary"]:
+            self._count("miss")
+            return None
+        request_directives = parse_cache_control(request_headers.get("Cache-Control"))
+        revalidate = "no-cache" in request_directives or request_directives.get("max-age") == "0"
+        return {
+            "url": url,
+            "status": row["status"],
+            "headers": headers,
+            "body": row["body"],
+            "fresh": not revalidate and time.time() < row["expires_at"],
+        }
+
+    def conditional_headers(self, entry):
+        """The validators to send to revalidate `entry`."""
+        headers = CaseInsensitiveDict(entry["headers"])
+        conditional = {}
+        if headers.get("ETag"):
+            conditional["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = headers["Last-Modified"]
+        return conditional
+
+    def serve_fresh(self, entry, url):
+        self._count("fresh")
+        self._touch(entry["url"])
+        return build_response(entry, url)
+
+    def update(self, url, request_headers, entry, response):
+        """
+        Handles the response to a request sent with `entry`'s validators (or
+        without, when `entry` is None): returns the response to hand back to
+        the caller, and stores or refreshes the cache.
+        """
+        if not self.enabled:
+            return response
+        if entry is not None and response.status_code == 304:
+            self._count("revalidated")
+            headers = CaseInsensitiveDict(entry["headers"])
+            for name, value in response.headers.items():
+                if name.lower() not in NOT_UPDATED_HEADERS:
+                    headers[name] = value
+            entry = dict(entry, headers=dict(headers))
+            self._store(url, request_headers, entry["status"], entry["headers"], entry["body"])
+            return build_response(entry, response.url or url)
+        if entry is not None:
+            self._count("changed")
+        self.store(url, request_headers, response)
+        return response
+
+    def store(self, url, request_headers, response):
+        if response.status_code not in CACHEABLE_STATUSES:
+            return
+        headers = dict(response.headers)
+        # The body is stored decoded, so these no longer describe it.
+        for name in ("Content-Encoding", "Content-Length", "Transfer-Encoding"):
+            headers.pop(name, None)
+        self._store(url, request_headers, response.status_code, headers, response.content)
+
+    def _store(self, url, request_headers, status, headers, body):
+        headers_ci = CaseInsensitiveDict(headers)
+        directives = parse_cache_control(headers_ci.get("Cache-Control"))
+        vary = headers_ci.get("Vary", "")
+        now = time.time()
+        lifetime = freshness_lifetime(headers_ci, now)
+        reusable = headers_ci.get("ETag") or headers_ci.get("Last-Modified") or lifetime > 0
+        if "no-store" in directives or vary.strip() == "*" or not reusable or len(body) > self.max_bytes // 4:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, vary, body, size, stored_at, expires_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(headers), _vary_key(vary, request_headers), body, len(body),
+                 now, now + lifetime, now),
+            )
+        self._count("stored")
+        self._evict()
+
+    def _touch(self, url):
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+
+    def _evict(self):
+        """Deletes the least recently used responses while the cache is over `max_bytes`."""
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = 0
+            for row in conn.execute("SELECT url, size FROM responses ORDER BY used_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE url = ?", (row["url"],))
+                total -= row["size"]
+                evicted += 1
+        with self._lock:
+            self.counts["evicted"] += evicted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def counters(self):
+        """How many lookups were fresh, revalidated (304), changed or missed, and how many responses were stored or evicted."""
+        with self._lock:
+            return dict(self.counts)
+
+    def stats(self):
+        """The counters, plus the number of pages in the cache and their size."""
+        stats = self.counters()
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS pages, COALESCE(SUM(size), 0) AS bytes FROM responses").fetchone()
+        stats.update(pages=row["pages"], bytes=row["bytes"])
+        return stats
@@ -0,0 +1,274 @@
+# scrapers/http_client.py
+
+"""
+Shared HTTP fetch layer used by all scrapers.
+
+Instead of calling `requests.get` (a new TCP + TLS handshake per page), every
+scraper goes through the module-level `http_client`. It keeps one pooled
+`requests.Session` per host, so consecutive pages of the same site reuse
+keep-alive connections. It also:
+
+- asks for compressed responses (gzip, and brotli when the `brotli` package is
+  installed, since urllib3 can only decode it then),
+- retries failed requests with exponential backoff, with a policy per host,
+- caps how many requests run against one host at the same time,
+- spaces out the requests to each host (rate, minimum interval with jitter,
+  Retry-After), across threads and processes (see politeness.py),
+- stops sending requests to a host that keeps blocking or failing them, with
+  a circuit breaker per host (see circuit_breaker.py),
+- keeps the pages fetched with validators in an on-disk HTTP cache, and
+  revalidates them with conditional requests (see http_cache.py),
+- records the size and duration of each fetch.
+
+Setting HTTP_UPSTREAM_OVERRIDE (e.g. to the benchmark stub server, see
+benchmarks/stub_server.py) sends every request to that server instead, with
+the original host as the first path segment:
+https://www.jobinrwanda.com/jobs/all -> {override}/www.jobinrwanda.com/jobs/all
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from .circuit_breaker import CircuitBreaker
+from .http_cache import HttpCache
+from .instrumentation import record_fetch
+from .politeness import PolitenessScheduler
+
+try:
+    import brotli  # noqa: F401  (only needed so urllib3 can decode 'br')
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+
+# Default retry policy, overridable per host in HOST_POLICIES.
+DEFAULT_POLICY = {
+    "retries": 2,
+    "backoff_factor": 0.5,  # Sleeps 0.5s, 1s, 2s... between retries
+    "status_forcelist": (429, 500, 502, 503, 504),
+    "pool_maxsize": 10,
+    "max_concurrency": 4,  # Requests in flight per host, across all threads
+    "breaker_failures": 5,  # Failed requests in a row before the host's circuit opens
+    "breaker_cooldown": 60,  # Seconds before a probe request is let through
+    "breaker_max_cooldown": 1800,
+    "rate": 4,  # Requests per second to the host, on average, across all workers
+    "burst": 8,  # Requests that may go at once after a quiet period
+    "min_interval": 0,  # Seconds between two requests, plus a random jitter
+    "jitter": 0,
+}
+
+HOST_POLICIES = {
+    # UNJobs runs its own attempts with long politeness delays; retrying
+    # underneath them would only hit the anti-bot protection harder.
+    # Once it answers 403 it keeps doing so for a while: stop after one
+    # scrape's worth of attempts and only probe it again much later.
+    # Requests are spaced like a person browsing: 3 to 7 seconds apart.
+    "unjobs.org": {"retries": 0, "breaker_failures": 3, "breaker_cooldown": 900, "breaker_max_cooldown": 6 * 3600,
+                   "rate": 0.2, "burst": 2, "min_interval": 3, "jitter": 4},
+}
+
+
+class HttpClient:
+    """Hands out pooled sessions per host and records stats for every fetch."""
+
+    def __init__(self, default_policy=None, host_policies=None, history_size=500, upstream_override=None):
+        self.default_policy = dict(DEFAULT_POLICY, **(default_policy or {}))
+        self.host_policies = dict(HOST_POLICIES, **(host_policies or {}))
+        self.upstream_override = upstream_override
+        self._sessions = {}
+        self._semaphores = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._stats = {}  # host -> {"requests", "errors", "bytes", "wire_bytes", "seconds"}
+        self.history = deque(maxlen=history_size)
+        self.politeness = PolitenessScheduler(self.policy_for)
+        self.cache = HttpCache(enabled=os.environ.get("HTTP_CACHE", "1") != "0")
+
+    def policy_for(self, host):
+        return dict(self.default_policy, **self.host_policies.get(host, {}))
+
+    def _build_session(self, host):
+        policy = self.policy_for(host)
+        retry = Retry(
+            total=policy["retries"],
+            backoff_factor=policy["backoff_factor"],
+            status_forcelist=policy["status_forcelist"],
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the last response back; callers call raise_for_status()
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=policy["pool_maxsize"],
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, url):
+        """Returns the pooled session for the host of `url`, creating it on first use."""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._build_session(host)
+            return session
+
+    def max_concurrency(self, url):
+        """How many requests may run against the host of `url` at once."""
+        return self.policy_for(urlsplit(url).hostname or "")["max_concurrency"]
+
+    def _semaphore_for(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                limit = self.policy_for(host)["max_concurrency"]
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return semaphore
+
+    def breaker_for(self, host):
+        """The circuit breaker of `host`, shared by the sync and async clients."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                policy = self.policy_for(host)
+                breaker = self._breakers[host] = CircuitBreaker(
+                    host,
+                    failure_threshold=policy["breaker_failures"],
+                    cooldown=policy["breaker_cooldown"],
+                    max_cooldown=policy["breaker_max_cooldown"],
+                )
+            return breaker
+
+    def retry_after(self, url):
+        """Seconds until requests to the host of `url` may be sent again; 0 when they may go now."""
+        return self.breaker_for(urlsplit(url).hostname or "").retry_after()
+
+    def hold(self, url, seconds):
+        """Sends no request to the host of `url` for the next `seconds`, e.g. to back off after being blocked."""
+        self.politeness.hold(urlsplit(url).hostname or "", seconds)
+
+    def resolve(self, url):
+        """The URL actually requested for `url`, once `upstream_override` is applied."""
+        if not self.upstream_override:
+            return url
+        parts = urlsplit(url)
+        target = f"{self.upstream_override.rstrip('/')}/{parts.netloc}{parts.path or '/'}"
+        return f"{target}?{parts.query}" if parts.query else target
+
+    def cache_lookup(self, url, params=None, headers=None):
+        """
+        Returns (cache key, request headers, cached entry or None) for a GET
+        of `url`. The key is the full URL, query parameters included.
+        """
+        if not self.cache.enabled:
+            return url, None, None
+        key = requests.Request("GET", url, params=params).prepare().url if params else url
+        request_headers = CaseInsensitiveDict(DEFAULT_HEADERS)
+        request_headers.update(headers or {})
+        return key, request_headers, self.cache.lookup(key, request_headers)
+
+    def get(self, url, **kwargs):
+        """
+        Same signature as `requests.get`, but goes through the pooled session
+        of the host, once the host's politeness schedule allows it. Pages
+        still fresh in the HTTP cache are returned without a request, stale
+        ones are revalidated. Exceptions are those of `requests`;
+        CircuitOpenError (a ConnectionError) when the host's circuit breaker
+        is open.
+        """
+        key, request_headers, entry = self.cache_lookup(url, kwargs.get("params"), kwargs.get("headers"))
+        if entry is not None:
+            if entry["fresh"]:
+                return self.cache.serve_fresh(entry, url)
+            kwargs["headers"] = dict(kwargs.get("headers") or {}, **self.cache.conditional_headers(entry))
+
+        host = urlsplit(url).hostname or ""
+        session = self.session_for(url)
+        breaker = self.breaker_for(host)
+        with self._semaphore_for(host):
+            breaker.check()  # Fail fast, rather than after the politeness wait
+            delay = self.politeness.reserve(host)
+            if delay > 0:
+                time.sleep(delay)
+            # Only now, right before sending: a probe claimed here always
+            # reaches `_record` below.
+            breaker.before_request()
+            started = time.perf_counter()
+            response = None
+            try:
+                response = session.get(self.resolve(url), **kwargs)
+            finally:
+                self._record(host, url, response, time.perf_counter() - started)
+        if not self.cache.enabled:
+            return response
+        return self.cache.update(key, request_headers, entry, response)
+
+    def _record(self, host, url, response, elapsed):
+        size = len(response.content) if response is not None else 0
+        # urllib3 counts the bytes read off the socket, before decompression.
+        wire_bytes = size
+        if response is not None and hasattr(response.raw, "tell"):
+            try:
+                wire_bytes = response.raw.tell() or size
+            except Exception:
+                pass
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                host, {"requests": 0, "errors": 0, "bytes": 0, "wire_bytes": 0, "seconds": 0.0}
+            )
+            stats["requests"] += 1
+            stats["bytes"] += size
+            stats["wire_bytes"] += wire_bytes
+            stats["seconds"] += elapsed
+            if response is None or response.status_code >= 400:
+                stats["errors"] += 1
+            self.history.append({
+                "url": url,
+                "status": response.status_code if response is not None else None,
+                "bytes": size,
+                "wire_bytes": wire_bytes,
+                "elapsed_ms": round(elapsed * 1000, 1),
+            })
+        status = response.status_code if response is not None else None
+        self.breaker_for(host).record(status)
+        self.politeness.observe(host, response)
+        record_fetch(host, status, wire_bytes, elapsed)
+
+    def stats(self):
+        """Returns a copy of the per-host fetch counters."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def breakers(self):
+        """Returns the state of every host's circuit breaker."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# The client shared by every scraper in the process.
+http_client = HttpClient(upstream_override=os.environ.get("HTTP_UPSTREAM_OVERRIDE"))
@@ -0,0 +1,79 @@
+# scrapers/instrumentation.py
+
+"""
+Timing hooks for scrapes.
+
+While a scrape runs, a `ScrapeTimings` is the "current scrape" of the code
+that runs it (a context variable, so it follows the scrape into
+`asyncio.to_thread`, asyncio tasks, and executor threads started with
+`contextvars.copy_context().run`). The shared HTTP clients and `parse_html`
+add their time to it, which splits a scrape into fetch, parse and extract
+time without the scrapers measuring anything themselves.
+
+Every fetch is also passed to the callables in `fetch_observers`, with the
+name of the site being scraped (empty outside a scrape), e.g. to export
+latency and status code metrics (see metrics.py).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("current_scrape", default=None)
+
+# Callables taking (site, host, status, size, seconds). `status` is None when
+# the request failed without a response.
+fetch_observers = []
+
+
+class ScrapeTimings:
+    """Seconds spent fetching and parsing during one scrape of a site."""
+
+    def __init__(self, site):
+        self.site = site
+        self.fetch = 0.0
+        self.parse = 0.0
+        self._lock = threading.Lock()  # Pages may be fetched from several threads
+
+    def add(self, phase, seconds):
+        with self._lock:
+            setattr(self, phase, getattr(self, phase) + seconds)
+
+
+def current_scrape():
+    return _current.get()
+
+
+@contextmanager
+def active_scrape(timings):
+    """Makes `timings` the current scrape for the code run inside the block."""
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to `phase` of the current scrape, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def record_fetch(host, status, size, seconds):
+    """Called by the HTTP clients once per request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add("fetch", seconds)
+    site = timings.site if timings is not None else ""
+    for observer in fetch_observers:
+        observer(site, host, status, size, seconds)
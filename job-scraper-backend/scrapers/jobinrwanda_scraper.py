@@ -2,82 +2,66 @@
 
 import requests
 import re # Import the regular expressions module
-from bs4 import BeautifulSoup
-from .base_scraper import BaseScraper
-from .keywords import DEFAULT_KEYWORDS
+from .base_scraper import BaseScraper, job_event, page_event
+from .html_parser import parse_html
+from .http_client import http_client
+from .parser_pool import parser_pool
 
-class JobInRwandaScraper(BaseScraper):
-    """A scraper for 'jobinrwanda.com' with improved filtering and date extraction."""
+BASE_URL = "https://www.jobinrwanda.com"
 
-    def scrape(self, keyword=None):
-        URL = "https://www.jobinrwanda.com/jobs/all"
-        BASE_URL = "https://www.jobinrwanda.com"
+# The fields of the job tuples returned by `extract_page`, in order.
+JOB_FIELDS = ("title", "company", "link", "published_date", "deadline_date")
+
+
+def extract_page(content, URL):
+    """Extracts the jobs of the listing page, as tuples of JOB_FIELDS (see parser_pool.py)."""
+    soup = parse_html(content, only="article.node--type-job")
+    job_elements = soup.find_all("article", class_="node--type-job")
+
+    rows = []
+    for job_element in job_elements:
+        title_element = job_element.find("h5", class_="card-title")
+        link_element = title_element.find_parent("a") if title_element else None
+        company_element = job_element.select_one("p.card-text > a")
         
-        HEADERS = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        # --- NEW: Extracting the full text block to get dates ---
+        card_text_element = job_element.find("p", class_="card-text")
+        full_card_text = card_text_element.get_text(separator=' ', strip=True) if card_text_element else ""
+
+        # --- NEW: Using regex to find the dates ---
+        published_match = re.search(r"Published on ([\d-]+)", full_card_text)
+        deadline_match = re.search(r"Deadline ([\d-]+)", full_card_text)
         
-        try:
-            page = requests.get(URL, headers=HEADERS, timeout=15)
-            page.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Error fetching the URL: {e}")
-            return {"total_jobs": 0, "unique_companies": 0, "jobs": []}
+        published_date = published_match.group(1) if published_match else "N/A"
+        deadline_date = deadline_match.group(1) if deadline_match else "N/A"
 
-        soup = BeautifulSoup(page.content, "html.parser")
-        job_elements = soup.find_all("article", class_="node--type-job")
+        if title_element and link_element:
+            title = title_element.get_text(strip=True)
+            link = BASE_URL + link_element["href"]
+            company = company_element.get_text(strip=True) if company_element else "N/A"
+            rows.append((title, company, link, published_date, deadline_date))
+    return rows
 
-        all_jobs = []
-        company_names = set()
 
-        for job_element in job_elements:
-            title_element = job_element.find("h5", class_="card-title")
-            link_element = title_element.find_parent("a") if title_element else None
-            company_element = job_element.select_one("p.card-text > a")
-            
-            # --- NEW: Extracting the full text block to get dates ---
-            card_text_element = job_element.find("p", class_="card-text")
-            full_card_text = card_text_element.get_text(separator=' ', strip=True) if card_text_element else ""
+class JobInRwandaScraper(BaseScraper):
+    """A scraper for 'jobinrwanda.com' with improved filtering and date extraction."""
 
-            # --- NEW: Using regex to find the dates ---
-            published_match = re.search(r"Published on ([\d-]+)", full_card_text)
-            deadline_match = re.search(r"Deadline ([\d-]+)", full_card_text)
-            
-            published_date = published_match.group(1) if published_match else "N/A"
-            deadline_date = deadline_match.group(1) if deadline_match else "N/A"
+    UPSTREAM_URLS = ("https://www.jobinrwanda.com/jobs/all",)
+    supports_details = True
 
-            if title_element and link_element:
-                title = title_element.get_text(strip=True)
-                link = BASE_URL + link_element["href"]
-                company = company_element.get_text(strip=True) if company_element else "N/A"
-                
-                all_jobs.append({
-                    "title": title,
-                    "company": company,
-                    "link": link,
-                    "published_date": published_date,
-                    "deadline_date": deadline_date,
-                })
-                if company != "N/A":
-                    company_names.add(company)
+    def iter_events(self, keyword=None):
+        URL = "https://www.jobinrwanda.com/jobs/all"
+        try:
+            page = http_client.get(URL, timeout=15)
+            page.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching the URL: {e}")
+            yield page_event(URL, 0, ok=False)
+            return
 
-        # --- FIX: Filtering Logic ---
-        # We now use regular expressions for whole-word matching.
-        if keyword:
-            # For a custom search, just look for the keyword as a whole word
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-        else:
-            # For the default IT search, build a pattern of all keywords
-            pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
-        
-        # Filter the jobs using the regex pattern (case-insensitive)
-        filtered_jobs = [
-            job for job in all_jobs 
-            if re.search(pattern, job['title'], re.IGNORECASE)
-        ]
+        # Not parsed again when the page is the same as last time
+        rows = parser_pool.run(extract_page, page.content, URL)
+        for row in rows:
+            yield job_event(dict(zip(JOB_FIELDS, row)))
 
-        return {
-            "total_jobs": len(all_jobs),
-            "unique_companies": len(company_names),
-            "jobs": filtered_jobs
-        }
\ No newline at end of file
+        yield page_event(URL, len(rows))
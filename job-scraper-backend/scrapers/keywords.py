@@ -1,13 +1,149 @@
 # scrapers/keywords.py
 
 """
-Universal keyword definitions for job filtering across all scrapers.
-This module contains the default keywords used to filter IT and technology-related jobs.
+Universal keyword definitions and matching for job filtering across all scrapers.
+
+This module contains the default keywords used to filter IT and technology-related
+jobs, and the `KeywordMatcher` all scrapers use to match them against titles.
+
+A matcher is built once per keyword set and cached, instead of every scraper
+rebuilding and re-running an uncompiled regex for every job. The terms are
+compiled into a single trie-shaped regex ('data(?:base)?' rather than
+'data|database'), so the regex engine never retries shared prefixes. Texts are
+lowercased before matching instead of using re.IGNORECASE, which roughly
+halves the cost of a scan; a batch of titles is lowercased in one call.
 """
 
+import re
+from functools import lru_cache
+
 DEFAULT_KEYWORDS = [
     'software', 'developer', 'development', 'engineer', 'engineering',
     'system', 'data', 'computer', 'web', 'programmer', 'backend', 'frontend',
     'cybersecurity', 'network', 'cloud', 'technology', 'it', 'ict',
-    'programming', 'database', 'analyst', 'information', 'technology'
+    'programming', 'database', 'analyst', 'information'
 ]
+
+WORD_RE = re.compile(r"\w+")
+
+# Separators between the terms of a multi-keyword query.
+QUERY_SEPARATOR_RE = re.compile(r"[,|;]")
+
+
+def parse_query(query):
+    """
+    Splits a user query into normalized terms.
+
+    Terms are separated by commas (or '|' / ';'), and any one of them may
+    match: 'python, django' finds jobs mentioning either. Each term is
+    matched as a whole phrase, so 'data analyst' only finds those two words
+    next to each other. Surrounding quotes are allowed and ignored.
+    """
+    terms = []
+    for part in QUERY_SEPARATOR_RE.split(query or ""):
+        term = " ".join(part.strip().strip('"\'').lower().split())
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _trie_pattern(terms):
+    """
+    Builds a regex matching any of the terms, with shared prefixes factored
+    out. Spaces inside a phrase match any run of whitespace.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a term
+
+    def build(node):
+        is_end = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            # Greedy, so the longest term wins ('database' over 'data').
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Matches a fixed set of terms (words or phrases) against pieces of text."""
+
+    def __init__(self, terms):
+        self.terms = tuple(dict.fromkeys(" ".join(t.lower().split()) for t in terms if t.strip()))
+        if not self.terms:
+            self.pattern = re.compile(r"(?!x)x")  # Matches nothing
+        elif all(WORD_RE.fullmatch(term.replace(" ", "")) for term in self.terms):
+            self.pattern = re.compile(r"\b(" + _trie_pattern(self.terms) + r")\b")
+        else:
+            # '\b' does not work next to symbols ('c++'); lookarounds do.
+            self.pattern = re.compile(r"(?<!\w)(" + _trie_pattern(self.terms) + r")(?!\w)")
+
+    def _found_terms(self, lowered_text):
+        found = self.pattern.findall(lowered_text)
+        if not found:
+            return []
+        return list(dict.fromkeys(" ".join(term.split()) for term in found))
+
+    def search(self, text):
+        """True if any term occurs in `text`."""
+        return bool(text) and self.pattern.search(text.lower()) is not None
+
+    def matches(self, text):
+        """
+        Returns the distinct terms found in `text`, in order of appearance.
+        When terms overlap, the longest one is reported ('data analyst'
+        rather than 'data').
+        """
+        if not text:
+            return []
+        return self._found_terms(text.lower())
+
+    def filter(self, texts):
+        """
+        Returns (index, matched terms) for every text with at least one match.
+        The whole batch is lowercased at once, and the terms are only
+        collected for the texts that match.
+        """
+        lowered = "\x00".join((text or "").replace("\x00", "") for text in texts).lower().split("\x00")
+        search = self.pattern.search
+        return [
+            (index, self._found_terms(text))
+            for index, text in enumerate(lowered)
+            if search(text)
+        ]
+
+    def term_groups(self):
+        """
+        Returns, per term, the lowercase words a text must contain for the term
+        to possibly match. Used to narrow down candidates with a word index.
+        """
+        return [sorted(set(WORD_RE.findall(term))) for term in self.terms]
+
+
+DEFAULT_MATCHER = KeywordMatcher(DEFAULT_KEYWORDS)
+
+
+@lru_cache(maxsize=256)
+def _matcher_for_query(normalized_query):
+    return KeywordMatcher(parse_query(normalized_query))
+
+
+def get_matcher(keyword=None):
+    """
+    Returns the cached matcher for a user keyword query, or the default IT
+    keywords matcher when no keyword is given.
+    """
+    if not keyword or not keyword.strip():
+        return DEFAULT_MATCHER
+    return _matcher_for_query(" ".join(keyword.lower().split()))
@@ -1,203 +1,312 @@
-from .base_scraper import BaseScraper
+import contextvars
 import requests
-from .keywords import DEFAULT_KEYWORDS
-import re
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .base_scraper import BaseScraper, job_event, page_event
+from .http_client import http_client
+from .instrumentation import timed
+from datetime import datetime, timezone
 
 class OpportunityScraper(BaseScraper):
-    """A scraper for 'opportunity.ini.rw' using their internal API."""
+    """
+    A scraper for 'opportunity.ini.rw' using their internal API.
 
-    def _is_deadline_valid(self, deadline_date_str):
+    The API is paged with limit/offset. Once the first page tells how many
+    opportunities there are, the remaining pages are fetched concurrently.
+    For the pre-scrape scheduler, `fetch_new_jobs` only pulls what was
+    created after the newest opportunity already stored.
+    """
+
+    supports_incremental = True
+
+    # The specific API endpoint found
+    API_URL = "https://opportunityapi.ini.rw/api/opportunities"
+    UPSTREAM_URLS = (API_URL,)
+    PAGE_SIZE = 200
+    MAX_PAGES = 25  # Safety cap: 5000 opportunities
+    # Not confirmed against the live API (only our stub server honours it):
+    # `fetch_new_jobs` does not rely on it to stop paging.
+    NEWEST_FIRST_SORT = "-created_at"
+
+    def listing_covers(self, keyword=None):
         """
-        Check if the job deadline is either future or within 2 weeks from today.
-        Returns True if the deadline is valid, False otherwise.
+        The listing answers every keyword, unless the last one was cut short
+        (`listing_truncated`: MAX_PAGES reached, or pages that failed): the
+        opportunities past it can then only be found by the API's search.
         """
-        if deadline_date_str == "N/A" or not deadline_date_str.strip():
-            return True  # Include jobs without deadline information
-        
-        try:
-            # Try to parse different date formats commonly used
-            date_formats = [
-                "%A, %B %d %Y",  # e.g., "Wednesday, May 28 2025"
-                "%A, %b %d %Y",  # e.g., "Wednesday, May 28 2025" (short month)
-                "%d %B %Y",      # e.g., "15 July 2025"
-                "%d %b %Y",      # e.g., "15 Jul 2025"
-                "%d-%m-%Y",      # e.g., "15-07-2025"
-                "%d/%m/%Y",      # e.g., "15/07/2025"
-                "%Y-%m-%d",      # e.g., "2025-07-15"
-                "%B %d, %Y",     # e.g., "July 15, 2025"
-                "%b %d, %Y",     # e.g., "Jul 15, 2025"
-            ]
-            
-            deadline_date = None
-            for date_format in date_formats:
-                try:
-                    deadline_date = datetime.strptime(deadline_date_str.strip(), date_format)
-                    break
-                except ValueError:
-                    continue
-            
-            if deadline_date is None:
-                # Try simple ISO format containing time as well if needed, though scraper usually gets date string
-                try:
-                    deadline_date = datetime.fromisoformat(deadline_date_str.replace("Z", "+00:00"))
-                except ValueError:
-                    pass
-
-            if deadline_date is None:
-                print(f"Warning: Could not parse date format: {deadline_date_str}")
-                return True  # Include jobs with unparseable dates
-            
-            # Remove timezone info for comparison if present (naive vs aware)
-            if deadline_date.tzinfo is not None:
-                deadline_date = deadline_date.replace(tzinfo=None)
-
-            # Calculate the threshold date (2 weeks ago from today)
-            today = datetime.now()
-            two_weeks_ago = today - timedelta(days=14)
-            
-            # Include jobs whose deadline is either in the future or within the last 2 weeks
-            return deadline_date >= two_weeks_ago
-            
-        except Exception as e:
-            print(f"Error parsing deadline date '{deadline_date_str}': {e}")
-            return True  # Include jobs with date parsing errors
+        return not keyword or not self.listing_truncated
 
-    def scrape(self, keyword=None):
-        # The specific API endpoint found
-        base_url = "https://opportunityapi.ini.rw/api/opportunities"
-        
+    def match_job(self, job, matcher, keyword=None):
+        """
+        Jobs must match the keyword (or the default IT keywords) in their title
+        and still have a valid deadline.
+        Even when 'q' was passed to the API, we filter again client-side for
+        double safety, as the API also matches on descriptions. So the whole
+        listing, fetched without 'q', answers any keyword.
+        """
+        matched = matcher.matches(job['title'])
+        if matched and not self.has_open_deadline(job):
+            return []
+        return matched
+
+    def _fetch_page(self, offset, keyword=None, sort="default_ranking"):
+        """
+        Fetches one page of the API.
+        Returns (raw_jobs, total), where total is None when the API does not
+        say how many opportunities there are. Raises on failure.
+        """
         # Parameters based on the request inspection
         params = {
             "locale": "en",
-            "limit": 200,  # Request 200 items to minimize pagination needs
-            "offset": 0,
+            "limit": self.PAGE_SIZE,
+            "offset": offset,
             "status": "approved",
-            "sort": "default_ranking",
+            "sort": sort,
             # If a specific keyword is requested, pass it here, otherwise empty
             "q": keyword if keyword else "" 
         }
 
-        # Behave like a browser
+        # Behave like a browser (the User-Agent comes from the shared client)
         headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "application/json",
             "Origin": "https://opportunity.ini.rw",
             "Referer": "https://opportunity.ini.rw/"
         }
 
-        print(f"Fetching data from {base_url}...")
-
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                print(f"Failed to fetch data: Status {response.status_code}")
-                return {"total_jobs": 0, "unique_companies": 0, "jobs": []}
+        response = http_client.get(self.API_URL, params=params, headers=headers, timeout=10)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Status {response.status_code}", response=response)
 
+        with timed("parse"):
             data = response.json()
-            
-            # The API returns a list directly based on the observed behavior, 
-            # or a dict. We'll handle both just in case.
-            raw_jobs = []
-            if isinstance(data, list):
-                raw_jobs = data
-            elif isinstance(data, dict):
-                # Common keys for paginated APIs
-                if 'results' in data:
-                    raw_jobs = data['results']
-                elif 'data' in data:
-                    raw_jobs = data['data']
-                elif 'items' in data:
-                    raw_jobs = data['items']
-                else:
-                    # Fallback: if dict has no obvious list, it might be the dict itself if malformed,
-                    # but usually it's one of the above. 
-                    # For opportunity.ini.rw, previous observation suggests it might be a list or standard paginated structure.
-                    # We will assume 'results' or direct list based on standard REST practices if not specified.
-                    # However, let's look at the structure if we can. 
-                    # Since we can't see the response, we will robustly default to 'results' or check if data itself is iterable.
-                    pass
-            
-            all_jobs = []
-            company_names = set()
-
-            for job in raw_jobs:
-                # Handle nested company objects
-                company_name = "Unknown"
-                if isinstance(job.get('company'), dict):
-                    company_name = job['company'].get('name', 'Unknown')
-                elif isinstance(job.get('company'), str):
-                    company_name = job['company']
-                
-                # Construct the full link using the slug
-                # Pattern: https://opportunity.ini.rw/en/opportunities/{slug}
-                slug = job.get('slug', '')
-                if not slug:
-                    continue # Skip if no slug
-
-                full_link = f"https://opportunity.ini.rw/en/opportunities/{slug}"
-                
-                # Correct field mapping based on API inspection
-                title = job.get('title_en', job.get('title_rw', 'No Title'))
-                
-                # Dates
-                published_date = job.get('created_at', 'N/A')
-                deadline_date = job.get('closing_date', 'N/A')
-                
-                # Location
-                location = job.get('location_en', 'Rwanda')
-                
-                # Company (prefer direct name field if available)
-                if job.get('company_name'):
-                    company_name = job.get('company_name')
-                elif isinstance(job.get('company'), dict):
-                     company_name = job['company'].get('name', 'Unknown')
-                elif isinstance(job.get('company'), str):
-                    company_name = job['company']
-                else:
-                    company_name = "Unknown"
-
-                all_jobs.append({
-                    "title": title,
-                    "company": company_name,
-                    "link": full_link,
-                    "published_date": published_date,
-                    "deadline_date": deadline_date,
-                    "location": location
-                })
-                
-                if company_name != "Unknown":
-                    company_names.add(company_name)
-
-            # --- Filtering Logic (Client-side filtering for double safety) ---
-            # Even though we passed 'q' to the API, 'keyword' in our app context usually implies 
-            # strict filtering for "IT Jobs" when no specific keyword is passed.
-            # If the user passed a keyword, the API 'q' param covered it.
-            # If the user did NOT pass a keyword, we usually filter by DEFAULT_KEYWORDS (IT jobs) 
-            # effectively turning the generic "all jobs" list into "IT jobs".
-            
-            if keyword:
-                # API handled it, pass through (or refine if API fuzzy match is too broad)
-                filtered_jobs = [
-                    job for job in all_jobs 
-                    if self._is_deadline_valid(job['deadline_date'])
-                ]
-            else:
-                # Default behavior: Filter for IT keywords locally
-                pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
-                filtered_jobs = [
-                    job for job in all_jobs 
-                    if re.search(pattern, job['title'], re.IGNORECASE) and
-                    self._is_deadline_valid(job['deadline_date'])
-                ]
-
-            return {
-                "total_jobs": len(all_jobs), # Total fetched
-                "unique_companies": len(company_names),
-                "jobs": filtered_jobs # Return only relevant ones
-            }
 
+        # The API returns a list directly based on the observed behavior,
+        # or a paginated dict. We'll handle both just in case.
+        if isinstance(data, list):
+            return data, None
+
+        raw_jobs = []
+        if isinstance(data, dict):
+            # Common keys for paginated APIs
+            for key in ("results", "data", "items"):
+                if isinstance(data.get(key), list):
+                    raw_jobs = data[key]
+                    break
+            # Common places for the total count
+            for container in (data, data.get("meta"), data.get("pagination")):
+                if not isinstance(container, dict):
+                    continue
+                for key in ("total", "count", "total_count", "totalCount"):
+                    if isinstance(container.get(key), int):
+                        return raw_jobs, container[key]
+        return raw_jobs, None
+
+    def _to_job(self, job):
+        """Maps a raw API opportunity to our job dictionary, or None to skip it."""
+        # Construct the full link using the slug
+        # Pattern: https://opportunity.ini.rw/en/opportunities/{slug}
+        slug = job.get('slug', '')
+        if not slug:
+            return None # Skip if no slug
+
+        full_link = f"https://opportunity.ini.rw/en/opportunities/{slug}"
+
+        # Correct field mapping based on API inspection
+        title = job.get('title_en', job.get('title_rw', 'No Title'))
+
+        # Dates
+        published_date = job.get('created_at', 'N/A')
+        deadline_date = job.get('closing_date', 'N/A')
+
+        # Location
+        location = job.get('location_en', 'Rwanda')
+
+        # Company (prefer direct name field if available)
+        if job.get('company_name'):
+            company_name = job.get('company_name')
+        elif isinstance(job.get('company'), dict):
+            company_name = job['company'].get('name', 'Unknown')
+        elif isinstance(job.get('company'), str):
+            company_name = job['company']
+        else:
+            company_name = "Unknown"
+
+        return {
+            "title": title,
+            "company": company_name,
+            "link": full_link,
+            "published_date": published_date,
+            "deadline_date": deadline_date,
+            "location": location
+        }
+
+    def _page_url(self, offset):
+        return f"{self.API_URL}?offset={offset}"
+
+    def iter_events(self, keyword=None):
+        print(f"Fetching data from {self.API_URL}...")
+
+        try:
+            first_page, total = self._fetch_page(0, keyword)
         except Exception as e:
             print(f"Error scraping Opportunity: {str(e)}")
-            return {"total_jobs": 0, "unique_companies": 0, "jobs": []}
+            yield page_event(self._page_url(0), 0, ok=False)
+            return
+
+        seen_links = set()
+
+        def page_jobs(raw_jobs):
+            # Offsets shift when opportunities are added while paging, so a
+            # job may show up on two pages.
+            for raw_job in raw_jobs:
+                job = self._to_job(raw_job)
+                if job and job["link"] not in seen_links:
+                    seen_links.add(job["link"])
+                    yield job
+
+        jobs_found = 0
+        for job in page_jobs(first_page):
+            jobs_found += 1
+            yield job_event(job)
+        yield page_event(self._page_url(0), jobs_found)
+        received = len(first_page)
+        truncated = False
+
+        if total is not None:
+            # The total is known: fetch the remaining pages concurrently,
+            # and hand them out in order.
+            offsets = list(range(self.PAGE_SIZE, total, self.PAGE_SIZE))[:self.MAX_PAGES - 1]
+            pages = self._fetch_pages(offsets, keyword)
+        elif len(first_page) >= self.PAGE_SIZE:
+            # No total: page one at a time until a short page.
+            pages = self._fetch_pages_sequentially(keyword)
+        else:
+            pages = []
+
+        last_page = first_page
+        for offset, raw_jobs in pages:
+            last_page = raw_jobs
+            if raw_jobs is None:
+                truncated = True
+                yield page_event(self._page_url(offset), 0, ok=False)
+                continue
+            received += len(raw_jobs)
+            jobs_found = 0
+            for job in page_jobs(raw_jobs):
+                jobs_found += 1
+                yield job_event(job)
+            yield page_event(self._page_url(offset), jobs_found)
+
+        if total is not None:
+            truncated = truncated or received < total
+        elif last_page is not None and len(last_page) >= self.PAGE_SIZE:
+            truncated = True  # Stopped at MAX_PAGES on a full page
+        if not keyword:
+            self.listing_truncated = truncated
+            if truncated:
+                print(f"Opportunity listing incomplete ({received} of {total or 'more'}): keyword searches go to the API")
+
+        print(f"Fetched {len(seen_links)} opportunities")
+
+    def _fetch_page_or_none(self, offset, keyword=None, sort="default_ranking"):
+        try:
+            return self._fetch_page(offset, keyword, sort)[0]
+        except Exception as e:
+            print(f"Error fetching Opportunity page at offset {offset}: {e}")
+            return None
+
+    def _fetch_pages(self, offsets, keyword=None):
+        """Yields (offset, raw_jobs or None) for the given offsets, fetched concurrently."""
+        if not offsets:
+            return
+        max_workers = min(len(offsets), http_client.max_concurrency(self.API_URL))
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            # Each page runs in a copy of our context, so its fetch counts towards the current scrape.
+            context = contextvars.copy_context()
+            pages = executor.map(lambda offset: context.copy().run(self._fetch_page_or_none, offset, keyword), offsets)
+            yield from zip(offsets, pages)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_pages_sequentially(self, keyword=None):
+        for page in range(1, self.MAX_PAGES):
+            offset = page * self.PAGE_SIZE
+            raw_jobs = self._fetch_page_or_none(offset, keyword)
+            yield offset, raw_jobs
+            if raw_jobs is None or len(raw_jobs) < self.PAGE_SIZE:
+                return
+
+    @staticmethod
+    def _created_at(job):
+        """A sortable datetime for a job's 'published_date' (the API's created_at), or None."""
+        value = job.get("published_date")
+        if not value or value == "N/A":
+            return None
+        try:
+            created_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            return None
+        # Compare naive and aware values alike: aware ones as naive UTC
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return created_at
+
+    def watermark_of(self, jobs):
+        """The newest 'published_date' among the jobs, or None."""
+        dated = [job for job in jobs if self._created_at(job) is not None]
+        if not dated:
+            return None
+        return max(dated, key=self._created_at)["published_date"]
+
+    def fetch_new_jobs(self, since):
+        """
+        Fetches only the opportunities created after the `since` watermark.
+        Pages are requested newest first, and paging stops at the first page
+        that reaches an opportunity already seen, or that has no opportunity
+        newer than the watermark at all (in case the API ignores the sort).
+
+        Returns:
+            tuple: (new jobs, new watermark). Unlike `iter_events`, a failed
+                   request raises, so the caller does not mistake it for
+                   "nothing new".
+        """
+        since_date = self._created_at({"published_date": since})
+        if since_date is None:
+            raise ValueError(f"Not a creation date watermark: {since!r}")
+
+        new_jobs = []
+        seen_links = set()
+        for page in range(self.MAX_PAGES):
+            raw_jobs, _ = self._fetch_page(page * self.PAGE_SIZE, sort=self.NEWEST_FIRST_SORT)
+
+            dates = []
+            newer_on_page = 0
+            for raw_job in raw_jobs:
+                job = self._to_job(raw_job)
+                if not job:
+                    continue
+                created_at = self._created_at(job)
+                dates.append(created_at)
+                if created_at is not None and created_at > since_date:
+                    newer_on_page += 1
+                    if job["link"] not in seen_links:
+                        seen_links.add(job["link"])
+                        new_jobs.append(self.prepare_job(job))
+
+            if len(raw_jobs) < self.PAGE_SIZE:
+                break
+            # A page with nothing newer than the watermark ends the sync,
+            # whatever order the API returned: if it ignores the sort, this
+            # bounds the sync to the pages it takes to reach old jobs instead
+            # of walking all MAX_PAGES.
+            if not newer_on_page:
+                break
+            # When the page really is sorted newest first, it can also stop
+            # as soon as the page reaches the watermark.
+            known = [date for date in dates if date is not None]
+            sorted_newest_first = all(a >= b for a, b in zip(known, known[1:]))
+            if sorted_newest_first and known and known[-1] <= since_date:
+                break
+
+        print(f"Fetched {len(new_jobs)} new opportunities since {since}")
+        return new_jobs, self.watermark_of(new_jobs) or since
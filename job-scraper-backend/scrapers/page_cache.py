@@ -0,0 +1,82 @@
+# scrapers/page_cache.py
+
+"""
+Skips parsing listing pages that have not changed since they were last parsed.
+
+Many sites send no validators, so the HTTP cache can't tell that a page is
+unchanged (see http_cache.py): every scrape gets a 200 with the same bytes,
+and BeautifulSoup and the extraction run again on them. The
+`ParsedPageCache` keeps, per extractor and URL, a hash of the last page
+parsed and the jobs extracted from it. When a page comes back with the same
+hash, the jobs are returned as they were, and parsing an unchanged listing
+costs a hash of its bytes.
+
+Only the latest page of each URL is kept, in memory, for the `max_pages`
+URLs used most recently. Extractors must return plain data that only
+depends on the page: anything computed from the current date (relative
+deadlines...) is done by the scraper, after the extraction.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def page_digest(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def extractor_name(extractor):
+    return f"{getattr(extractor, '__module__', '')}.{getattr(extractor, '__qualname__', repr(extractor))}"
+
+
+class ParsedPageCache:
+    """The jobs extracted from the last page seen at each URL, keyed by the page's hash."""
+
+    def __init__(self, max_pages=512):
+        self.max_pages = max_pages
+        self.enabled = max_pages > 0
+        self._pages = OrderedDict()  # (extractor, url) -> (digest, rows), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, extractor, content, url):
+        """
+        Returns (key, digest, hit, rows). When the page is unchanged, `hit`
+        is True and `rows` is what the extractor returned last time (a copy
+        of the list); otherwise they are False and None.
+        """
+        key = (extractor_name(extractor), url)
+        digest = page_digest(content)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None and cached[0] == digest:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                rows = cached[1]
+                return key, digest, True, list(rows) if isinstance(rows, list) else rows
+            self.misses += 1
+        return key, digest, False, None
+
+    def store(self, key, digest, rows):
+        with self._lock:
+            self._pages[key] = (digest, rows)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "pages": len(self._pages)}
+
+
+# The cache shared by every scraper in the process (through the parser pool).
+parsed_pages = ParsedPageCache(max_pages=int(os.environ.get("PARSED_PAGE_CACHE_SIZE", 512)))
@@ -0,0 +1,135 @@
+# scrapers/parser_pool.py
+
+"""
+Optional process pool for parsing listing pages.
+
+Extracting jobs from HTML (BeautifulSoup, then `find` / `get_text` on every
+card) is pure-Python CPU work. Pages fetched concurrently by threads or
+asyncio tasks are still parsed one at a time, because of the GIL. With
+PARSER_PROCESSES set to a number of processes, scrapers hand the raw page
+bytes to a pool of parser processes instead, and get back compact job tuples
+(cheap to send between processes), so pages are parsed on several cores.
+
+Extractors are module-level functions `extract(content, url)` returning a
+list of tuples, e.g. `greatrwandajobs_scraper.extract_page`. Without the
+pool (the default), `run` simply calls the extractor in the calling thread,
+so both modes return the same jobs.
+
+The pool shared by the scrapers also skips pages that have not changed since
+they were last parsed, and returns the jobs extracted then (see
+page_cache.py).
+
+Workers are started with "forkserver" (or "spawn"), never forked from the
+threaded web process, and are warmed up when the pool starts: the parsing
+libraries and the scraper modules are imported before the first page comes.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .instrumentation import timed
+from .page_cache import parsed_pages
+
+# Imported by every worker when it starts, so the first page is parsed at full speed.
+WARM_MODULES = (
+    "scrapers.html_parser",
+    "scrapers.greatrwandajobs_scraper",
+    "scrapers.jobinrwanda_scraper",
+    "scrapers.unjobs_scraper",
+)
+
+
+def _warm_up():
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    from .html_parser import parse_html
+    parse_html(b"<div class='job'><a class='jtitle' href='/'>Warm up</a></div>", only="div.job")
+
+
+def _ready():
+    return os.getpid()
+
+
+def _start_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ParserPool:
+    """
+    Runs extractors in a pool of warm parser processes, or inline when
+    `processes` is 0. With a `page_cache`, unchanged pages are not parsed again.
+    """
+
+    def __init__(self, processes=0, page_cache=None):
+        self.processes = processes
+        self.page_cache = page_cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=_start_context(),
+                    initializer=_warm_up,
+                )
+                # Start every worker now rather than on demand.
+                for future in [self._executor.submit(_ready) for _ in range(self.processes)]:
+                    future.result()
+            return self._executor
+
+    def _lookup(self, extractor, content, url):
+        if self.page_cache is None or not self.page_cache.enabled:
+            return None, None, False, None
+        return self.page_cache.lookup(extractor, content, url)
+
+    def _store(self, key, digest, rows):
+        if key is not None:
+            self.page_cache.store(key, digest, rows)
+
+    def run(self, extractor, content, url):
+        """Returns `extractor(content, url)`, computed in a parser process when the pool is enabled."""
+        key, digest, hit, rows = self._lookup(extractor, content, url)
+        if hit:
+            return rows
+        if not self.enabled:
+            rows = extractor(content, url)
+        else:
+            with timed("parse"):  # The worker's own time is not seen from here: count the wait
+                rows = self._pool().submit(extractor, content, url).result()
+        self._store(key, digest, rows)
+        return rows
+
+    async def arun(self, extractor, content, url):
+        """The asyncio counterpart of `run`; waits for the parser process without blocking the loop."""
+        key, digest, hit, rows = self._lookup(extractor, content, url)
+        if hit:
+            return rows
+        if not self.enabled:
+            rows = extractor(content, url)
+        else:
+            with timed("parse"):
+                future = await asyncio.to_thread(self._pool().submit, extractor, content, url)
+                rows = await asyncio.wrap_future(future)
+        self._store(key, digest, rows)
+        return rows
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+# The pool shared by every scraper in the process.
+parser_pool = ParserPool(processes=int(os.environ.get("PARSER_PROCESSES", 0)), page_cache=parsed_pages)
@@ -0,0 +1,174 @@
+# scrapers/politeness.py
+
+"""
+Per-host politeness for the shared HTTP clients.
+
+Scrapers don't sleep between requests themselves. Before every request the
+HTTP client asks the `PolitenessScheduler` for a slot on the request's host,
+and waits until then (`time.sleep` in the sync client, `asyncio.sleep` in
+the async one, so no thread is held). For each host the scheduler enforces:
+
+- a token bucket: at most `rate` requests per second on average, with bursts
+  of up to `burst` requests,
+- a minimum spacing between two requests, `min_interval` plus a random
+  `jitter`, so the requests don't come at machine-regular intervals,
+- a "not before" time, set from the `Retry-After` header of a 429 or 503
+  response, or by a scraper that wants to back off (`hold`).
+
+Slots are reserved rather than waited for: the caller that reserves a slot
+moves the host's schedule forward before it starts waiting, so concurrent
+callers line up one behind the other, and requests to other hosts are not
+delayed at all.
+
+The schedule of each host is kept in a small JSON file under `state_dir`,
+read and written under an exclusive `flock`, so the limits hold across the
+gunicorn workers too. Without `fcntl` (Windows) it is kept in memory, per
+process.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "politeness")
+
+# Longest Retry-After honoured, so a bogus header can't stop a host for days.
+MAX_RETRY_AFTER = 3600
+
+RETRY_AFTER_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait for a Retry-After header (delay in seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (now if now is not None else time.time()))
+
+
+class PolitenessScheduler:
+    """Hands out request slots per host, honouring each host's rate, spacing and Retry-After."""
+
+    def __init__(self, policy_for, state_dir=None, cross_process=True, enabled=True):
+        self.policy_for = policy_for  # host -> policy dict (see http_client.DEFAULT_POLICY)
+        self.state_dir = state_dir or os.environ.get("POLITENESS_STATE_DIR", DEFAULT_STATE_DIR)
+        self.cross_process = cross_process and fcntl is not None
+        self.enabled = enabled
+        self._states = {}  # host -> schedule, when not shared across processes
+        self._stats = {}  # host -> {"requests", "delayed", "wait_seconds", "retry_after"}
+        self._host_locks = {}  # host -> Lock, held while its schedule is updated
+        self._lock = threading.Lock()  # Guards `_stats` and `_host_locks` only
+        if self.cross_process:
+            os.makedirs(self.state_dir, exist_ok=True)
+
+    def _path(self, host):
+        return os.path.join(self.state_dir, (host or "_").replace(os.sep, "_") + ".json")
+
+    def _host_lock(self, host):
+        with self._lock:
+            lock = self._host_locks.get(host)
+            if lock is None:
+                lock = self._host_locks[host] = threading.Lock()
+            return lock
+
+    def _update(self, host, change):
+        """
+        Applies `change(state)` to the host's schedule atomically, and returns
+        its result. Only callers for the same host wait for each other.
+        """
+        with self._host_lock(host):
+            if not self.cross_process:
+                state = self._states.setdefault(host, {})
+                return change(state)
+            with open(self._path(host), "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)  # Released when the file is closed
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}  # A torn write of a crashed worker: start over
+                result = change(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                return result
+
+    def reserve(self, host):
+        """
+        Reserves the next request slot of `host`. Returns how many seconds
+        the caller must wait before sending its request (0 to send it now).
+        """
+        if not self.enabled:
+            return 0.0
+        policy = self.policy_for(host)
+        rate, burst = policy["rate"], max(1, policy["burst"])
+        spacing = policy["min_interval"] + random.uniform(0, policy["jitter"])
+
+        def take_slot(state):
+            now = time.time()
+            start = max(now, state.get("last", 0.0) + spacing, state.get("not_before", 0.0))
+            if rate:
+                # Generic cell rate algorithm: a token bucket kept as the time at
+                # which it would be full again ("tat").
+                interval = 1.0 / rate
+                tat = state.get("tat", 0.0)
+                start = max(start, tat - (burst - 1) * interval)
+                state["tat"] = max(tat, start) + interval
+            state["last"] = start
+            return start - now
+
+        delay = self._update(host, take_slot)
+        with self._lock:
+            stats = self._host_stats(host)
+            stats["requests"] += 1
+            if delay > 0:
+                stats["delayed"] += 1
+                stats["wait_seconds"] += delay
+        return delay
+
+    def hold(self, host, seconds):
+        """Sends no request to `host` for the next `seconds` (on top of slots already reserved)."""
+        seconds = min(seconds, MAX_RETRY_AFTER)
+
+        def push_back(state):
+            state["not_before"] = max(state.get("not_before", 0.0), time.time() + seconds)
+
+        self._update(host, push_back)
+
+    def observe(self, host, response):
+        """Holds the host off for as long as a 429 or 503 response asks in its Retry-After header."""
+        if response is None or response.status_code not in RETRY_AFTER_STATUSES:
+            return
+        seconds = parse_retry_after(response.headers.get("Retry-After"))
+        if seconds:
+            with self._lock:
+                self._host_stats(host)["retry_after"] += 1
+            self.hold(host, seconds)
+
+    def _host_stats(self, host):
+        # Called with the lock held.
+        return self._stats.setdefault(host, {"requests": 0, "delayed": 0, "wait_seconds": 0.0, "retry_after": 0})
+
+    def stats(self):
+        """
+        Returns a copy of the per-host counters: requests scheduled, how many
+        waited, for how long, and how many Retry-After answers held the host off.
+        """
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
@@ -0,0 +1,114 @@
+# scrapers/registry.py
+
+"""
+Discovers the available scrapers and builds them on first use.
+
+Scrapers are found without importing them:
+
+- every `scrapers/<site>_scraper.py` module is the scraper of `<site>`, and
+  its class is the `BaseScraper` subclass defined in it,
+- other packages can add sites through the `job_scraper.scrapers` entry
+  point group, e.g. in their pyproject.toml:
+
+      [project.entry-points."job_scraper.scrapers"]
+      jobinkenya = "jobinkenya.scraper:JobInKenyaScraper"
+
+A site's module is only imported, and its scraper only instantiated, the
+first time the site is looked up. Listing the sites (`/api/sites`) or
+checking whether one exists costs nothing, so a worker boots without
+paying for scrapers it may never run.
+"""
+
+import importlib
+import os
+import pkgutil
+import threading
+from collections.abc import Mapping
+from importlib.metadata import entry_points
+
+ENTRY_POINT_GROUP = "job_scraper.scrapers"
+MODULE_SUFFIX = "_scraper"
+
+
+def _scraper_class(module):
+    """The BaseScraper subclass defined in `module`."""
+    from .base_scraper import BaseScraper
+
+    for value in vars(module).values():
+        if (isinstance(value, type) and issubclass(value, BaseScraper)
+                and value is not BaseScraper and value.__module__ == module.__name__):
+            return value
+    raise LookupError(f"{module.__name__} defines no BaseScraper subclass")
+
+
+def discover_modules():
+    """Returns {site name: loader} for the `*_scraper` modules of this package, without importing them."""
+    loaders = {}
+    for module_info in pkgutil.iter_modules([os.path.dirname(os.path.abspath(__file__))]):
+        name = module_info.name
+        if name.endswith(MODULE_SUFFIX) and name != "base" + MODULE_SUFFIX:
+            module_name = f"{__package__}.{name}"
+            loaders[name[:-len(MODULE_SUFFIX)]] = (
+                lambda module_name=module_name: _scraper_class(importlib.import_module(module_name))
+            )
+    return loaders
+
+
+def discover_entry_points(group=ENTRY_POINT_GROUP):
+    """Returns {site name: loader} for the scrapers installed by other packages."""
+    return {entry_point.name: entry_point.load for entry_point in entry_points(group=group)}
+
+
+class ScraperRegistry(Mapping):
+    """
+    A read-only mapping of site name -> scraper instance, built lazily.
+
+    Iterating, `len()` and `in` only use the discovered names. Sites are
+    listed in the given `order` first, then the others by name. Looking up a
+    site imports and instantiates its scraper once, then passes it to the
+    `on_load` hooks (e.g. to instrument it for metrics).
+    """
+
+    def __init__(self, loaders=None, order=()):
+        if loaders is None:
+            loaders = {**discover_modules(), **discover_entry_points()}
+        ranks = {site_name: rank for rank, site_name in enumerate(order)}
+        self._loaders = dict(sorted(loaders.items(), key=lambda item: (ranks.get(item[0], len(ranks)), item[0])))
+        self._scrapers = {}
+        self._hooks = []
+        self._lock = threading.RLock()
+
+    def on_load(self, hook):
+        """Calls `hook(site_name, scraper)` for every scraper, now for those already built and later for the others."""
+        with self._lock:
+            self._hooks.append(hook)
+            for site_name, scraper in self._scrapers.items():
+                hook(site_name, scraper)
+
+    def __getitem__(self, site_name):
+        scraper = self._scrapers.get(site_name)
+        if scraper is not None:
+            return scraper
+        loader = self._loaders[site_name]  # KeyError for unknown sites, like a dict
+        with self._lock:
+            scraper = self._scrapers.get(site_name)
+            if scraper is None:
+                scraper = loader()()
+                for hook in self._hooks:
+                    hook(site_name, scraper)
+                self._scrapers[site_name] = scraper
+            return scraper
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+    def __contains__(self, site_name):
+        return site_name in self._loaders
+
+    def loaded(self):
+        """The names of the sites whose scraper has been built."""
+        with self._lock:
+            return list(self._scrapers)
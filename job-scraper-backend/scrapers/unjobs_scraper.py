@@ -27,28 +27,116 @@ Target Structure:
 
 import requests
 import re
-import time
 import random
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
-from .base_scraper import BaseScraper
-from .keywords import DEFAULT_KEYWORDS
+from .async_http_client import async_http_client
+from .base_scraper import BaseScraper, job_event, page_event
+from .html_parser import parse_html
+from .circuit_breaker import CircuitOpenError
+from .http_client import ACCEPT_ENCODING, http_client
+from .parser_pool import parser_pool
+
+MAIN_URL = "https://unjobs.org/"
+
+# The fields of the job tuples returned by `extract_page`, in order.
+JOB_FIELDS = ("title", "company", "link", "updated_date", "closing_date")
+
+
+def extract_page(content, url):
+    """
+    Extracts the jobs of one listing page, as tuples of JOB_FIELDS, or None
+    when the page holds no job element at all. A module-level function, so
+    it can run in a parser process (see parser_pool.py).
+    """
+    soup = parse_html(content, only="div.job")
+    job_elements = soup.find_all("div", class_="job")
+    if not job_elements:
+        return None
+    print(f"📋 Found {len(job_elements)} job elements on {url}")
+
+    rows = []
+    for job_element in job_elements:
+        # Skip advertisement divs
+        if job_element.find("ins", class_="adsbygoogle"):
+            continue
+
+        # Extract job data
+        title_element = job_element.find("a", class_="jtitle")
+        if not title_element:
+            continue
+
+        title = title_element.get_text(strip=True)
+        link = title_element.get("href", "")
+
+        # Make link absolute
+        if link.startswith("/"):
+            link = "https://unjobs.org" + link
+        elif not link.startswith("http"):
+            link = "https://unjobs.org/" + link
+
+        # Extract company
+        full_text = job_element.get_text(separator='\n', strip=True)
+        text_lines = [line.strip() for line in full_text.split('\n') if line.strip()]
+
+        company = "N/A"
+        if len(text_lines) >= 2:
+            for line in text_lines[1:]:
+                if (not line.startswith("Updated:") and
+                    not line.startswith("Closing date:") and
+                    line != title):
+                    company = line
+                    break
+
+        # Extract dates
+        updated_element = job_element.find("time", class_="timeago")
+        updated_date = "N/A"
+        if updated_element:
+            updated_date = updated_element.get("datetime", "N/A")
+            if updated_date != "N/A":
+                updated_date = updated_date.split("T")[0]
+
+        closing_date = "N/A"
+        closing_span = job_element.find("span", id=re.compile(r"^j\d+$"))
+        if closing_span and closing_span.get_text(strip=True):
+            closing_text = closing_span.get_text(strip=True)
+            if "Closing date:" in closing_text:
+                closing_date = closing_text.replace("Closing date:", "").strip()
+
+        rows.append((title, company, link, updated_date, closing_date))
+    return rows
+
 
 class UNJobsScraper(BaseScraper):
     """Advanced UNJobs scraper with anti-detection measures"""
+
+    PUBLISHED_FIELD = "updated_date"
+    DEADLINE_FIELD = "closing_date"
+    UPSTREAM_URLS = (MAIN_URL,)
+    supports_details = True
     
     def __init__(self):
-        self.ua = UserAgent()
+        self._ua = None
+
+    @property
+    def ua(self):
+        """
+        The random user agent source, built on first use: `fake_useragent`
+        loads its whole dataset when imported and instantiated.
+        """
+        if self._ua is None:
+            from fake_useragent import UserAgent
+            self._ua = UserAgent()
+        return self._ua
     
-    def create_stealth_session(self):
-        """Create a session with maximum stealth settings"""
-        session = requests.Session()
-        
+    def stealth_headers(self):
+        """
+        Builds a fresh set of browser-like headers with a random identity.
+        They are sent on top of the shared, pooled session for unjobs.org.
+        """
         # Use random user agent
         user_agent = self.ua.random
         
         # Comprehensive headers to mimic real browser
-        headers = {
+        return {
             'User-Agent': user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': random.choice([
@@ -57,8 +145,7 @@ class UNJobsScraper(BaseScraper):
                 'en-CA,en;q=0.9',
                 'fr-FR,fr;q=0.9,en;q=0.8'
             ]),
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
@@ -68,203 +155,116 @@ class UNJobsScraper(BaseScraper):
             'DNT': '1',
             'Pragma': 'no-cache',
         }
-        
-        session.headers.update(headers)
-        
-        # Set session timeouts
-        session.timeout = 30
-        
-        return session
     
-    def human_delay(self, min_seconds=2, max_seconds=6):
-        """Human-like delay with random variation"""
-        delay = random.uniform(min_seconds, max_seconds)
-        print(f"Waiting {delay:.1f} seconds...")
-        time.sleep(delay)
-
-    def scrape(self, keyword=None):
+    async def aiter_events(self, keyword=None):
+        # Native async: most of a scrape is spent waiting for the politeness
+        # slots of unjobs.org (3 to 7 seconds apart, see HOST_POLICIES), which
+        # the async client awaits without holding a thread.
+        # The sync `iter_events` of BaseScraper runs this on its own loop.
         # URLs for both pages based on pagination shown (1-25 of 39)
         URLS = [
             "https://unjobs.org/duty_stations/rwanda/1",
             "https://unjobs.org/duty_stations/rwanda/2"
         ]
         
-        all_jobs = []
-        company_names = set()
+        jobs_scraped = 0
 
         # Multiple attempts with different strategies
         for attempt in range(3):  # Try up to 3 times
             print(f"\n🔄 Attempt {attempt + 1}/3")
             
-            # Create a fresh stealth session for each attempt
-            session = self.create_stealth_session()
+            # Start each attempt with a fresh identity. The connection pool is
+            # kept, only the cookies of the previous attempt are dropped.
+            headers = self.stealth_headers()
+            async_http_client.clear_cookies(MAIN_URL)
             
             try:
                 # Step 1: Visit main page first to establish session
                 print("🌐 Establishing session with main page...")
-                main_response = session.get('https://unjobs.org/', timeout=20)
+                main_response = await async_http_client.get(MAIN_URL, headers=headers, timeout=20)
                 print(f"Main page response: {main_response.status_code}")
                 
                 if main_response.status_code != 200:
                     print(f"⚠️ Main page returned {main_response.status_code}, trying different approach...")
                     continue
                 
-                # Human-like delay after main page
-                self.human_delay(3, 7)
-                
                 # Step 2: Try to access job pages
                 for i, url in enumerate(URLS):
                     try:
-                        if i > 0:
-                            self.human_delay(4, 8)  # Longer delay between pages
-                            
                         # Update headers for subsequent requests
-                        session.headers.update({
-                            'Referer': 'https://unjobs.org/' if i == 0 else URLS[i-1],
+                        headers.update({
+                            'Referer': MAIN_URL if i == 0 else URLS[i-1],
                             'Sec-Fetch-Site': 'same-origin',
                         })
                         
                         print(f"🎯 Fetching: {url}")
                         
                         # Make the request with retry logic
-                        page = session.get(url, timeout=30, allow_redirects=True)
+                        page = await async_http_client.get(url, headers=headers, timeout=30, allow_redirects=True)
                         page.raise_for_status()
                         
                         print(f"✅ SUCCESS! Fetched {url} (Status: {page.status_code})")
                         
-                        # Parse the content
-                        soup = BeautifulSoup(page.content, "html.parser")
-                        job_elements = soup.find_all("div", class_="job")
+                        # Parse the content (in a parser process when the pool is enabled)
+                        rows = await parser_pool.arun(extract_page, page.content, url)
                         
-                        if not job_elements:
+                        if rows is None:
                             print(f"⚠️ No job elements found on {url}")
+                            yield page_event(url, 0)
                             continue
                         
-                        print(f"📋 Found {len(job_elements)} job elements on {url}")
-                        
-                        # Process jobs (existing logic)
-                        jobs_processed = 0
-                        for job_element in job_elements:
-                            # Skip advertisement divs
-                            if job_element.find("ins", class_="adsbygoogle"):
-                                continue
-                            
-                            # Extract job data
-                            title_element = job_element.find("a", class_="jtitle")
-                            if not title_element:
-                                continue
-                            
-                            title = title_element.get_text(strip=True)
-                            link = title_element.get("href", "")
-                            
-                            # Make link absolute
-                            if link.startswith("/"):
-                                link = "https://unjobs.org" + link
-                            elif not link.startswith("http"):
-                                link = "https://unjobs.org/" + link
-                            
-                            # Extract company
-                            full_text = job_element.get_text(separator='\n', strip=True)
-                            text_lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-                            
-                            company = "N/A"
-                            if len(text_lines) >= 2:
-                                for line in text_lines[1:]:
-                                    if (not line.startswith("Updated:") and 
-                                        not line.startswith("Closing date:") and 
-                                        line != title):
-                                        company = line
-                                        break
-                            
-                            # Extract dates
-                            updated_element = job_element.find("time", class_="timeago")
-                            updated_date = "N/A"
-                            if updated_element:
-                                updated_date = updated_element.get("datetime", "N/A")
-                                if updated_date != "N/A":
-                                    updated_date = updated_date.split("T")[0]
-                            
-                            closing_date = "N/A"
-                            closing_span = job_element.find("span", id=re.compile(r"^j\d+$"))
-                            if closing_span and closing_span.get_text(strip=True):
-                                closing_text = closing_span.get_text(strip=True)
-                                if "Closing date:" in closing_text:
-                                    closing_date = closing_text.replace("Closing date:", "").strip()
-                            
-                            all_jobs.append({
-                                "title": title,
-                                "company": company,
-                                "link": link,
-                                "updated_date": updated_date,
-                                "closing_date": closing_date,
-                            })
-                            
-                            if company != "N/A":
-                                company_names.add(company)
-                            
-                            jobs_processed += 1
+                        for row in rows:
+                            yield job_event(dict(zip(JOB_FIELDS, row)))
                         
+                        jobs_processed = len(rows)
+                        jobs_scraped += jobs_processed
                         print(f"✅ Processed {jobs_processed} jobs from {url}")
+                        yield page_event(url, jobs_processed)
                         
+                    except CircuitOpenError:
+                        raise  # Blocked: end the attempt, and the whole scrape
                     except requests.exceptions.HTTPError as e:
                         if e.response.status_code == 403:
                             print(f"🚫 403 Forbidden for {url} on attempt {attempt + 1}")
+                            yield page_event(url, 0, ok=False)
                             break  # Exit the URL loop, try next attempt
                         else:
                             print(f"❌ HTTP error for {url}: {e}")
+                            yield page_event(url, 0, ok=False)
                             continue
                     except Exception as e:
                         print(f"❌ Error processing {url}: {e}")
+                        yield page_event(url, 0, ok=False)
                         continue
                 
                 # If we got jobs, break out of retry loop
-                if all_jobs:
-                    print(f"🎉 Successfully scraped {len(all_jobs)} jobs!")
+                if jobs_scraped:
+                    print(f"🎉 Successfully scraped {jobs_scraped} jobs!")
                     break
                     
+            except CircuitOpenError as e:
+                print(f"🚫 {e}, giving up")
+                break
             except Exception as e:
                 print(f"❌ Attempt {attempt + 1} failed: {e}")
                 continue
-            finally:
-                session.close()
             
-            # Wait before next attempt
-            if attempt < 2 and not all_jobs:
-                print(f"⏳ Waiting before attempt {attempt + 2}...")
-                self.human_delay(10, 15)
+            # Wait before next attempt, unless the site is known to be blocking us
+            if attempt < 2 and not jobs_scraped and http_client.retry_after(MAIN_URL):
+                print("🚫 unjobs.org keeps refusing requests, not retrying until its circuit closes")
+                break
+            if attempt < 2 and not jobs_scraped:
+                print(f"⏳ Backing off before attempt {attempt + 2}...")
+                http_client.hold(MAIN_URL, random.uniform(10, 15))
 
         print(f"\n📊 FINAL RESULTS:")
-        print(f"Total jobs scraped: {len(all_jobs)}")
-        print(f"Unique companies: {len(company_names)}")
+        print(f"Total jobs scraped: {jobs_scraped}")
         
         # If no jobs were scraped, provide helpful feedback
-        if len(all_jobs) == 0:
+        if jobs_scraped == 0:
             print("\n🚫 UNJobs scraper: No jobs could be scraped due to website restrictions.")
             print("💡 Consider these solutions:")
             print("   - Use Selenium/Playwright for browser automation")
             print("   - Implement proxy rotation")
             print("   - Use professional scraping services")
             print("   - Contact the website for API access")
-                
-        
-        # Filter jobs based on keyword or default IT keywords
-        if keyword:
-            # For a custom search, look for the keyword as a whole word
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-        else:
-            # For the default IT search, build a pattern of all keywords
-            pattern = r'\b(' + '|'.join(DEFAULT_KEYWORDS) + r')\b'
-        
-        # Filter the jobs using the regex pattern (case-insensitive)
-        filtered_jobs = [
-            job for job in all_jobs 
-            if re.search(pattern, job['title'], re.IGNORECASE)
-        ]
-
-        print(f"Filtered jobs (matching criteria): {len(filtered_jobs)}")
-
-        return {
-            "total_jobs": len(all_jobs),
-            "unique_companies": len(company_names),
-            "jobs": filtered_jobs
-        }
\ No newline at end of file
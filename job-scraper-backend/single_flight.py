@@ -0,0 +1,221 @@
+# single_flight.py
+
+"""
+Request coalescing ("single-flight") for identical concurrent scrapes.
+
+When a link is shared, many requests for the same site and keyword arrive
+together, before the response cache holds anything. Without coalescing each
+of them crawls the site on its own. With it, one caller (the leader) scrapes
+and every other caller waits and gets the leader's result.
+
+- Within a process, followers wait on the leader's Future.
+- Across processes (gunicorn workers), the leader holds an exclusive `flock`
+  on a lock file for the key while it scrapes. A worker that finds the key
+  locked leaves a marker file and waits for the lock. When the leader is
+  done and sees a marker, it writes its result next to the lock, and the
+  waiting worker reads it instead of scraping again (if it was written
+  after the worker started waiting). Without waiters, nothing is written.
+
+Only calls made with `shared=True` are coordinated across processes, and
+each of their keys gets a lock file: callers keep those keys to a bounded
+set (the app uses one per site). Result files are deleted once they are
+older than RESULT_TTL.
+
+Without `fcntl` (Windows), only the in-process coalescing applies.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_LOCK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "single_flight")
+
+# Seconds a result file is kept for workers that waited on its leader.
+RESULT_TTL = 300
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, across threads and processes."""
+
+    def __init__(self, lock_dir=DEFAULT_LOCK_DIR, cross_process=True):
+        self.lock_dir = lock_dir
+        self.cross_process = cross_process and fcntl is not None
+        self._calls = {}  # key -> Future of the in-flight call in this process
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0  # Callers that got a result without scraping
+        if self.cross_process:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, func, shared=True):
+        """
+        Returns `func()`, or the result of an identical call already in flight.
+        If the leader's call raises, its followers in this process raise too.
+        `key` is a tuple of strings. With `shared`, the call is also coalesced
+        with the other processes, and results must be JSON-serializable.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run_locked(key, func, shared)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key, afunc, shared=True):
+        """
+        The asyncio counterpart of `do`: `afunc` is a coroutine function.
+        Waiting for another worker's lock happens in a thread, off the loop.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self._arun_locked(key, afunc, shared)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    # --- Cross-process coordination ---
+
+    def _paths(self, key):
+        digest = hashlib.sha1("\0".join(key).encode("utf-8")).hexdigest()
+        base = os.path.join(self.lock_dir, digest)
+        return base + ".lock", base + ".json", base + ".wait"
+
+    def _acquire(self, key):
+        """
+        Takes the key's file lock. Returns (lock_file, shared_result), where
+        `shared_result` is another worker's result that finished while we
+        waited for the lock (the lock is then already released), or None.
+        """
+        lock_path, result_path, wait_path = self._paths(key)
+        waiting_since = time.time()
+        lock_file = open(lock_path, "a")
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file, None  # Nobody else was scraping this key
+            except BlockingIOError:
+                open(wait_path, "a").close()  # Asks the leader to share its result
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            shared = self._read_result(result_path, waiting_since)
+        except BaseException:
+            lock_file.close()
+            raise
+        if shared is not None:
+            lock_file.close()
+            with self._lock:
+                self.followers += 1
+            return None, shared
+        return lock_file, None
+
+    def _read_result(self, result_path, newer_than):
+        try:
+            with open(result_path, encoding="utf-8") as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if shared.get("finished_at", 0) < newer_than:
+            return None
+        return {"value": shared["value"]}
+
+    def _write_result(self, key, value):
+        """Shares the leader's result, only if another worker waits for it."""
+        _, result_path, wait_path = self._paths(key)
+        try:
+            os.unlink(wait_path)
+        except FileNotFoundError:
+            return  # Nobody waiting: don't pay for serializing the result
+        temp_path = f"{result_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"finished_at": time.time(), "value": value}, f)
+            os.replace(temp_path, result_path)  # Atomic: readers never see half a file
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not share the result for {key} with other workers: {e}")
+        self._prune_results()
+
+    def _prune_results(self):
+        """Deletes the result files older than RESULT_TTL."""
+        expired_before = time.time() - RESULT_TTL
+        try:
+            entries = list(os.scandir(self.lock_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                if entry.stat().st_mtime < expired_before:
+                    os.unlink(entry.path)
+            except OSError:
+                pass  # Already deleted by another worker
+
+    def _run_locked(self, key, func, shared):
+        if not (self.cross_process and shared):
+            return func()
+        lock_file, shared = self._acquire(key)
+        if shared is not None:
+            return shared["value"]
+        try:
+            result = func()
+            self._write_result(key, result)
+            return result
+        finally:
+            lock_file.close()  # Releases the flock
+
+    async def _arun_locked(self, key, afunc, shared):
+        if not (self.cross_process and shared):
+            return await afunc()
+        lock_file, shared = await asyncio.to_thread(self._acquire, key)
+        if shared is not None:
+            return shared["value"]
+        try:
+            result = await afunc()
+            self._write_result(key, result)
+            return result
+        finally:
+            lock_file.close()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,88 @@
+# streaming.py
+
+"""
+Helpers for the streaming scrape endpoints.
+
+A streamed scrape is a sequence of small event dicts ("job", "page",
+"site_start", "site_end"...) produced by generators. This module merges the
+event streams of several sites into one, and serializes events either as
+NDJSON (one JSON document per line) or as Server-Sent Events.
+"""
+
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Marks the end of one producer's events in the merge queue.
+_END = object()
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+SSE_MIMETYPE = "text/event-stream"
+
+
+def _put(events_queue, item, stop):
+    # The queue is bounded: a producer waits while the client is slower than
+    # the upstream sites, and gives up once the client is gone.
+    while not stop.is_set():
+        try:
+            events_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(make_events, events_queue, stop):
+    events = None
+    try:
+        events = make_events()
+        for event in events:
+            if not _put(events_queue, event, stop):
+                break
+    finally:
+        if hasattr(events, "close"):
+            events.close()
+        _put(events_queue, _END, stop)
+
+
+def merge_streams(producers, max_workers, queue_size=100):
+    """
+    Runs several event generators concurrently and yields their events as
+    they arrive.
+
+    Args:
+        producers (list): Callables that each return an iterable of events.
+                          They must handle their own errors.
+        max_workers (int): How many producers run at the same time.
+        queue_size (int): How many events may wait for the consumer.
+    """
+    if not producers:
+        return
+    events_queue = queue.Queue(maxsize=max(queue_size, len(producers)))
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(producers))))
+    try:
+        for make_events in producers:
+            executor.submit(_produce, make_events, events_queue, stop)
+        remaining = len(producers)
+        while remaining:
+            event = events_queue.get()
+            if event is _END:
+                remaining -= 1
+            else:
+                yield event
+    finally:
+        # Reached early when the client disconnects: stop the producers.
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def to_ndjson(events):
+    for event in events:
+        yield json.dumps(event) + "\n"
+
+
+def to_sse(events):
+    for event in events:
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
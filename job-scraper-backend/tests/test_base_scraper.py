@@ -0,0 +1,44 @@
+# tests/test_base_scraper.py
+
+import asyncio
+import contextvars
+
+from scrapers.base_scraper import iterate_async
+
+scrape_name = contextvars.ContextVar("scrape_name", default=None)
+
+
+async def events(count):
+    for n in range(count):
+        await asyncio.sleep(0)
+        yield n, asyncio.get_running_loop(), scrape_name.get()
+
+
+def test_sync_callers_share_one_long_lived_loop():
+    first = list(iterate_async(events(2)))
+    second = list(iterate_async(events(2)))
+
+    loops = {loop for _, loop, _ in first + second}
+    assert len(loops) == 1
+    assert not loops.pop().is_closed()
+
+
+def test_items_run_in_the_callers_context():
+    scrape_name.set("jobinrwanda")
+    assert [name for _, _, name in iterate_async(events(3))] == ["jobinrwanda"] * 3
+
+
+def test_closing_early_closes_the_generator():
+    closed = []
+
+    async def tracked():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    items = iterate_async(tracked())
+    assert next(items) == 1
+    items.close()
+    assert closed == [True]
@@ -0,0 +1,85 @@
+# tests/test_circuit_breaker.py
+
+import asyncio
+import time
+
+import pytest
+
+from scrapers.async_http_client import AsyncHttpClient, httpx
+from scrapers.circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError
+from scrapers.http_client import HttpClient
+
+HOST = "probe.example"
+URL = f"https://{HOST}/jobs"
+
+
+def half_open(breaker):
+    """Opens the breaker and lets its cooldown pass."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record(503)
+    breaker.opened_at -= breaker.cooldown
+
+
+def make_client(tmp_path):
+    client = HttpClient(upstream_override="http://127.0.0.1:9")  # Nothing listens there
+    client.politeness.state_dir = str(tmp_path)
+    client.cache.enabled = False
+    return client
+
+
+def test_release_gives_the_probe_back():
+    breaker = CircuitBreaker(HOST, failure_threshold=1, cooldown=60)
+    half_open(breaker)
+    assert breaker.before_request() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()  # Only one probe at a time
+    breaker.release(True)
+    assert breaker.before_request() is True
+
+
+def test_check_does_not_claim_the_probe():
+    breaker = CircuitBreaker(HOST, failure_threshold=1, cooldown=60)
+    half_open(breaker)
+    breaker.check()
+    assert not breaker.probing
+    assert breaker.before_request() is True
+
+
+@pytest.mark.skipif(httpx is None, reason="needs httpx")
+def test_probe_cancelled_during_politeness_wait_is_not_lost(tmp_path):
+    client = make_client(tmp_path)
+    breaker = client.breaker_for(HOST)
+    half_open(breaker)
+    client.politeness.hold(HOST, 30)  # The request waits 30s for its slot
+    async_client = AsyncHttpClient(sync_client=client)
+
+    async def cancel_while_waiting():
+        task = asyncio.ensure_future(async_client.get(URL, timeout=1))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await async_client.aclose()
+
+    asyncio.run(cancel_while_waiting())
+    assert not breaker.probing
+    assert breaker.retry_after() == 0
+    assert breaker.before_request() is True  # The next request probes
+    assert breaker.state == HALF_OPEN
+
+
+@pytest.mark.skipif(httpx is None, reason="needs httpx")
+def test_open_circuit_fails_fast_without_politeness_wait(tmp_path):
+    client = make_client(tmp_path)
+    breaker = client.breaker_for(HOST)
+    for _ in range(breaker.failure_threshold):
+        breaker.record(503)
+    client.politeness.hold(HOST, 30)
+    async_client = AsyncHttpClient(sync_client=client)
+
+    started = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(async_client.get(URL, timeout=1))
+    with pytest.raises(CircuitOpenError):
+        client.get(URL, timeout=1)
+    assert time.monotonic() - started < 1
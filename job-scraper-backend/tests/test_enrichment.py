@@ -0,0 +1,64 @@
+# tests/test_enrichment.py
+
+import threading
+import time
+from types import SimpleNamespace
+
+import enrichment
+from enrichment import DetailCache, Enricher
+from scrapers.http_client import HttpClient
+
+
+class FakeClient(HttpClient):
+    """Answers every page after `delay` seconds, without sending anything."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.fetched = []
+        self._fetched_lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        time.sleep(self.delay)
+        with self._fetched_lock:
+            self.fetched.append(url)
+        return SimpleNamespace(status_code=200, content=url.encode(), raise_for_status=lambda: None)
+
+
+class DetailScraper:
+    def parse_details(self, content):
+        return {"description": content.decode()}
+
+
+def jobs_of(host, count):
+    return [{"title": f"Job {n}", "link": f"https://{host}/jobs/{n}"} for n in range(count)]
+
+
+def test_budget_follows_the_hosts_politeness(tmp_path, monkeypatch):
+    monkeypatch.setattr(enrichment, "http_client", FakeClient(0))
+    enricher = Enricher(DetailCache(str(tmp_path / "details.db")), max_wait=2)
+    try:
+        assert enricher.fetch_budget("unjobs.org") == 1
+        assert enricher.fetch_budget("www.jobinrwanda.com") == 16
+    finally:
+        enricher.shutdown()
+
+
+def test_slow_pages_are_pending_instead_of_blocking(tmp_path, monkeypatch):
+    client = FakeClient(0.5)
+    monkeypatch.setattr(enrichment, "http_client", client)
+    enricher = Enricher(DetailCache(str(tmp_path / "details.db")), max_wait=0.1)
+    try:
+        started = time.perf_counter()
+        jobs = enricher.enrich(DetailScraper(), jobs_of("unjobs.org", 5))
+        assert time.perf_counter() - started < 0.4
+        assert all(job["details"] is None and job["details_pending"] for job in jobs)
+
+        time.sleep(0.6)  # The one fetch started finishes in the background
+        assert client.fetched == ["https://unjobs.org/jobs/0"]
+        jobs = enricher.enrich(DetailScraper(), jobs_of("unjobs.org", 5))
+        assert jobs[0]["details"] == {"description": "https://unjobs.org/jobs/0"}
+        assert "details_pending" not in jobs[0]
+        assert all(job["details_pending"] for job in jobs[1:])
+    finally:
+        enricher.shutdown()
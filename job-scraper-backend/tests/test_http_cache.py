@@ -0,0 +1,96 @@
+# tests/test_http_cache.py
+
+import os
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from scrapers.http_cache import HttpCache
+
+URL = "https://www.example.org/jobs"
+
+
+def response(status=200, body=b"<html>jobs</html>", **headers):
+    result = requests.Response()
+    result.status_code = status
+    result.headers = CaseInsensitiveDict({name.replace("_", "-"): value for name, value in headers.items()})
+    result._content = body
+    result.url = URL
+    return result
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(path=os.path.join(tmp_path, "http_cache.db"))
+
+
+def test_304_is_rebuilt_into_the_stored_response(cache):
+    cache.update(URL, {}, None, response(ETag='"v1"', Last_Modified="Mon, 01 Jun 2026 08:00:00 GMT"))
+
+    entry = cache.lookup(URL, {})
+    assert not entry["fresh"]  # Validators but no lifetime: always revalidated
+    assert cache.conditional_headers(entry) == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jun 2026 08:00:00 GMT"}
+
+    rebuilt = cache.update(URL, {}, entry, response(304, b"", ETag='"v1"', Date="Tue, 02 Jun 2026 08:00:00 GMT"))
+    assert rebuilt.status_code == 200
+    assert rebuilt.content == b"<html>jobs</html>"
+    assert rebuilt.headers["Date"] == "Tue, 02 Jun 2026 08:00:00 GMT"
+    assert cache.lookup(URL, {})["headers"]["Date"] == "Tue, 02 Jun 2026 08:00:00 GMT"
+
+    changed = response(body=b"<html>new jobs</html>", ETag='"v2"')
+    assert cache.update(URL, {}, cache.lookup(URL, {}), changed) is changed
+    assert cache.lookup(URL, {})["body"] == b"<html>new jobs</html>"
+    assert cache.counters()["revalidated"] == 1 and cache.counters()["changed"] == 1
+
+
+def test_fresh_responses_are_served_without_revalidation(cache):
+    cache.update(URL, {}, None, response(Cache_Control="max-age=600", Age="60"))
+    entry = cache.lookup(URL, {})
+    assert entry["fresh"]
+    assert cache.serve_fresh(entry, URL).content == b"<html>jobs</html>"
+
+    # The request may still ask for a revalidation.
+    assert not cache.lookup(URL, {"Cache-Control": "no-cache"})["fresh"]
+    assert not cache.lookup(URL, {"Cache-Control": "max-age=0"})["fresh"]
+
+
+def test_no_store_and_no_cache_responses(cache):
+    cache.update(URL, {}, None, response(ETag='"v1"', Cache_Control="no-store"))
+    assert cache.lookup(URL, {}) is None
+
+    cache.update(URL, {}, None, response(ETag='"v1"', Cache_Control="no-cache, max-age=600"))
+    assert not cache.lookup(URL, {})["fresh"]
+
+    # A no-store answer also drops what was stored before.
+    cache.update(URL, {}, cache.lookup(URL, {}), response(ETag='"v2"', Cache_Control="no-store"))
+    assert cache.lookup(URL, {}) is None
+
+
+def test_vary_matches_the_request_headers(cache):
+    cache.update(URL, {"Accept-Language": "en"}, None, response(ETag='"en"', Vary="Accept-Language, Accept-Encoding"))
+    assert cache.lookup(URL, {"Accept-Language": "en"}) is not None
+    assert cache.lookup(URL, {"Accept-Language": "fr"}) is None
+
+    cache.update(URL, {}, None, response(ETag='"any"', Vary="*"))
+    assert cache.lookup(URL, {}) is None
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    cache = HttpCache(path=os.path.join(tmp_path, "http_cache.db"), max_bytes=400)
+    for n in range(4):
+        cache.update(f"{URL}/{n}", {}, None, response(body=b"x" * 100, ETag=f'"{n}"'))
+        time.sleep(0.01)
+    cache.serve_fresh(cache.lookup(f"{URL}/0", {}), f"{URL}/0")  # Used again: now the most recent
+    time.sleep(0.01)
+
+    cache.update(f"{URL}/4", {}, None, response(body=b"x" * 100, ETag='"4"'))
+    assert cache.lookup(f"{URL}/1", {}) is None
+    assert all(cache.lookup(f"{URL}/{n}", {}) is not None for n in (0, 2, 3, 4))
+    assert cache.stats()["bytes"] == 400 and cache.counters()["evicted"] == 1
+
+    # Bodies over a quarter of the cache are never stored.
+    cache.update(f"{URL}/big", {}, None, response(body=b"x" * 101, ETag='"big"'))
+    assert cache.lookup(f"{URL}/big", {}) is None
@@ -0,0 +1,125 @@
+# tests/test_job_store.py
+
+import os
+
+import pytest
+
+from job_store import InvalidCursorError, JobStore
+
+
+def job(link, title="Software Engineer", company="Acme"):
+    return {"title": title, "company": company, "link": link, "fingerprint": f"{link}:{title}"}
+
+
+def links(jobs):
+    return sorted(job["link"] for job in jobs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(os.path.join(tmp_path, "jobs.db"))
+
+
+def search_all(store, text, limit, **kwargs):
+    """Every page of a search, followed through its cursors."""
+    pages, cursor = [], None
+    while True:
+        page = store.search(text, limit=limit, cursor=cursor, **kwargs)
+        pages.append(page["jobs"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_search_pages_cover_every_match_once_best_first(store):
+    # Same title everywhere: the scores tie, and the pages go on by rowid.
+    store.replace_site_jobs("example", [job(f"dev-{n}", title="Python Developer") for n in range(7)])
+    store.replace_site_jobs("other", [job("nurse", title="Nurse")])
+
+    pages = search_all(store, "dev", limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    found = [found["link"] for page in pages for found in page]
+    assert sorted(found) == [f"dev-{n}" for n in range(7)]
+    scores = [found["score"] for page in pages for found in page]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_ranks_the_title_above_the_company(store):
+    store.replace_site_jobs("example", [
+        job("by-company", title="Accountant", company="Python Software Foundation"),
+        job("by-title", title="Python Engineer", company="Acme"),
+    ])
+    assert [found["link"] for found in store.search("python")["jobs"]] == ["by-title", "by-company"]
+
+
+def test_search_filters_sites_and_rejects_bad_cursors(store):
+    store.replace_site_jobs("example", [job("a")])
+    store.replace_site_jobs("other", [job("b")])
+    assert [found["site"] for found in store.search("software", sites=["other"])["jobs"]] == ["other"]
+    assert store.search("!!!") == {"jobs": [], "next_cursor": None}
+    with pytest.raises(InvalidCursorError):
+        store.search("software", cursor="not-a-cursor")
+
+
+def test_job_added_then_expired_past_the_page_is_never_sent(tmp_path):
+    store = JobStore(os.path.join(tmp_path, "jobs.db"))
+    store.replace_site_jobs("example", [job("a")])
+    cursor = store.changes()["cursor"]
+
+    store.replace_site_jobs("example", [job("a"), job("b"), job("c")])  # b, c added
+    store.replace_site_jobs("example", [job("a"), job("c")])  # b expired
+
+    # The first page holds the addition of b only, but b is gone by now:
+    # the page runs up to its expiry, and neither is sent.
+    page = store.changes(cursor, limit=1)
+    assert links(page["added"]) == ["c"]
+    assert page["expired"] == []
+    assert not page["has_more"]
+    assert store.changes(page["cursor"])["expired"] == []
+
+
+def test_changes_collapse_to_the_net_change_per_job(store):
+    store.replace_site_jobs("example", [job("kept"), job("renamed"), job("dropped")])
+    cursor = store.changes()["cursor"]
+
+    store.replace_site_jobs("example", [job("kept"), job("renamed", title="Senior Engineer"), job("dropped"), job("new")])
+    store.replace_site_jobs("example", [job("kept"), job("renamed", title="Lead Engineer"), job("new", title="Data Analyst")])
+
+    page = store.changes(cursor)
+    assert [(found["link"], found["title"]) for found in page["added"]] == [("new", "Data Analyst")]
+    assert [(found["link"], found["title"]) for found in page["updated"]] == [("renamed", "Lead Engineer")]
+    assert page["expired"] == [{"link": "dropped", "site": "example", "fingerprint": "dropped:Software Engineer"}]
+    assert not page["reset"] and not page["has_more"]
+
+    # Nothing changed: nothing logged, and the cursor stays.
+    store.replace_site_jobs("example", [job("kept"), job("renamed", title="Lead Engineer"), job("new", title="Data Analyst")])
+    again = store.changes(page["cursor"])
+    assert (again["added"], again["updated"], again["expired"]) == ([], [], [])
+    assert again["cursor"] == page["cursor"]
+
+
+def test_changes_page_through_with_has_more(store):
+    store.replace_site_jobs("example", [job("a")])
+    cursor = store.changes()["cursor"]
+    store.replace_site_jobs("example", [job("a"), job("b"), job("c"), job("d")])
+
+    first = store.changes(cursor, limit=2)
+    second = store.changes(first["cursor"], limit=2)
+    assert first["has_more"] and not second["has_more"]
+    assert links(first["added"] + second["added"]) == ["b", "c", "d"]
+
+
+def test_changes_reset_to_a_snapshot(tmp_path):
+    store = JobStore(os.path.join(tmp_path, "jobs.db"), change_retention=0)
+    store.replace_site_jobs("example", [job("a")])
+    snapshot = store.changes()
+    assert snapshot["reset"] and links(snapshot["added"]) == ["a"]
+
+    # A cursor the store never handed out.
+    assert store.changes(snapshot["cursor"] + 10)["reset"]
+
+    # A cursor older than the retained log: the changes after it were pruned.
+    store.replace_site_jobs("example", [job("a"), job("b")])
+    store.replace_site_jobs("example", [job("a"), job("b"), job("c")])  # Prunes the log of b
+    pruned = store.changes(snapshot["cursor"])
+    assert pruned["reset"] and links(pruned["added"]) == ["a", "b", "c"]
@@ -0,0 +1,68 @@
+# tests/test_opportunity_scraper.py
+
+from scrapers.opportunity_scraper import OpportunityScraper
+
+
+def raw_job(n, day):
+    return {"slug": f"job-{n}", "title_en": f"Job {n}", "created_at": f"2030-07-{day:02d}T08:00:00Z"}
+
+
+class UnsortedApi(OpportunityScraper):
+    """An API that ignores `sort`: oldest first, then a page of new jobs, then old ones again."""
+
+    PAGE_SIZE = 2
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def _fetch_page(self, offset, keyword=None, sort="default_ranking"):
+        page = offset // self.PAGE_SIZE
+        self.requested.append(page)
+        return self.pages[page] if page < len(self.pages) else [], None
+
+
+def test_fetch_new_jobs_stops_at_a_page_without_new_jobs_whatever_the_order():
+    old = [raw_job(n, 1) for n in range(2)]
+    new = [raw_job(10, 20), raw_job(11, 5)]  # Not sorted newest first
+    scraper = UnsortedApi([new, old] + [old] * 30)
+
+    jobs, watermark = scraper.fetch_new_jobs("2030-07-03T00:00:00Z")
+
+    assert [job["link"].rsplit("/", 1)[1] for job in jobs] == ["job-10", "job-11"]
+    assert watermark == "2030-07-20T08:00:00Z"
+    assert scraper.requested == [0, 1]
+
+
+class CappedApi(OpportunityScraper):
+    """An API that reports `total` opportunities, and serves them `PAGE_SIZE` at a time."""
+
+    PAGE_SIZE = 2
+    MAX_PAGES = 3
+
+    def __init__(self, total):
+        self.total = total
+
+    def _fetch_page(self, offset, keyword=None, sort="default_ranking"):
+        count = max(0, min(self.PAGE_SIZE, self.total - offset))
+        return [raw_job(offset + n, 1) for n in range(count)], self.total
+
+
+def test_listing_covers_keywords_only_when_it_reached_the_total():
+    complete = CappedApi(total=6)
+    assert len(complete.fetch_jobs()) == 6
+    assert complete.listing_covers("accountant")
+
+    capped = CappedApi(total=7)  # One past MAX_PAGES
+    assert len(capped.fetch_jobs()) == 6
+    assert not capped.listing_covers("accountant")
+    assert capped.listing_covers()
+
+
+def test_creation_dates_with_offsets_compare_in_utc():
+    created_at = OpportunityScraper._created_at
+    # 10:00 in Kigali (UTC+2) is before 09:00 UTC.
+    assert created_at({"published_date": "2030-07-01T10:00:00+02:00"}) < created_at(
+        {"published_date": "2030-07-01T09:00:00Z"})
+    assert created_at({"published_date": "2030-07-01T10:00:00+02:00"}) == created_at(
+        {"published_date": "2030-07-01T08:00:00.000Z"})
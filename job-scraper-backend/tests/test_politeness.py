@@ -0,0 +1,34 @@
+# tests/test_politeness.py
+
+import threading
+import time
+
+import pytest
+
+from scrapers.http_client import DEFAULT_POLICY
+from scrapers.politeness import PolitenessScheduler, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+
+
+def test_a_host_locked_by_another_worker_does_not_hold_back_other_hosts(tmp_path):
+    scheduler = PolitenessScheduler(lambda host: DEFAULT_POLICY, state_dir=str(tmp_path))
+    reserved = threading.Event()
+
+    # Another worker holds the schedule of unjobs.org.
+    with open(scheduler._path("unjobs.org"), "a+") as other_worker:
+        fcntl.flock(other_worker, fcntl.LOCK_EX)
+        blocked = threading.Thread(target=lambda: (scheduler.reserve("unjobs.org"), reserved.set()), daemon=True)
+        blocked.start()
+        time.sleep(0.1)  # The thread is now waiting for the flock
+
+        delays = []
+        other_host = threading.Thread(target=lambda: delays.append(scheduler.reserve("www.jobinrwanda.com")),
+                                      daemon=True)
+        other_host.start()
+        other_host.join(timeout=1)
+        assert delays == [0]
+        assert not reserved.is_set()
+
+    blocked.join(timeout=5)
+    assert reserved.is_set()
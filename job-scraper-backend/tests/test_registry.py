@@ -0,0 +1,15 @@
+# tests/test_registry.py
+
+from scrapers.registry import ScraperRegistry, discover_modules
+
+
+def test_sites_are_listed_in_the_given_order_then_by_name():
+    loaders = {name: object for name in ("zeta", "opportunity", "alpha", "jobinrwanda", "unjobs")}
+    registry = ScraperRegistry(loaders, order=("jobinrwanda", "unjobs", "opportunity"))
+    assert list(registry) == ["jobinrwanda", "unjobs", "opportunity", "alpha", "zeta"]
+
+
+def test_built_in_sites_keep_jobinrwanda_first():
+    order = ("jobinrwanda", "greatrwandajobs", "unjobs", "opportunity", "opphubafrica")
+    registry = ScraperRegistry(discover_modules(), order=order)
+    assert list(registry)[:len(order)] == list(order)
@@ -0,0 +1,81 @@
+# tests/test_scheduler.py
+
+import multiprocessing
+import os
+
+from job_store import JobStore
+from scheduler import PrescrapeScheduler
+from scrapers.base_scraper import BaseScraper, job_event, page_event
+
+
+def _claim(path, results):
+    results.put(JobStore(path).claim_sync("jobinrwanda", 1800))
+
+
+def test_only_one_worker_claims_a_site(tmp_path):
+    path = os.path.join(tmp_path, "jobs.db")
+    JobStore(path)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_claim, args=(path, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    claims = [results.get() for _ in workers]
+    assert claims.count(True) == 1
+
+
+def test_claim_is_free_again_after_the_interval(tmp_path):
+    store = JobStore(os.path.join(tmp_path, "jobs.db"))
+    assert store.claim_sync("unjobs", 1800)
+    assert not store.claim_sync("unjobs", 1800)
+    assert store.claim_sync("unjobs", 0)
+
+
+class FlakyScraper(BaseScraper):
+    """Lists `links`, with the page of `failed` links failing."""
+
+    def __init__(self, links, failed=()):
+        self.links = links
+        self.failed = failed
+
+    def iter_events(self, keyword=None):
+        for link in self.links:
+            yield job_event({"title": f"Job {link}", "company": "Acme", "link": link})
+        yield page_event("https://example.org/jobs/1", len(self.links))
+        if self.failed:
+            yield page_event("https://example.org/jobs/2", 0, ok=False)
+
+
+def stored_links(store, site):
+    return sorted(job["link"] for job in store.find_jobs(site))
+
+
+def test_incomplete_listing_expires_nothing(tmp_path):
+    store = JobStore(os.path.join(tmp_path, "jobs.db"))
+    scrapers = {"example": FlakyScraper(["a", "b", "c"])}
+    scheduler = PrescrapeScheduler(scrapers, store)
+    scheduler.sync_site("example")
+    cursor = store.changes()["cursor"]
+
+    scrapers["example"] = FlakyScraper(["a"], failed=["b", "c"])
+    scheduler.sync_site("example")
+    assert stored_links(store, "example") == ["a", "b", "c"]
+    assert store.changes(cursor)["expired"] == []
+
+    scrapers["example"] = FlakyScraper(["a", "b"])
+    scheduler.sync_site("example")
+    assert stored_links(store, "example") == ["a", "b"]
+    assert [job["link"] for job in store.changes(cursor)["expired"]] == ["c"]
+
+
+def test_sync_outcomes_are_counted(tmp_path):
+    store = JobStore(os.path.join(tmp_path, "jobs.db"))
+    scrapers = {"example": FlakyScraper(["a"])}
+    scheduler = PrescrapeScheduler(scrapers, store)
+    scheduler.sync_site("example")
+    scrapers["example"] = FlakyScraper(["a"], failed=["b"])
+    scheduler.sync_site("example")
+    scrapers["example"] = FlakyScraper([])
+    scheduler.sync_site("example")
+    assert scheduler.stats() == {("example", "full"): 1, ("example", "incomplete"): 1, ("example", "empty"): 1}
@@ -0,0 +1,49 @@
+# tests/test_single_flight.py
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from single_flight import SingleFlight, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+
+KEY = ("listing", "jobinrwanda")
+
+
+def _lead(lock_dir, started):
+    def scrape():
+        started.set()
+        time.sleep(0.5)
+        return ["job"]
+    SingleFlight(lock_dir=lock_dir).do(KEY, scrape)
+
+
+def test_waiting_worker_gets_the_leaders_result(tmp_path):
+    started = multiprocessing.Event()
+    leader = multiprocessing.Process(target=_lead, args=(str(tmp_path), started))
+    leader.start()
+    assert started.wait(10)
+
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    calls = []
+    result = flight.do(KEY, lambda: calls.append(1) or ["other"])
+    leader.join()
+
+    assert result == ["job"]
+    assert calls == []
+    assert flight.stats()["followers"] == 1
+
+
+def test_no_result_file_without_waiters(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    assert flight.do(KEY, lambda: ["job"]) == ["job"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+
+
+def test_unshared_keys_leave_no_files(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    flight.do(("scrape", "jobinrwanda", "any keyword"), lambda: [], shared=False)
+    assert os.listdir(tmp_path) == []